@@ -0,0 +1,145 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger("AnswerCache")
+
+# Bump when the key layout or stored answer format changes, old entries will just stop matching
+CACHE_SCHEMA_VERSION = 1
+
+
+class AnswerCache:
+    def __init__(self, db_path: str, ttl_sec: int, max_entries: int):
+        """
+        On-disk cache for LLM answers on form questions, SQLite backed
+
+        Entries expire after ttl_sec, and least recently used entries are evicted above max_entries
+
+        :param db_path: Path to the SQLite database file, created if needed
+        :param ttl_sec: Time to live of an entry in seconds
+        :param max_entries: Max amount of entries to keep
+        """
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        # Connection is shared between threads, guarded by the lock
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS answers ("
+                                  "key TEXT PRIMARY KEY, "
+                                  "question TEXT NOT NULL, "
+                                  "answer TEXT NOT NULL, "
+                                  "created REAL NOT NULL, "
+                                  "last_access REAL NOT NULL)")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS answers_last_access ON answers (last_access)")
+        self.__connection.commit()
+
+        logger.info(f"Answer cache opened at {db_path} ({len(self)} entries)")
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """
+        Normalize question label, so trivial differences in case and spacing don't produce new entries
+
+        :param question: Question label
+        :return: Normalized label
+        """
+        return " ".join(question.casefold().split())
+
+    @staticmethod
+    def fingerprint(text: str) -> str:
+        """
+        Short stable fingerprint of a text, e.g. serialized resume or prompt
+
+        :param text: Any text
+        :return: Hex digest
+        """
+        return hashlib.sha256(text.encode("UTF-8")).hexdigest()[:16]
+
+    @staticmethod
+    def make_key(question: str,
+                 options: list[str] | None,
+                 user_info_fingerprint: str,
+                 prompt_version: str) -> str:
+        """
+        Build cache key from everything that affects the answer
+
+        :param question: Question label
+        :param options: Options to choose from (None for free form questions)
+        :param user_info_fingerprint: Fingerprint of the resume
+        :param prompt_version: Fingerprint of the prompt used
+        :return: Cache key
+        """
+        key_parts = [str(CACHE_SCHEMA_VERSION),
+                     AnswerCache.normalize_question(question),
+                     "\x1f".join(sorted(options)) if options is not None else "",
+                     user_info_fingerprint,
+                     prompt_version]
+        return hashlib.sha256("\x1e".join(key_parts).encode("UTF-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """
+        Get cached answer, expired entries are dropped on access
+
+        :param key: Cache key from make_key
+        :return: Cached answer or None
+        """
+        now = time.time()
+
+        with self.__lock:
+            row = self.__connection.execute("SELECT answer, created FROM answers WHERE key = ?", (key,)).fetchone()
+
+            if row is not None and row[1] + self.ttl_sec < now:
+                self.__connection.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self.__connection.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.__connection.execute("UPDATE answers SET last_access = ? WHERE key = ?", (now, key))
+            self.__connection.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, question: str, answer: str) -> None:
+        """
+        Store answer and evict least recently used entries if over the limit
+
+        :param key: Cache key from make_key
+        :param question: Original question label, stored for debugging purposes
+        :param answer: Answer to store
+        """
+        now = time.time()
+
+        with self.__lock:
+            self.__connection.execute("INSERT OR REPLACE INTO answers (key, question, answer, created, last_access) "
+                                      "VALUES (?, ?, ?, ?, ?)", (key, question, answer, now, now))
+
+            self.__connection.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl_sec,))
+
+            self.__connection.execute("DELETE FROM answers WHERE key IN ("
+                                      "SELECT key FROM answers ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                                      (self.max_entries,))
+            self.__connection.commit()
+
+    def stats(self) -> str:
+        """
+        :return: Human-readable hit/miss stats
+        """
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.
+        return f"hits: {self.hits}, misses: {self.misses}, hit rate: {hit_rate:.0%}, entries: {len(self)}"
+
+    def __len__(self):
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
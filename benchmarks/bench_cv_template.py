@@ -0,0 +1,74 @@
+"""
+CV html: the whole Airium tree built for every CV vs a template with static fragments rendered once per config,
+where only LLM tailored sections are rendered and spliced in
+
+Reports time per CV and, per step, peak traced memory and memory blocks left allocated (tracemalloc)
+
+Uses app_config/user_info.yaml from the current working directory if there's one, built-in sample otherwise
+
+Run from the project root: python -m benchmarks.bench_cv_template
+"""
+import logging
+import timeit
+import tracemalloc
+from benchmarks.bench_resume_serialization import load_user_info
+from cv_sections import SHORT_INTRO, WORK_EXPERIENCE, HARD_SKILLS, SOFT_SKILLS
+from cv_template import CVTemplate, build_cv_html
+
+CVS = 500
+
+
+def traced(step: str, call) -> None:
+    """
+    Run the step once under tracemalloc and print what it allocated
+    """
+    tracemalloc.start()
+    before_bytes, _ = tracemalloc.get_traced_memory()
+    before_blocks = len(tracemalloc.take_snapshot().traces)
+    tracemalloc.reset_peak()
+
+    result = call()
+
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    after_blocks = len(tracemalloc.take_snapshot().traces)
+    tracemalloc.stop()
+    del result
+
+    print(f"    {step:<36} peak {(peak_bytes - before_bytes) / 1024:7.1f} KB, "
+          f"blocks left allocated {after_blocks - before_blocks:6}")
+
+
+def main():
+    logging.disable(logging.INFO)
+
+    user_info = load_user_info()
+    sections = {
+        SHORT_INTRO: {"title": "Backend Developer",
+                      "summary": "Python developer building web services. Experience with Django and PostgreSQL."},
+        WORK_EXPERIENCE: [{"company": e.company, "location": e.location, "position": e.position,
+                           "dates": f"{e.date_from} - {e.date_to}", "highlights": list(e.highlights)}
+                          for e in user_info.job_experience[:3]],
+        HARD_SKILLS: list(user_info.hard_skills[:8]),
+        SOFT_SKILLS: list(user_info.soft_skills[:8]),
+    }
+
+    template = CVTemplate(user_info)
+    assert template.render(sections) == build_cv_html(user_info, sections)
+
+    full_sec = timeit.timeit(lambda: build_cv_html(user_info, sections), number=CVS) / CVS
+    template_sec = timeit.timeit(lambda: template.render(sections), number=CVS) / CVS
+    build_sec = timeit.timeit(lambda: CVTemplate(user_info), number=CVS) / CVS
+
+    print(f"Whole Airium tree per CV      {full_sec * 1000:6.3f} ms per CV")
+    traced("whole tree (every CV)", lambda: build_cv_html(user_info, sections))
+
+    print(f"Template, sections spliced in {template_sec * 1000:6.3f} ms per CV, "
+          f"{full_sec / template_sec:.1f}x faster")
+    traced("template build (once per config)", lambda: CVTemplate(user_info))
+    traced("sections rendered and spliced (every CV)", lambda: template.render(sections))
+    print(f"    template build takes {build_sec * 1000:.3f} ms, paid back after "
+          f"{build_sec / max(full_sec - template_sec, 1e-9):.1f} CVs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Keep-alive connection pool and background warm-up, against two local mock servers (two providers)
+
+Mock servers delay the first response of every new connection, like DNS, TCP and TLS setup to a remote API.
+Compares default clients of the OpenAI SDK (a keep-alive pool per wrapper, as before the shared pool),
+a shared keep-alive pool opened by the first calls, and a shared pool warmed up in the background
+while Chrome would be launching
+
+Run from the project root: python -m benchmarks.bench_http_pool
+"""
+import logging
+import statistics
+import time
+from benchmarks.mock_openai_server import MockOpenAIServer
+from custom_types import HttpPoolSettings
+from http_pool import make_http_clients, ConnectionWarmUp
+from llm_client import ChatOpenAIWrapper
+
+CALLS = 20
+CONNECT_LATENCY_SEC = 0.25
+# Roughly what webdriver.Chrome takes to start
+CHROME_LAUNCH_SEC = 1.5
+
+MESSAGES = [("system", "Answer with one of the options."),
+            ("user", "Are you legally authorized to work in the EU?\nOptions: ['Yes', 'No']")]
+
+
+def run(name: str, settings: HttpPoolSettings | None, warm_up: bool) -> None:
+    """
+    :param settings: Settings of the shared pool, None for default clients of every wrapper
+    """
+    servers = [MockOpenAIServer(latency_sec=0.1, connect_latency_sec=CONNECT_LATENCY_SEC).start() for _ in range(2)]
+    http_client, http_async_client = make_http_clients(settings) if settings is not None else (None, None)
+    wrappers = [ChatOpenAIWrapper(model="mock", base_url=s.base_url, api_key="mock", name=f"Mock{i}",
+                                  http_client=http_client, http_async_client=http_async_client)
+                for i, s in enumerate(servers)]
+
+    if warm_up:
+        connection_warm_up = ConnectionWarmUp(wrappers).start()
+    time.sleep(CHROME_LAUNCH_SEC)
+    if warm_up:
+        connection_warm_up.join()
+
+    first_calls = []
+    steady = []
+    for i in range(CALLS):
+        for wrapper in wrappers:
+            start = time.perf_counter()
+            wrapper.invoke(MESSAGES)
+            (first_calls if i == 0 else steady).append(time.perf_counter() - start)
+
+    connections = sum(s.connections for s in servers)
+    print(f"{name:<34} first call {statistics.mean(first_calls) * 1000:4.0f} ms, "
+          f"steady state {statistics.mean(steady) * 1000:4.0f} ms, "
+          f"{connections:2} connections for {len(first_calls) + len(steady)} calls")
+
+    if http_client is not None:
+        http_client.close()
+    for server in servers:
+        server.stop()
+
+
+def main():
+    logging.disable(logging.INFO)
+
+    run("Default client per wrapper", None, warm_up=False)
+    run("Shared keep-alive pool", HttpPoolSettings(), warm_up=False)
+    run("Shared pool, warmed up at startup", HttpPoolSettings(), warm_up=True)
+
+
+if __name__ == '__main__':
+    main()
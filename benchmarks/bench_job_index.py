@@ -0,0 +1,138 @@
+"""
+Near-duplicate job detection over a synthetic stream of job postings
+
+Stream has original jobs, their reposts (other city, recruiting agency intro on top, a sentence dropped or
+reworded) and different roles of the same companies, sharing the company boilerplate with the originals.
+Every repost should reuse the original's CV, nothing else should
+
+Run from the project root: python -m benchmarks.bench_job_index
+"""
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from custom_types import DuplicateJobsSettings, Job
+from job_index import JobIndex
+
+COMPANIES = 60
+ROLES_PER_COMPANY = 3
+REPOSTS_PER_JOB = 2
+# What a CV costs without the index: a call per section and a render
+LLM_CALLS_PER_CV = 4
+
+CITIES = ["Berlin", "Munich", "Hamburg", "Warsaw", "Krakow", "Prague", "Vienna", "Amsterdam", "Lisbon", "Remote"]
+SENIORITY = ["Junior", "Middle", "Senior", "Lead", "Principal"]
+ROLES = ["Python Developer", "Backend Engineer", "Data Engineer", "ML Engineer", "DevOps Engineer",
+         "Frontend Developer", "QA Automation Engineer", "Android Developer", "Data Analyst", "SRE"]
+TECH = ["Python", "Django", "FastAPI", "PostgreSQL", "Kafka", "Kubernetes", "Terraform", "AWS", "GCP", "React",
+        "TypeScript", "Airflow", "Spark", "PyTorch", "Kotlin", "Redis", "Celery", "Docker", "Grafana", "Go"]
+VERBS = ["design", "build", "maintain", "scale", "own", "migrate", "monitor", "test", "document", "optimize"]
+THINGS = ["payment services", "data pipelines", "internal tools", "public APIs", "recommendation models",
+          "CI/CD pipelines", "mobile apps", "reporting dashboards", "search infrastructure", "billing systems"]
+PERKS = ["flexible hours", "a learning budget", "stock options", "30 days of vacation", "a gym membership",
+         "a yearly team offsite", "private health insurance", "a home office budget", "parental leave"]
+
+
+def boilerplate(rng: random.Random, company: str) -> list[str]:
+    return [f"{company} is a fast growing company with {rng.randint(50, 5000)} employees in "
+            f"{rng.randint(3, 30)} countries.",
+            f"Our mission is to make {rng.choice(THINGS)} simple for everyone.",
+            f"We offer {', '.join(rng.sample(PERKS, 4))}.",
+            f"{company} is an equal opportunity employer and values diversity of every kind.",
+            f"Teams at {company} work in short iterations, ship to production every day and own what they build.",
+            f"Hiring process: a call with a recruiter, a technical interview with {rng.choice(TECH)} engineers, "
+            f"and a meeting with the team.",
+            f"Our offices are in {', '.join(rng.sample(CITIES, 3))}, and most teams are distributed.",
+            "We believe in giving people trust and autonomy, and we expect ownership in return.",
+            "Join us and help shape the future of our product."]
+
+
+def role(rng: random.Random, company: str, city: str) -> Job:
+    title = f"{rng.choice(SENIORITY)} {rng.choice(ROLES)}"
+    duties = [f"You will {rng.choice(VERBS)} {rng.choice(THINGS)} with {' and '.join(rng.sample(TECH, 2))}."
+              for _ in range(10)]
+    skills = [f"{rng.randint(1, 8)}+ years of experience with {tech}." for tech in rng.sample(TECH, 8)]
+    desc = "\n".join([f"About the job\n{title} in {city}", *duties, "Requirements:", *skills,
+                      *boilerplate(random.Random(company), company)])
+    return Job(title=title, company=company, location=city, desc=desc)
+
+
+def repost(rng: random.Random, job: Job) -> Job:
+    city = rng.choice([c for c in CITIES if c != job.location])
+    lines = job.desc.replace(job.location, city).split("\n")
+    # Agencies drop or reword a line and put their intro on top
+    lines.pop(rng.randrange(2, len(lines)))
+    changed = rng.randrange(2, len(lines))
+    lines[changed] = lines[changed].replace("experience with", "hands-on experience in")
+    agency = f"Recruiting Agency {rng.randint(1, 20)}"
+    return Job(title=f"{job.title} ({city})" if rng.random() < .5 else job.title, company=agency, location=city,
+               desc="\n".join([f"{agency} is hiring on behalf of a client.", *lines]))
+
+
+def main():
+    logging.disable(logging.INFO)
+
+    rng = random.Random(42)
+    # (job, original it's a repost of or None)
+    stream: list[tuple[Job, int | None]] = []
+    for c in range(COMPANIES):
+        for _ in range(ROLES_PER_COMPANY):
+            job = role(rng, f"Company {c}", rng.choice(CITIES))
+            original = len(stream)
+            stream.append((job, None))
+            stream.extend((repost(rng, job), original) for _ in range(REPOSTS_PER_JOB))
+    # Reposts come after every original, in random order
+    reposts = [i for i, (_, original) in enumerate(stream) if original is not None]
+    rng.shuffle(reposts)
+    order = [i for i, (_, original) in enumerate(stream) if original is None] + reposts
+
+    settings = DuplicateJobsSettings()
+    with tempfile.TemporaryDirectory() as folder:
+        index = JobIndex(os.path.join(folder, "job_index.sqlite3"),
+                         similarity_threshold=settings.similarity_threshold,
+                         title_similarity_threshold=settings.title_similarity_threshold,
+                         ttl_sec=settings.ttl_sec, max_entries=settings.max_entries,
+                         num_perm=settings.num_perm, bands=settings.bands, shingle_size=settings.shingle_size)
+        group = JobIndex.group_key("resume", "prompts")
+
+        cv_of_job: dict[int, str] = {}
+        lookups, adds = [], []
+        # Job -> original of its cluster, a repost may reuse CV of another repost generated because of a miss
+        cluster_of_cv: dict[str, int] = {}
+        correct = wrong = missed = 0
+        for i in order:
+            job, original = stream[i]
+
+            start = time.perf_counter()
+            duplicate = index.lookup(job, group)
+            lookups.append(time.perf_counter() - start)
+
+            if duplicate is not None:
+                if original is not None and cluster_of_cv[duplicate[0]] == original:
+                    correct += 1
+                else:
+                    wrong += 1
+                continue
+            if original is not None:
+                missed += 1
+
+            cv_of_job[i] = os.path.join(folder, f"{i}.pdf")
+            open(cv_of_job[i], "wb").close()
+            cluster_of_cv[cv_of_job[i]] = original if original is not None else i
+            start = time.perf_counter()
+            index.add(job, group, cv_of_job[i])
+            adds.append(time.perf_counter() - start)
+
+        print(f"{len(stream)} jobs: {len(stream) - len(reposts)} distinct roles, {len(reposts)} reposts")
+        print(f"Reposts reusing a CV of the same job {correct}/{len(reposts)}, missed {missed}, "
+              f"wrong CV reused {wrong}")
+        print(f"Job index {index.stats()}")
+        print(f"Lookup {statistics.mean(lookups) * 1000:.2f} ms, add {statistics.mean(adds) * 1000:.2f} ms mean")
+        print(f"CVs generated {len(adds)} instead of {len(stream)}, "
+              f"LLM calls saved {index.hits * LLM_CALLS_PER_CV}, PDF renders saved {index.hits}")
+
+
+if __name__ == '__main__':
+    main()
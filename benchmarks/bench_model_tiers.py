@@ -0,0 +1,88 @@
+"""
+Model tier routing, against two local mock servers: a slower strong model and a faster cheap one
+
+Mock servers report gpt-4o and gpt-4o-mini as their models, so langchain prices calls like OpenAI does.
+A form page of typical questions is answered with every call on the default tier,
+then with simple questions routed to the fast tier
+
+Run from the project root: python -m benchmarks.bench_model_tiers
+"""
+import logging
+import statistics
+import time
+from langchain_community.callbacks import get_openai_callback
+from benchmarks.mock_openai_server import MockOpenAIServer
+from custom_types import FieldTypeEnum, ProviderSettings, RouterSettings, RetrySettings, TierRouteSettings
+from llm_client import make_provider_router
+from model_tiers import ModelTierRouter, DEFAULT_TIER
+
+PROMPT = [("system", "You answer job application questions. Wrap the answer into <answer></answer> tags."),
+          ("human", "Resume:\n" + "Built services with Python, Django and PostgreSQL on AWS.\n" * 40 + "Question: {}")]
+
+# (prompt name, field type, question, options)
+PAGE = [("answer_with_options", FieldTypeEnum.RADIO, "Are you legally authorized to work in Germany?", ["Yes", "No"]),
+        ("answer_with_options", FieldTypeEnum.LIST, "Do you require visa sponsorship?", ["Yes", "No"]),
+        ("answer_with_options", FieldTypeEnum.RADIO, "Are you comfortable commuting to this job's location?",
+         ["Yes", "No"]),
+        ("answer_freely", FieldTypeEnum.INPUT, "How many years of experience do you have with Kubernetes?", None),
+        ("answer_freely", FieldTypeEnum.INPUT, "Notice period?", None),
+        ("answer_with_options", FieldTypeEnum.LIST, "Which of our offices would you prefer to work from?",
+         [f"Office {i}" for i in range(12)]),
+        ("answer_freely", FieldTypeEnum.INPUT,
+         "Describe a project where you improved performance of a distributed system, what was the bottleneck, "
+         "how did you measure it and what was the outcome?", None),
+        ("cv_fill_in", None, "", None)] * 5
+
+# Simple questions to the fast tier, as in the llm_settings.py example
+ROUTES = [TierRouteSettings(prompt="answer_with_options", max_options=5, max_question_chars=150, tier="fast"),
+          TierRouteSettings(prompt="answer_freely", max_question_chars=100, tier="fast")]
+
+
+def run(name: str, tiers_enabled: bool, default_url: str, fast_url: str) -> None:
+    router_settings = RouterSettings()
+    retry = RetrySettings()
+    tier_chats = {DEFAULT_TIER: make_provider_router(
+        [ProviderSettings(name="Strong", type="openai", model="gpt-4o", base_url=default_url, api_key="mock")],
+        router_settings, retry)}
+    tier_chats["fast"] = make_provider_router(
+        [ProviderSettings(name="Fast", type="openai", model="gpt-4o-mini", base_url=fast_url, api_key="mock",
+                          temperature=0.)],
+        router_settings, retry)
+    model_tiers = ModelTierRouter(ROUTES, set(tier_chats))
+
+    latencies: dict[str, list[float]] = {}
+    costs: dict[str, float] = {}
+    start = time.perf_counter()
+    for prompt_name, field_type, question, options in PAGE:
+        tier = model_tiers.route(prompt_name, [(field_type, question, options)] if question else None) \
+            if tiers_enabled else DEFAULT_TIER
+        messages = [(role, text.format(question)) for role, text in PROMPT]
+
+        call_start = time.perf_counter()
+        with get_openai_callback() as cb:
+            tier_chats[tier].invoke(messages)
+        latencies.setdefault(tier, []).append(time.perf_counter() - call_start)
+        costs[tier] = costs.get(tier, 0.) + cb.total_cost
+    total = time.perf_counter() - start
+
+    print(f"{name:<16} page of {len(PAGE)} calls {total:5.2f} sec, cost {sum(costs.values()):.4f} USD")
+    for tier, tier_latencies in latencies.items():
+        print(f"    {tier:<8} {len(tier_latencies):3} calls, mean {statistics.mean(tier_latencies) * 1000:4.0f} ms, "
+              f"cost per call {costs[tier] / len(tier_latencies):.5f} USD")
+
+
+def main():
+    logging.disable(logging.INFO)
+
+    strong = MockOpenAIServer(latency_sec=0.3, completion="<answer>Yes</answer>").start()
+    fast = MockOpenAIServer(latency_sec=0.06, completion="<answer>Yes</answer>").start()
+
+    run("Default tier", False, strong.base_url, fast.base_url)
+    run("Tiered routing", True, strong.base_url, fast.base_url)
+
+    strong.stop()
+    fast.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+HTML to PDF: pyhtml2pdf (a fresh headless Chrome for every CV) vs one long-lived headless Chrome (PdfRenderer)
+
+Needs Chrome and chromedriver, like the bot itself. Peak RSS is of this process and every browser process
+it started, sampled while converting, it's measured only if psutil is installed
+
+Run from the project root: python -m benchmarks.bench_pdf_renderer
+"""
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from pyhtml2pdf import converter
+from pdf_renderer import PdfRenderer
+
+CVS = 5
+
+ENTRY = ("<h3 class='subheading'>Acme - Berlin - <em>Software Developer</em></h3><p><strong>2020 - 2024</strong></p>"
+         "<ul><li>Built Django services for 2M users</li><li>Cut p95 latency by 40%</li>"
+         "<li>Moved batch jobs to Celery</li></ul>")
+SKILLS = "".join(f"<li>Skill {i}</li>" for i in range(8))
+# Same layout as CVManager makes, without web fonts, so the network doesn't skew the numbers
+CV_HTML = ("<!DOCTYPE html><html lang='en'><head><meta charset='UTF-8'><title>The Resume</title><style>"
+           "body { font-family: sans-serif; margin: 0; } .container { display: flex; }"
+           ".left-column { width: 65%; padding: 20px; } .right-column { width: 35%; padding: 20px; }"
+           ".section-title { border-bottom: 1px solid #333; } .italic { font-style: italic; }"
+           "</style></head><body><div class='container'><div class='left-column'>"
+           "<h1>John Doe</h1><p class='subheading'>Backend Developer</p><p class='italic'>Skilled in Python.</p>"
+           f"<div class='section'><h2 class='section-title'>Work Experience</h2>{ENTRY * 3}</div></div>"
+           "<div class='right-column'>"
+           f"<div class='section'><h2 class='section-title'>Hard Skills</h2><ul>{SKILLS}</ul></div>"
+           f"<div class='section'><h2 class='section-title'>Soft Skills</h2><ul>{SKILLS}</ul></div>"
+           "</div></div></body></html>")
+
+
+class PeakRss:
+    def __init__(self, interval_sec: float = 0.05):
+        """
+        Peak RSS of this process and all of its descendants, None without psutil
+        """
+        self.interval_sec = interval_sec
+        self.peak: int | None = None
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+    def __sample(self, psutil) -> None:
+        process = psutil.Process()
+        while not self.__stop.is_set():
+            rss = 0
+            for p in [process, *process.children(recursive=True)]:
+                try:
+                    rss += p.memory_info().rss
+                except psutil.Error:
+                    pass
+            self.peak = max(self.peak or 0, rss)
+            self.__stop.wait(self.interval_sec)
+
+    def __enter__(self) -> "PeakRss":
+        try:
+            import psutil
+        except ImportError:
+            return self
+        self.__thread = threading.Thread(target=self.__sample, args=(psutil,), daemon=True)
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __str__(self) -> str:
+        return f"{self.peak / 2 ** 20:5.0f} MB" if self.peak is not None else "n/a (pip install psutil)"
+
+
+def report(name: str, first: float, rest: list[float], peak_rss: PeakRss) -> None:
+    print(f"{name:<34} first CV {first:5.2f} sec, next CVs {statistics.mean(rest):5.2f} sec each, "
+          f"peak RSS {peak_rss}")
+
+
+def main():
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as folder:
+        html_path = os.path.join(folder, "resume_html.html")
+        pdf_path = os.path.join(folder, "resume.pdf")
+
+        # pyhtml2pdf the way CVManager used it, minus the chromedriver download it does on every call
+        durations = []
+        with PeakRss() as peak_rss:
+            for _ in range(CVS):
+                start = time.perf_counter()
+                with open(html_path, "w", encoding="UTF-8") as f:
+                    f.write(CV_HTML)
+                converter.convert(f"file:///{html_path}", pdf_path, install_driver=False)
+                durations.append(time.perf_counter() - start)
+        report("pyhtml2pdf, Chrome per CV", durations[0], durations[1:], peak_rss)
+
+    renderer = PdfRenderer()
+    durations = []
+    with PeakRss() as peak_rss:
+        for _ in range(CVS):
+            start = time.perf_counter()
+            renderer.render(CV_HTML)
+            durations.append(time.perf_counter() - start)
+    report("PdfRenderer, cold start", durations[0], durations[1:], peak_rss)
+
+    # Launched in the background at startup, while the bot logs in and searches for jobs
+    renderer.close()
+    renderer.start_in_background().join()
+    durations = []
+    with PeakRss() as peak_rss:
+        for _ in range(CVS):
+            start = time.perf_counter()
+            renderer.render(CV_HTML)
+            durations.append(time.perf_counter() - start)
+    report("PdfRenderer, launched at startup", durations[0], durations[1:], peak_rss)
+    print(f"Healthy: {renderer.is_healthy()}, renders {renderer.renders}, restarts {renderer.restarts}")
+    renderer.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Prompt layout for provider prefix caching, against a local mock server that caches prompt prefixes
+like DeepSeek does and spends prefill time only on prompt tokens that are not cached
+
+Compares resume pruned by ResumeRetriever (resume.pruning, fewer tokens, but the prompt changes with the sections
+a question needs, so only calls with the same sections share a cached prefix) with the prefix cache layout
+(whole resume at the end of the system message, the question is the only thing that changes, at the very end)
+
+Uses app_config/user_info.yaml from the current working directory if there's one, built-in sample otherwise
+
+Run from the project root: python -m benchmarks.bench_prefix_cache
+"""
+import logging
+import statistics
+import time
+from benchmarks.bench_resume_serialization import load_user_info
+from benchmarks.mock_openai_server import MockOpenAIServer
+from custom_types import FewShotPrompt, OneShot, ResumeSettings
+from llm_client import ChatOpenAIWrapper
+from prompt_registry import build_prompt
+from resume_retriever import ResumeRetriever
+
+PREFILL_SEC_PER_1K_TOKENS = 0.15
+
+PROMPT = FewShotPrompt(
+    system_message="You answer job application questions using the resume. "
+                   "Wrap the answer into <answer></answer> tags. If there is no data answer CANDIDATE_NO_DATA.",
+    user_message_template="Resume:\n{resume}\nQuestion: {question}",
+    examples=[OneShot(user_message="Question: How many years of experience with Python?",
+                      ai_message="<answer>5</answer>"),
+              OneShot(user_message="Question: What is your notice period?",
+                      ai_message="<answer>2 weeks</answer>")])
+
+# Questions of typical Easy Apply forms, the kinds repeat from job to job
+QUESTIONS = [
+    "How many years of experience do you have with Python?",
+    "How many years of experience do you have with Kubernetes?",
+    "Do you have a Master's degree?",
+    "What is your level of proficiency in German?",
+    "Are you legally authorized to work in the EU?",
+    "What is your notice period?",
+    "What are your salary expectations?",
+    "Have you worked in a startup environment?",
+    "Do you have AWS certifications?",
+    "Are you willing to relocate?",
+] * 3
+
+# Price of a cached prompt token relative to an uncached one
+CACHED_PRICE = {"DeepSeek": 0.1, "OpenAI": 0.5}
+
+
+def run(name: str, prefix_cache: bool) -> None:
+    user_info = load_user_info()
+    full_resume = user_info.serialize("yaml")
+    # Same settings as the bot, pruning is only used without the prefix cache layout
+    settings = ResumeSettings()
+    retriever = None if prefix_cache else ResumeRetriever(token_budget=settings.token_budget,
+                                                         min_confidence=settings.min_confidence,
+                                                         always_include=settings.always_include)
+
+    server = MockOpenAIServer(latency_sec=0.05, prefill_sec_per_1k_tokens=PREFILL_SEC_PER_1K_TOKENS).start()
+    wrapper = ChatOpenAIWrapper(model="mock", base_url=server.base_url, api_key="mock", name="Mock")
+    prompt = build_prompt(PROMPT, 2, prefix_cache)
+
+    latencies = []
+    prompt_tokens = 0
+    cached_tokens = 0
+    for question in QUESTIONS:
+        resume = retriever.retrieve([question], user_info, 1, "yaml") if retriever is not None else None
+        resume = resume or full_resume
+        prompt_value = prompt.invoke({"resume": resume, "question": question})
+        start = time.perf_counter()
+        message = wrapper.invoke(prompt_value)
+        latencies.append(time.perf_counter() - start)
+        prompt_tokens += message.usage_metadata["input_tokens"]
+        cached_tokens += message.usage_metadata["input_token_details"].get("cache_read", 0)
+
+    server.stop()
+    uncached_tokens = prompt_tokens - cached_tokens
+    billed = ", ".join(f"{provider} {(uncached_tokens + cached_tokens * price) / len(QUESTIONS):4.0f}"
+                       for provider, price in CACHED_PRICE.items())
+    print(f"{name:<22} prompt tokens per call {prompt_tokens // len(QUESTIONS):5}, "
+          f"cached {cached_tokens / prompt_tokens:4.0%}, "
+          f"mean latency {statistics.mean(latencies) * 1000:4.0f} ms, "
+          f"after the first call {statistics.mean(latencies[1:]) * 1000:4.0f} ms")
+    print(f"{'':<22} billed as uncached prompt tokens per call: {billed}")
+
+
+def main():
+    logging.disable(logging.INFO)
+
+    run("Pruned resume", False)
+    run("Prefix cache layout", True)
+
+
+if __name__ == '__main__':
+    main()
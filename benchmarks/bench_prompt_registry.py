@@ -0,0 +1,57 @@
+"""
+Per-call prompt overhead: building prompt templates on every call vs the compile-once registry
+
+Run from the project root: python -m benchmarks.bench_prompt_registry
+"""
+import timeit
+from custom_types import FewShotPrompt, OneShot
+from prompt_registry import build_prompt, PromptRegistry
+
+CALLS = 2000
+
+# Roughly the size of a real config, resume is the biggest part
+PROMPT = FewShotPrompt(
+    system_message="You answer job application questions about the candidate. " * 10,
+    user_message_template="Resume:\n{resume}\n\nQuestion: {question}\nOptions: {options}",
+    examples=[OneShot(user_message=f"Question: example question {i}?\nOptions: ['Yes', 'No']",
+                      ai_message="<answer>Yes</answer>") for i in range(4)])
+
+INPUTS = {"resume": "key: value\n" * 300,
+          "question": "Are you legally authorized to work in the EU?",
+          "options": "['Yes', 'No']"}
+
+
+def main():
+    registry = PromptRegistry()
+
+    for mode in (0, 1, 2):
+        # What every call did before: build, render once for debug logging, render again for the actual call
+        def before():
+            prompt = build_prompt(PROMPT, mode)
+            "{}".format(prompt.invoke(INPUTS))
+            prompt.invoke(INPUTS)
+
+        # Now: registry lookup, debug rendering skipped when DEBUG is off
+        def after():
+            prompt = registry.get(PROMPT, mode)
+            prompt.invoke(INPUTS)
+
+        # Only the part that was actually removed
+        def build_only():
+            build_prompt(PROMPT, mode)
+
+        def registry_only():
+            registry.get(PROMPT, mode)
+
+        before_us = timeit.timeit(before, number=CALLS) / CALLS * 1e6
+        after_us = timeit.timeit(after, number=CALLS) / CALLS * 1e6
+        build_us = timeit.timeit(build_only, number=CALLS) / CALLS * 1e6
+        registry_us = timeit.timeit(registry_only, number=CALLS) / CALLS * 1e6
+
+        print(f"Example mode {mode}: "
+              f"per call {before_us:.0f} us -> {after_us:.0f} us, "
+              f"prompt build {build_us:.1f} us -> registry lookup {registry_us:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
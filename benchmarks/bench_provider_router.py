@@ -0,0 +1,71 @@
+"""
+Provider router against two local mock OpenAI-compatible servers:
+a fast one with rare latency spikes and a slower steady one
+
+Compares a single hardwired provider, routing alone and routing with hedged requests
+
+Run from the project root: python -m benchmarks.bench_provider_router
+"""
+import logging
+import statistics
+import time
+from benchmarks.mock_openai_server import MockOpenAIServer
+from llm_client import ChatOpenAIWrapper
+from provider_router import ProviderRouter
+
+CALLS = 60
+
+MESSAGES = [("system", "Answer with one of the options."),
+            ("user", "Are you legally authorized to work in the EU?\nOptions: ['Yes', 'No']")]
+
+
+def run(name: str, call) -> None:
+    latencies = []
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    print(f"{name:<28} mean {statistics.mean(latencies) * 1000:5.0f} ms, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:5.0f} ms, "
+          f"p95 {latencies[int(0.95 * len(latencies))] * 1000:5.0f} ms, "
+          f"max {latencies[-1] * 1000:5.0f} ms")
+
+
+def main():
+    logging.disable(logging.INFO)
+
+    def make_servers():
+        return (MockOpenAIServer(latency_sec=0.1, jitter_sec=0.05, spike_rate=0.1, spike_latency_sec=1.5,
+                                 seed=1).start(),
+                MockOpenAIServer(latency_sec=0.35, jitter_sec=0.05, seed=2).start())
+
+    def make_providers(spiky, steady):
+        return {"Spiky": ChatOpenAIWrapper(model="mock", base_url=spiky.base_url, api_key="mock", name="Spiky"),
+                "Steady": ChatOpenAIWrapper(model="mock", base_url=steady.base_url, api_key="mock", name="Steady")}
+
+    for scenario in ("single", "routed", "hedged"):
+        spiky, steady = make_servers()
+        providers = make_providers(spiky, steady)
+        # p90 here, with 10% spikes p95 would be a spike itself
+        router = ProviderRouter(providers, hedge_quantile=0.9, hedge_default_delay_sec=0.5)
+
+        match scenario:
+            case "single":
+                run("Single provider (Spiky)", lambda: providers["Spiky"].invoke(MESSAGES))
+            case "routed":
+                run("Router, no hedging", lambda: router.invoke(MESSAGES))
+            case "hedged":
+                run("Router, hedged", lambda: router.invoke(MESSAGES, hedge=True))
+
+        if scenario != "single":
+            print("  " + router.stats().replace("\n", "\n  "))
+        print(f"  requests served: Spiky {spiky.requests}, Steady {steady.requests}")
+
+        spiky.stop()
+        steady.stop()
+
+
+if __name__ == '__main__':
+    main()
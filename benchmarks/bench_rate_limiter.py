@@ -0,0 +1,58 @@
+"""
+Burst of concurrent calls against a local mock server limited to 120 requests per minute,
+like applying to many jobs at once with a low-tier API key
+
+Compares no retries at all, retries with backoff alone, and the client-side limiter with retries
+
+Run from the project root: python -m benchmarks.bench_rate_limiter
+"""
+import asyncio
+import logging
+import time
+from benchmarks.mock_openai_server import MockOpenAIServer
+from llm_client import ChatOpenAIWrapper
+from rate_limiter import RateLimiter
+
+CALLS = 40
+REQUESTS_PER_MINUTE = 120
+
+MESSAGES = [("system", "Answer with one of the options."),
+            ("user", "Are you legally authorized to work in the EU?\nOptions: ['Yes', 'No']")]
+
+
+async def run(name: str, wrapper: ChatOpenAIWrapper, server: MockOpenAIServer) -> None:
+    async def call():
+        try:
+            await wrapper.ainvoke(MESSAGES)
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(call() for _ in range(CALLS)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<24} succeeded {sum(results):3}/{CALLS}, {elapsed:5.1f} sec, "
+          f"{sum(results) / elapsed * 60:5.0f} calls/min, "
+          f"requests sent {server.requests + server.throttled:3}, throttled {server.throttled:3}")
+
+
+def main():
+    logging.disable(logging.WARNING)
+
+    limiters = {
+        "No retries": RateLimiter("Mock", max_retries=0),
+        "Retries only": RateLimiter("Mock", max_retries=8, base_delay_sec=0.5, max_delay_sec=8.),
+        "Limiter and retries": RateLimiter("Mock", requests_per_minute=REQUESTS_PER_MINUTE,
+                                           max_retries=8, base_delay_sec=0.5, max_delay_sec=8.),
+    }
+    for name, limiter in limiters.items():
+        server = MockOpenAIServer(latency_sec=0.1, requests_per_minute=REQUESTS_PER_MINUTE, burst=5).start()
+        wrapper = ChatOpenAIWrapper(model="mock", base_url=server.base_url, api_key="mock", name="Mock",
+                                    rate_limiter=limiter)
+        asyncio.run(run(name, wrapper, server))
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Resume serialization: YAML-like vs compact format, token counts and serialization time
+
+Uses app_config/user_info.yaml from the current working directory if there's one, built-in sample otherwise
+
+Run from the project root: python -m benchmarks.bench_resume_serialization
+"""
+import os
+import timeit
+import yaml
+from custom_types import UserInfo
+
+CALLS = 1000
+
+CL100K_PRETOKENIZE_PATTERN = (r"(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}|"
+                              r" ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+")
+
+SAMPLE_USER_INFO_YAML = {
+    "personal": {"name": "John", "surname": "Doe", "country": "Germany", "city": "Berlin",
+                 "phone_prefix": "+49", "phone": "1234567", "email": "john@example.com",
+                 "linkedin": "https://linkedin.com/in/john"},
+    "education": [{"degree_name": "Master of Science", "educational_institution": "TU Berlin",
+                   "field_of_study": "Computer Science", "date_from": "2012", "date_to": "2014",
+                   "exams": [{"name": "IELTS", "score": "8.0"}]}],
+    "job_experience": [{"position": f"Software Developer {i}", "company": f"Company {i}", "location": "Berlin",
+                        "industry": "Software", "date_from": f"{2010 + i}-01", "date_to": f"{2011 + i}-01",
+                        "highlights": [f"Did a notable thing number {j} with Python and C++" for j in range(4)]}
+                       for i in range(5)],
+    "hard_skills": ["Python", "C++", "Django", "Docker", "Kubernetes", "AWS", "SQL", "Git"],
+    "soft_skills": ["Teamwork", "Communication", "Mentoring"],
+    "projects": [{"name": "Bot", "description": "LinkedIn bot", "link": "https://github.com/john/bot"}],
+    "achievements": [{"name": "Hackathon winner", "date": "2020", "description": "First place"}],
+    "certifications": [{"name": "AWS Certified Developer", "date": "2021"}],
+    "languages": [{"language": "English", "proficiency": "C1"}, {"language": "German", "proficiency": "Native"}],
+    "interests": ["Chess", "Hiking"],
+    "availability": "2 weeks",
+    "expected_salary_range_usd": "80000 - 100000",
+    "self_identification": {"gender": "Male", "veteran": "No", "disability": "No"},
+    "legal_authorization": {"eu_work_authorization": True, "requires_us_visa": True},
+    "work_preferences": {"remote_work": True, "open_to_relocation": False},
+}
+
+
+def count_tokens(text: str) -> tuple[int, str]:
+    """
+    :return: Token count and how it was counted
+    """
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text)), "tiktoken cl100k_base"
+    # Not installed, or can't download the encoding
+    except Exception:  # noqa
+        pass
+
+    try:
+        # Same pre-tokenization cl100k_base does, common words are a single token, so it's close enough
+        import regex
+        return len(regex.findall(CL100K_PRETOKENIZE_PATTERN, text)), "cl100k pre-tokenizer estimate"
+    except ImportError:
+        return len(text) // 4, "estimate, 4 chars per token"
+
+
+def load_user_info() -> UserInfo:
+    user_info_path = os.path.join(os.getcwd(), "app_config", "user_info.yaml")
+    if os.path.exists(user_info_path):
+        with open(user_info_path, "r", encoding="UTF-8") as f:
+            return UserInfo.from_user_info_yaml(yaml.safe_load(f))
+    return UserInfo.from_user_info_yaml(SAMPLE_USER_INFO_YAML)
+
+
+def main():
+    user_info = load_user_info()
+
+    yaml_resume = str(user_info)
+    compact_resume = user_info.to_compact()
+
+    yaml_tokens, method = count_tokens(yaml_resume)
+    compact_tokens, _ = count_tokens(compact_resume)
+
+    print(f"Tokens ({method}): yaml {yaml_tokens}, compact {compact_tokens} "
+          f"({1 - compact_tokens / yaml_tokens:.0%} fewer)")
+    print(f"Characters: yaml {len(yaml_resume)}, compact {len(compact_resume)}")
+
+    yaml_us = timeit.timeit(lambda: str(user_info), number=CALLS) / CALLS * 1e6
+    compact_us = timeit.timeit(user_info.to_compact, number=CALLS) / CALLS * 1e6
+    memo = {}
+    memo_us = timeit.timeit(lambda: memo.get("yaml") or memo.setdefault("yaml", str(user_info)),
+                            number=CALLS) / CALLS * 1e6
+    print(f"Serialization per call: yaml {yaml_us:.1f} us, compact {compact_us:.1f} us, memoized {memo_us:.2f} us")
+
+    # Linear time check, time per job experience entry should stay flat
+    for entries in (10, 100, 1000):
+        big = UserInfo.from_user_info_yaml({**SAMPLE_USER_INFO_YAML,
+                                            "job_experience": SAMPLE_USER_INFO_YAML["job_experience"][:1] * entries})
+        big_us = timeit.timeit(lambda: str(big), number=10) / 10 * 1e6
+        print(f"{entries} job entries: {big_us / entries:.1f} us per entry")
+
+
+if __name__ == '__main__':
+    main()
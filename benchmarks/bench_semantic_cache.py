@@ -0,0 +1,100 @@
+"""
+Semantic answer cache over paraphrases and near-miss questions of typical application forms
+
+Cache is filled with answered questions, then asked paraphrases (should reuse the answer)
+and questions that read almost the same but need another answer (should never reuse one).
+Any wrong answer reused means the cache isn't safe to enable with these settings
+
+Run from the project root: python -m benchmarks.bench_semantic_cache
+"""
+import logging
+import os
+import tempfile
+import time
+from custom_types import SemanticCacheSettings
+from semantic_cache import SemanticAnswerCache
+
+# Question -> answer
+ANSWERED = {
+    "What is your expected salary?": "90000",
+    "Are you willing to relocate?": "Yes",
+    "How many years of experience do you have with Python?": "5",
+    "Are you legally authorized to work in the European Union?": "Yes",
+    "Will you now or in the future require sponsorship for employment visa status?": "No",
+    "How many years of work experience do you have with Django?": "4",
+    "What is your notice period?": "1 month",
+    "Are you comfortable working remotely?": "Yes",
+}
+
+# Paraphrase -> question it should reuse the answer of
+PARAPHRASES = {
+    "What's your expected salary?": "What is your expected salary?",
+    "Are you open to relocation?": "Are you willing to relocate?",
+    "How many years of Python experience do you have?":
+        "How many years of experience do you have with Python?",
+    "How many years of experience do you have with Python?\n":
+        "How many years of experience do you have with Python?",
+    "Are you legally authorized to work in the EU?":
+        "Are you legally authorized to work in the European Union?",
+    "Are you authorized to work in the EU legally?":
+        "Are you legally authorized to work in the European Union?",
+    "How many years of professional experience do you have with Django?":
+        "How many years of work experience do you have with Django?",
+    "What is your notice period?": "What is your notice period?",
+}
+
+# Never reuse an answer
+NEAR_MISSES = [
+    "What is your current salary?",
+    "What is your expected hourly rate?",
+    "Are you willing to travel?",
+    "Are you willing to commute?",
+    "Do you require relocation assistance?",
+    "How many years of experience do you have with Rust?",
+    "How many years of experience with rust?",
+    "How many years of experience with golang?",
+    "How many years of experience in sales?",
+    "How many years of experience do you have with Django REST Framework?",
+    "Are you legally authorized to work in the United States?",
+    "Will you now or in the future require sponsorship?",
+    "What is your notice period in days?",
+    "Are you comfortable working onsite?",
+]
+
+
+def main():
+    logging.disable(logging.INFO)
+
+    settings = SemanticCacheSettings()
+    with tempfile.TemporaryDirectory() as folder:
+        cache = SemanticAnswerCache(os.path.join(folder, "semantic_cache.npz"),
+                                    similarity_threshold=settings.similarity_threshold,
+                                    n_features=settings.n_features, save_interval_sec=settings.save_interval_sec)
+        group = SemanticAnswerCache.group_key(None, "resume", "prompt")
+        for question, answer in ANSWERED.items():
+            cache.add(question, group, answer)
+
+        start = time.perf_counter()
+        reused = 0
+        for question, original in PARAPHRASES.items():
+            similar = cache.lookup(question, group)
+            if similar is not None and similar[0] == original:
+                reused += 1
+            else:
+                print(f"  missed: {question!r}")
+
+        false_hits = 0
+        for question in NEAR_MISSES:
+            similar = cache.lookup(question, group)
+            if similar is not None:
+                false_hits += 1
+                print(f"  WRONG:  {question!r} reused {similar[0]!r} ({similar[2]:.2f})")
+        lookup_sec = (time.perf_counter() - start) / (len(PARAPHRASES) + len(NEAR_MISSES))
+
+        print(f"Threshold {settings.similarity_threshold}: paraphrases reused {reused}/{len(PARAPHRASES)}, "
+              f"wrong answers reused {false_hits}/{len(NEAR_MISSES)}")
+        print(f"Lookup {lookup_sec * 1000:.2f} ms mean, semantic cache {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
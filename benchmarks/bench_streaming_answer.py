@@ -0,0 +1,65 @@
+"""
+Time to answer: waiting for the whole completion vs streaming with early stop on the closing answer tag
+
+LLM is simulated with a fixed time to first token and a fixed time per token, the model answers first
+and then keeps explaining itself, which is the usual case
+
+Run from the project root: python -m benchmarks.bench_streaming_answer
+"""
+import time
+from tag_extractor import AnswerTagExtractor, extract_answer_tag
+
+TIME_TO_FIRST_TOKEN_SEC = 0.3
+TIME_PER_TOKEN_SEC = 0.01
+
+ANSWER = "Senior Python Developer at Acme, building Django &amp; FastAPI services"
+REASONING_WORDS = 150
+
+
+def completion_chunks(answer_words: list[str], reasoning_words: int) -> list[str]:
+    """
+    :return: Completion split into token-like chunks, answer tag itself split between chunks
+    """
+    chunks = ["<ans", "wer>"]
+    chunks.extend(f"{word} " for word in answer_words)
+    chunks.extend(["</", "answer>"])
+    chunks.extend(f" reasoning{i}" for i in range(reasoning_words))
+    return chunks
+
+
+def stream(chunks: list[str]):
+    time.sleep(TIME_TO_FIRST_TOKEN_SEC)
+    for chunk in chunks:
+        time.sleep(TIME_PER_TOKEN_SEC)
+        yield chunk
+
+
+def main():
+    chunks = completion_chunks(ANSWER.split(), REASONING_WORDS)
+
+    # Before: whole completion, then parse
+    start = time.perf_counter()
+    answer_full = extract_answer_tag("".join(stream(chunks)))
+    full_sec = time.perf_counter() - start
+
+    # Now: feed chunks as they come, stop when the tag is closed
+    start = time.perf_counter()
+    extractor = AnswerTagExtractor()
+    received = 0
+    for chunk in stream(chunks):
+        received += 1
+        extractor.feed(chunk)
+        if extractor.closed:
+            break
+    streaming_sec = time.perf_counter() - start
+
+    assert extractor.answer == answer_full, (extractor.answer, answer_full)
+
+    print(f"Completion of {len(chunks)} chunks, answer in the first {received}")
+    print(f"Time to answer: full completion {full_sec * 1000:.0f} ms -> streaming {streaming_sec * 1000:.0f} ms "
+          f"({full_sec / streaming_sec:.1f}x), completion chunks read: {len(chunks)} -> {received}")
+    print(f"Answer: {extractor.answer!r}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""
+Local OpenAI-compatible chat completions server with injected latency and errors, for benchmarks
+
+Supports POST /v1/chat/completions, plain and streaming (server-sent events), and GET /v1/models
+
+Run standalone from the project root: python -m benchmarks.mock_openai_server --port 8001 --latency 0.5
+Then point a provider in app_config/llm_settings.yaml to it:
+    router:
+      providers:
+        - name: Mock
+          type: openai
+          model: mock
+          base_url: http://127.0.0.1:8001/v1
+          api_key: mock
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_COMPLETION = "<answer>Yes</answer> The candidate is authorized to work, according to the resume."
+
+
+class MockOpenAIServer:
+    def __init__(self, port: int = 0, latency_sec: float = 0.2, jitter_sec: float = 0.,
+                 spike_rate: float = 0., spike_latency_sec: float = 2., error_rate: float = 0.,
+                 chunk_delay_sec: float = 0.01, completion: str = DEFAULT_COMPLETION, seed: int | None = None,
+                 requests_per_minute: float | None = None, burst: int = 5, prefill_sec_per_1k_tokens: float = 0.,
+                 connect_latency_sec: float = 0.):
+        """
+        :param port: Port to listen on, any free port if 0
+        :param latency_sec: Time to the first byte of the response
+        :param jitter_sec: Uniform random extra latency, up to that
+        :param spike_rate: Fraction of requests that get spike_latency_sec instead
+        :param spike_latency_sec: Latency of a spike
+        :param error_rate: Fraction of requests answered with HTTP 500
+        :param chunk_delay_sec: Delay between streamed chunks (one word per chunk)
+        :param completion: What the model "answers"
+        :param seed: Random seed, for repeatable runs
+        :param requests_per_minute: Requests over the limit are answered with HTTP 429 and Retry-After, no limit if None
+        :param burst: Requests allowed at once before the limit kicks in
+        :param prefill_sec_per_1k_tokens: Extra latency per 1000 prompt tokens that are not in the prefix cache.
+            Prefix cache works like DeepSeek's: the longest prefix shared with an earlier prompt, in 64 token blocks
+        :param connect_latency_sec: Delay before the first response on a new connection, like DNS and TLS setup
+        """
+        self.latency_sec = latency_sec
+        self.jitter_sec = jitter_sec
+        self.spike_rate = spike_rate
+        self.spike_latency_sec = spike_latency_sec
+        self.error_rate = error_rate
+        self.chunk_delay_sec = chunk_delay_sec
+        self.completion = completion
+
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        self.prefill_sec_per_1k_tokens = prefill_sec_per_1k_tokens
+        self.connect_latency_sec = connect_latency_sec
+
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.connections = 0
+
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__allowance = float(burst)
+        self.__allowance_updated = time.monotonic()
+        # Earlier prompts, for the prefix cache
+        self.__prompts: list[str] = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # noqa
+                pass
+
+            def setup(self):
+                super().setup()
+                server.handle_connect()
+
+            def do_GET(self):  # noqa
+                if self.path.rstrip("/").endswith("/models"):
+                    server.send_json(self, 200, {"object": "list", "data": [
+                        {"id": "mock", "object": "model", "created": 0, "owned_by": "mock"}]})
+                else:
+                    server.send_json(self, 404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+            def do_POST(self):  # noqa
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                server.handle(self, body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.__thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def start(self) -> "MockOpenAIServer":
+        self.__thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def handle_connect(self) -> None:
+        with self.__lock:
+            self.connections += 1
+        time.sleep(self.connect_latency_sec)
+
+    def __throttle(self) -> float | None:
+        """
+        :return: Seconds until the next request is allowed if this one is over the limit, None if it's fine
+        """
+        if self.requests_per_minute is None:
+            return None
+
+        rate = self.requests_per_minute / 60.
+        with self.__lock:
+            now = time.monotonic()
+            self.__allowance = min(float(self.burst), self.__allowance + (now - self.__allowance_updated) * rate)
+            self.__allowance_updated = now
+            if self.__allowance >= 1.:
+                self.__allowance -= 1.
+                return None
+            self.throttled += 1
+            return (1. - self.__allowance) / rate
+
+    def __next_request(self) -> tuple[float, bool]:
+        """
+        :return: Latency and whether this request fails
+        """
+        with self.__lock:
+            self.requests += 1
+            if self.__random.random() < self.spike_rate:
+                latency = self.spike_latency_sec
+            else:
+                latency = self.latency_sec + self.__random.uniform(0., self.jitter_sec)
+            failed = self.__random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return latency, failed
+
+    def __cached_tokens(self, prompt: str) -> int:
+        """
+        :param prompt: Whole prompt, messages concatenated
+        :return: Prompt tokens served from the prefix cache
+        """
+        with self.__lock:
+            longest = max((len(os.path.commonprefix([prompt, p])) for p in self.__prompts), default=0)
+            self.__prompts.append(prompt)
+            del self.__prompts[:-100]
+        return longest // 4 // 64 * 64
+
+    def handle(self, handler: BaseHTTPRequestHandler, body: dict) -> None:
+        retry_after = self.__throttle()
+        if retry_after is not None:
+            self.send_json(handler, 429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                           {"retry-after": str(int(retry_after) + 1),
+                            "retry-after-ms": str(int(retry_after * 1000))})
+            return
+
+        prompt = "".join(f"{m.get('role')}:{m.get('content', '')}\n" for m in body.get("messages", []))
+        prompt_tokens = len(prompt) // 4
+        cached_tokens = min(self.__cached_tokens(prompt), prompt_tokens)
+
+        latency, failed = self.__next_request()
+        time.sleep(latency + (prompt_tokens - cached_tokens) / 1000. * self.prefill_sec_per_1k_tokens)
+
+        if failed:
+            self.send_json(handler, 500, {"error": {"message": "Injected error", "type": "server_error"}})
+            return
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = body.get("model", "mock")
+        completion_tokens = len(self.completion.split())
+        # Both the OpenAI and the DeepSeek way of reporting cache hits
+        usage = {"prompt_tokens": prompt_tokens,
+                 "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens,
+                 "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                 "prompt_cache_hit_tokens": cached_tokens,
+                 "prompt_cache_miss_tokens": prompt_tokens - cached_tokens}
+
+        if not body.get("stream"):
+            self.send_json(handler, 200, {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": self.completion}}],
+                "usage": usage})
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        # No content length for a stream, connection can't be reused
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+
+        def chunk(delta: dict, finish_reason: str | None = None, chunk_usage: dict | None = None) -> bytes:
+            data = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            if chunk_usage is not None:
+                data["usage"] = chunk_usage
+            return f"data: {json.dumps(data)}\n\n".encode("UTF-8")
+
+        words = self.completion.split(" ")
+        try:
+            handler.wfile.write(chunk({"role": "assistant", "content": ""}))
+            for i, word in enumerate(words):
+                handler.wfile.write(chunk({"content": word if i == 0 else f" {word}"}))
+                handler.wfile.flush()
+                time.sleep(self.chunk_delay_sec)
+            include_usage = body.get("stream_options", {}).get("include_usage")
+            handler.wfile.write(chunk({}, "stop", usage if include_usage else None))
+            handler.wfile.write(b"data: [DONE]\n\n")
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client stopped reading, that's what early stop does
+            pass
+
+    @staticmethod
+    def send_json(handler: BaseHTTPRequestHandler, status: int, data: dict, headers: dict | None = None) -> None:
+        payload = json.dumps(data).encode("UTF-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        try:
+            handler.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up, e.g. cancelled hedged request
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds to the first byte")
+    parser.add_argument("--jitter", type=float, default=0., help="Uniform random extra latency, seconds")
+    parser.add_argument("--spike-rate", type=float, default=0., help="Fraction of requests with spike latency")
+    parser.add_argument("--spike-latency", type=float, default=2.)
+    parser.add_argument("--error-rate", type=float, default=0., help="Fraction of requests failing with 500")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="Seconds between streamed chunks")
+    parser.add_argument("--rpm", type=float, default=None, help="Requests per minute, 429 over that")
+    parser.add_argument("--connect-latency", type=float, default=0., help="Seconds of setup per new connection")
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(port=args.port, latency_sec=args.latency, jitter_sec=args.jitter,
+                              spike_rate=args.spike_rate, spike_latency_sec=args.spike_latency,
+                              error_rate=args.error_rate, chunk_delay_sec=args.chunk_delay,
+                              requests_per_minute=args.rpm, connect_latency_sec=args.connect_latency)
+    print(f"Mock OpenAI server at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -19,6 +19,7 @@ import random
 
 from custom_exceptions import (BrowserClientException,
                                CustomExceptionData)
+from deadline import Deadline, check_deadline, step_timeout
 
 logger = logging.getLogger("BrowserClient")
 
@@ -526,7 +527,7 @@ class BrowserClient:
 
         yield None
 
-    def get_job_description_and_hiring_team(self, job_data: Job) -> None:
+    def get_job_description_and_hiring_team(self, job_data: Job, deadline: Deadline | None = None) -> None:
         """
         Expand job_data dictionary with additional data:
 
@@ -537,7 +538,9 @@ class BrowserClient:
         MUST BE CALLED ON SEARCH PAGE WITH FULLY LOADED RIGHT BAR
 
         :param job_data: Job object to expand
+        :param deadline: Deadline of the application (optional)
         """
+        check_deadline(deadline, "job description")
 
         logger.info("Fetching additional job info")
 
@@ -555,10 +558,11 @@ class BrowserClient:
             logger.debug("Can't find HR link, that's not essential")
             pass
 
-    def __advance_easy_apply_form(self) -> WebElement | None:
+    def __advance_easy_apply_form(self, deadline: Deadline | None = None) -> WebElement | None:
         """
         Advance the form and return new form element
 
+        :param deadline: Deadline of the application (optional)
         :return: Form element
         """
         try:
@@ -568,7 +572,8 @@ class BrowserClient:
                 self.driver.find_element(
                     By.XPATH, self.config.linkedin_xpaths.easy_apply_dialog_advance_button)).perform()
 
-            form_element = WebDriverWait(self.driver, EASY_APPLY_FORM_TIMEOUT,
+            form_element = WebDriverWait(self.driver,
+                                         step_timeout(deadline, "Easy Apply next page", EASY_APPLY_FORM_TIMEOUT),
                                          ignored_exceptions=ignored_exceptions).until(
                 ec.visibility_of_element_located((By.XPATH,
                                                   self.config.linkedin_xpaths.easy_apply_dialog)))
@@ -582,9 +587,15 @@ class BrowserClient:
         except NoSuchElementException:
             return None
 
-    def finalize_easy_apply(self) -> None:
+        except TimeoutException:
+            check_deadline(deadline, "Easy Apply next page")
+            raise
+
+    def finalize_easy_apply(self, deadline: Deadline | None = None) -> None:
         """
         Finalize job application, call this function at the last step when Review button appear
+
+        :param deadline: Deadline of the application (optional)
         """
         # New error message every step,
         # when next instructions will fail, this would be last detailed error message
@@ -592,10 +603,14 @@ class BrowserClient:
 
         logger.info("Finalizing application")
 
+        # Once submitted, it's too late for the deadline
+        submitted = False
+
         try:
             ignored_exceptions = (NoSuchElementException, StaleElementReferenceException)
 
             # Click Review button
+            check_deadline(deadline, "Easy Apply review")
             self.exception_data.reason = "Finalize Easy apply failed: No Review button found!"
             next_button = self.driver.find_element(
                 By.XPATH, self.config.linkedin_xpaths.easy_apply_dialog_review_button)
@@ -603,7 +618,7 @@ class BrowserClient:
             self.actions.click(next_button).perform()
 
             self.exception_data.reason = "Finalize Easy apply failed: No form element found!"
-            WebDriverWait(self.driver, EASY_APPLY_FORM_TIMEOUT,
+            WebDriverWait(self.driver, step_timeout(deadline, "Easy Apply review", EASY_APPLY_FORM_TIMEOUT),
                           ignored_exceptions=ignored_exceptions).until(
                 ec.visibility_of_element_located((By.XPATH, self.config.linkedin_xpaths.easy_apply_dialog)))
 
@@ -621,12 +636,14 @@ class BrowserClient:
 
             wait_extra(extra_range_sec=EASY_APPLY_SUBMIT_STEP_DELAY)
 
-            # Submit
+            # Submit, last chance to stop before the application is actually sent
+            check_deadline(deadline, "Easy Apply submit")
             self.exception_data.reason = "Finalize Easy apply failed: No Submit application button found!"
             next_button = self.driver.find_element(
                 By.XPATH, self.config.linkedin_xpaths.easy_apply_dialog_submit_button)
             self.__scroll_to_element(next_button)
             self.actions.click(next_button).perform()
+            submitted = True
 
             # Wait for something to pop up
             wait_extra(extra_range_sec=EASY_APPLY_SUBMIT_FINAL_DELAY)
@@ -648,9 +665,15 @@ class BrowserClient:
 
             wait_extra(extra_range_sec=EASY_APPLY_SUBMIT_STEP_DELAY)
 
-        except (NoSuchElementException, TimeoutException):
+        except TimeoutException:
+            if not submitted:
+                check_deadline(deadline, "Easy Apply review")
+            raise BrowserClientException(self.exception_data.reason, self.exception_data)
+
+        except NoSuchElementException:
             raise BrowserClientException(self.exception_data.reason, self.exception_data)
 
+    # No deadline here, the form has to be closed whatever time it is
     def bail_out(self) -> None:
         # New error message every step,
         # when next instructions will fail, this would be last detailed error message
@@ -692,12 +715,14 @@ class BrowserClient:
         except (NoSuchElementException, TimeoutException):
             raise BrowserClientException(self.exception_data.reason, self.exception_data)
 
-    def get_easy_apply_form(self) -> WebElement:
+    def get_easy_apply_form(self, deadline: Deadline | None = None) -> WebElement:
         """
         Locate and click Easy Apply button on this page
 
+        :param deadline: Deadline of the application (optional)
         :return: Form element
         """
+        timeout = step_timeout(deadline, "Easy Apply form", EASY_APPLY_FORM_TIMEOUT)
 
         ignored_exceptions = (NoSuchElementException, StaleElementReferenceException)
 
@@ -714,10 +739,11 @@ class BrowserClient:
 
         try:
             form_element = WebDriverWait(self.driver,
-                                         EASY_APPLY_FORM_TIMEOUT,
+                                         timeout,
                                          ignored_exceptions=ignored_exceptions).until(
                 ec.visibility_of_element_located((By.XPATH, self.config.linkedin_xpaths.easy_apply_dialog)))
         except TimeoutException:
+            check_deadline(deadline, "Easy Apply form")
             self.exception_data.reason = "No Easy Apply form appeared"
             raise BrowserClientException(self.exception_data.reason, self.exception_data)
 
@@ -880,12 +906,16 @@ class BrowserClient:
         except NoSuchElementException:
             return []
 
-    def get_form_fields(self, form_element: WebElement) -> Generator[Field | None, None, None]:
+    def get_form_pages(self, form_element: WebElement,
+                       deadline: Deadline | None = None) -> Generator[list[Field] | None, None, None]:
         """
-        Getting field label, type and additional data (e.g. if that's a list)
+        Getting fields of the whole form page at once: label, type and additional data (e.g. if that's a list)
+
+        Form is advanced to the next page when the caller asks for the next one
 
         :param form_element: Form element to breakdown
-        :return: Form Field object
+        :param deadline: Deadline of the application (optional)
+        :return: List of Form Field objects on the current page
         """
 
         # Interesting consequence of this approach is that
@@ -894,6 +924,8 @@ class BrowserClient:
         # It's fine, it will fail later if anything, or magically work ^_^
         # It failed and was a nightmare to debug, why did I do this to myself :(
         while True:
+            page_fields = []
+
             # Find form elements
             easy_apply_form_fields = form_element.find_elements(
                 By.XPATH, self.config.linkedin_xpaths.easy_apply_element_common)
@@ -901,6 +933,7 @@ class BrowserClient:
             # If found any input fields
             if easy_apply_form_fields:
                 for form_field in easy_apply_form_fields:
+                    check_deadline(deadline, "Easy Apply form fields")
                     field_data = Field()
 
                     wait_extra(extra_range_sec=EASY_APPLY_FIELD_CHECK_DELAY)
@@ -911,7 +944,7 @@ class BrowserClient:
                      field_data.element,
                      field_data.data) = self.__get_data_from_field_element(form_field)
 
-                    yield field_data
+                    page_fields.append(field_data)
 
             # Inconsistency with approach above where data returned separately and then packed into object?
             #  A) Leave as it is to not make nested generator
@@ -928,28 +961,44 @@ class BrowserClient:
 
             # If found upload fields
             if upload_fields:
-                for upload_field in upload_fields:
-                    yield upload_field
+                page_fields.extend(upload_fields)
 
             # If not assuming that's cards page, as far as I know it has a unique container
             else:
                 try:
                     form_element.find_element(
                         By.XPATH, self.config.linkedin_xpaths.easy_apply_cards_container)
-                    yield Field(type=FieldTypeEnum.CARDS)
+                    page_fields.append(Field(type=FieldTypeEnum.CARDS))
                 except NoSuchElementException:
                     pass
 
+            yield page_fields
+
             # Seamless form advancing
             # TODO: Check for form errors somewhere, that red text that pops up when field filled incorrectly
-            form_element = self.__advance_easy_apply_form()
+            form_element = self.__advance_easy_apply_form(deadline)
 
             # If we can't advance further, it should be stopped here on the caller's side
             if form_element is None:
                 yield None
 
+    def get_form_fields(self, form_element: WebElement,
+                        deadline: Deadline | None = None) -> Generator[Field | None, None, None]:
+        """
+        Getting field label, type and additional data (e.g. if that's a list), field by field
+
+        :param form_element: Form element to breakdown
+        :param deadline: Deadline of the application (optional)
+        :return: Form Field object
+        """
+        for page_fields in self.get_form_pages(form_element, deadline):
+            if page_fields is None:
+                yield None
+            else:
+                yield from page_fields
+
     @staticmethod
-    def set_input_field(input_field: WebElement, value: str) -> None:
+    def set_input_field(input_field: WebElement, value: str, deadline: Deadline | None = None) -> None:
         """
         Send keys to WebElement, assuming that is a text input field
 
@@ -957,7 +1006,9 @@ class BrowserClient:
 
         :param input_field: Text input field
         :param value: Value to insert
+        :param deadline: Deadline of the application (optional)
         """
+        check_deadline(deadline, "input field")
         input_field.send_keys(Keys.CONTROL + 'a')
         wait_extra(extra_range_sec=EASY_APPLY_FIELD_INPUT_DELAY)
         input_field.send_keys(Keys.DELETE)
@@ -966,7 +1017,7 @@ class BrowserClient:
         wait_extra(extra_range_sec=EASY_APPLY_FIELD_INPUT_DELAY)
 
     @staticmethod
-    def set_dropdown_field(dropdown_field: WebElement, value: str) -> None:
+    def set_dropdown_field(dropdown_field: WebElement, value: str, deadline: Deadline | None = None) -> None:
         """
         Select element from WebElement, with corresponding value, assuming that is a dropdown field
 
@@ -974,14 +1025,16 @@ class BrowserClient:
 
         :param dropdown_field: Dropdown field element
         :param value: Visible text in dropdown to select
+        :param deadline: Deadline of the application (optional)
         """
+        check_deadline(deadline, "dropdown field")
         select_driver = Select(dropdown_field)
         wait_extra(extra_range_sec=EASY_APPLY_FIELD_INPUT_DELAY)
         select_driver.select_by_visible_text(value)
         wait_extra(extra_range_sec=EASY_APPLY_FIELD_INPUT_DELAY)
 
     @staticmethod
-    def upload_file(upload_field: WebElement, abspath: str) -> None:
+    def upload_file(upload_field: WebElement, abspath: str, deadline: Deadline | None = None) -> None:
         """
         Upload file to upload element
 
@@ -989,11 +1042,13 @@ class BrowserClient:
 
         :param upload_field: Invisible input WebElement for upload
         :param abspath: Absolute path to uploading file
+        :param deadline: Deadline of the application (optional)
         """
+        check_deadline(deadline, "file upload")
         upload_field.send_keys(abspath)
         wait_extra(extra_range_sec=EASY_APPLY_FIELD_UPLOAD_DELAY)
 
-    def set_radio_field(self, radio_field: WebElement, value: str) -> None:
+    def set_radio_field(self, radio_field: WebElement, value: str, deadline: Deadline | None = None) -> None:
         """
         Click element from WebElement, assuming that is radio buttons container, with corresponding value
 
@@ -1001,7 +1056,9 @@ class BrowserClient:
 
         :param radio_field: Radio buttons field container element
         :param value: Visible text on radio button to select
+        :param deadline: Deadline of the application (optional)
         """
+        check_deadline(deadline, "radio field")
 
         # Selenium doesn't want to click on input element, try with Actions.click.perform instead?
         #  input field is underneath label on LinkedIn
@@ -1013,19 +1070,22 @@ class BrowserClient:
         wait_extra(extra_range_sec=EASY_APPLY_FIELD_INPUT_DELAY)
 
     @staticmethod
-    def set_checkbox_field(checkbox_field: WebElement) -> None:
+    def set_checkbox_field(checkbox_field: WebElement, deadline: Deadline | None = None) -> None:
         """
         Click element from WebElement, assuming that is checkbox container, with corresponding value
 
         Fire and pray :)
 
         :param checkbox_field: Radio buttons field container element
+        :param deadline: Deadline of the application (optional)
         """
+        check_deadline(deadline, "checkbox field")
 
         checkbox_field.click()
         wait_extra(extra_range_sec=EASY_APPLY_FIELD_INPUT_DELAY)
 
-    def set_suggestions_list(self, suggestions_element: WebElement, value: str) -> None:
+    def set_suggestions_list(self, suggestions_element: WebElement, value: str,
+                             deadline: Deadline | None = None) -> None:
         """
         Setting text input suggestions list value
 
@@ -1033,7 +1093,9 @@ class BrowserClient:
 
         :param suggestions_element: suggestions list web element
         :param value: value to set
+        :param deadline: Deadline of the application (optional)
         """
+        check_deadline(deadline, "suggestions list")
 
         target_element = (
             suggestions_element
@@ -1043,10 +1105,12 @@ class BrowserClient:
         self.actions.click(target_element).perform()
         wait_extra(extra_range_sec=EASY_APPLY_FIELD_INPUT_DELAY)
 
-    def is_suggestions_list_appeared(self) -> tuple[WebElement | None, list[str] | None]:
+    def is_suggestions_list_appeared(self,
+                                     deadline: Deadline | None = None) -> tuple[WebElement | None, list[str] | None]:
         """
         Check if suggestions element appeared, usually after input in text field
 
+        :param deadline: Deadline of the application (optional)
         :return: None if no suggestions list, otherwise - suggestions element and options
         """
 
@@ -1054,7 +1118,8 @@ class BrowserClient:
 
         try:
             suggestions_element = WebDriverWait(self.driver,
-                                                EASY_APPLY_SUGGESTION_BOX_TIMEOUT,
+                                                step_timeout(deadline, "suggestions list",
+                                                             EASY_APPLY_SUGGESTION_BOX_TIMEOUT),
                                                 ignored_exceptions=ignored_exceptions).until(
                 ec.visibility_of_element_located((By.XPATH,
                                                   self.config.linkedin_xpaths.easy_apply_textbox_suggestions)))
@@ -0,0 +1,286 @@
+"""
+Record/replay of LLM calls, for offline and repeatable runs
+
+Record mode passes every call to the real provider and appends the prompt, the response and timings
+to a cassette file (JSON lines). Replay mode serves responses from the cassette without any network,
+so CV generation and form filling can be benchmarked and debugged on any machine
+
+Set it up per provider in app_config/llm_settings.yaml:
+    router:
+      providers:
+        - name: DeepSeek
+          type: deepseek
+          cassette: cassettes/deepseek.jsonl
+          cassette_mode: record  # then replay
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from langchain_core.messages import AIMessage, AIMessageChunk
+from custom_exceptions import LLMException, CustomExceptionData
+
+logger = logging.getLogger("Cassette")
+
+# Modes
+RECORD = "record"
+REPLAY = "replay"
+
+# Replay latencies
+LATENCY_RECORDED = "recorded"
+LATENCY_NONE = "none"
+LATENCY_SYNTHETIC = "synthetic"
+
+# Replayed streams are split into chunks of that many characters
+REPLAY_CHUNK_CHARS = 16
+
+
+def prompt_text(messages) -> str:
+    """
+    :param messages: Langchain's PromptValue or list of (role, content) tuples
+    :return: Prompt as a single string
+    """
+    if hasattr(messages, "to_string"):
+        return messages.to_string()
+    return "\n".join(f"{role}: {content}" for role, content in messages)
+
+
+def prompt_key(messages) -> str:
+    return hashlib.sha256(prompt_text(messages).encode("UTF-8")).hexdigest()
+
+
+class CassetteChatWrapper:
+    def __init__(self, path: str, mode: str = REPLAY, llm_chat=None, name: str = "Cassette",
+                 latency: str = LATENCY_RECORDED, latency_median_sec: float = 1., latency_sigma: float = 0.5,
+                 seed: int | None = 0):
+        """
+        Same interface as a chat wrapper (invoke, ainvoke, stream, astream)
+
+        Calls with the same prompt are replayed in the order they were recorded, the last response
+        is repeated once they run out
+
+        :param path: Cassette file
+        :param mode: RECORD or REPLAY
+        :param llm_chat: Chat wrapper of the real provider, needed only to record
+        :param name: Provider name for logs
+        :param latency: Replay latency, LATENCY_RECORDED, LATENCY_NONE or LATENCY_SYNTHETIC (lognormal)
+        :param latency_median_sec: Median of synthetic latency
+        :param latency_sigma: Spread of synthetic latency, sigma of the underlying normal distribution
+        :param seed: Random seed of synthetic latency, for repeatable runs
+        """
+        if mode == RECORD and llm_chat is None:
+            raise ValueError("Recording a cassette needs a real provider")
+
+        self.path = path
+        self.mode = mode
+        self.llm_chat = llm_chat
+        self.name = name
+        self.latency = latency
+        self.latency_median_sec = latency_median_sec
+        self.latency_sigma = latency_sigma
+
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        # Prompt key -> recorded entries, and how many of them were replayed
+        self.__entries: dict[str, list[dict]] = {}
+        self.__replay_counts: dict[str, int] = {}
+
+        if mode == REPLAY:
+            self.__load()
+
+    def __load(self) -> None:
+        if not os.path.exists(self.path):
+            logger.warning(f"Cassette {self.path} doesn't exist, every call will miss")
+            return
+
+        with open(self.path, "r", encoding="UTF-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.__entries.setdefault(entry["key"], []).append(entry)
+        logger.info(f"Loaded {sum(len(e) for e in self.__entries.values())} calls from cassette {self.path}")
+
+    def __append(self, messages, response: str, latency_sec: float, first_chunk_sec: float | None,
+                 usage: dict | None, complete: bool = True) -> None:
+        entry = {"key": prompt_key(messages),
+                 "prompt": prompt_text(messages),
+                 "response": response,
+                 "latency_sec": latency_sec,
+                 "first_chunk_sec": first_chunk_sec,
+                 "usage": usage,
+                 # False for streams stopped early, the consumer stops at the same point on replay anyway
+                 "complete": complete,
+                 "provider": self.llm_chat.name if hasattr(self.llm_chat, "name") else self.name,
+                 "recorded_at": datetime.now().isoformat(timespec="seconds")}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+
+        with self.__lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Appended right away, so a crashed run keeps what it has recorded
+            with open(self.path, "a", encoding="UTF-8") as f:
+                f.write(line)
+            self.recorded += 1
+
+    def __next_entry(self, messages) -> dict:
+        key = prompt_key(messages)
+        with self.__lock:
+            entries = self.__entries.get(key)
+            if not entries:
+                self.missed += 1
+                text = prompt_text(messages)
+                exception_data = CustomExceptionData(reason=f"Prompt is not in cassette {self.path}!",
+                                                     llm_question=text[-500:])
+                raise LLMException(exception_data.reason, exception_data)
+
+            count = self.__replay_counts.get(key, 0)
+            self.__replay_counts[key] = count + 1
+            self.replayed += 1
+            return entries[min(count, len(entries) - 1)]
+
+    def __delays(self, entry: dict) -> tuple[float, float]:
+        """
+        :return: Seconds to the first chunk and to the end of the response
+        """
+        if self.latency == LATENCY_NONE:
+            return 0., 0.
+        if self.latency == LATENCY_SYNTHETIC:
+            total = self.latency_median_sec * self.__random.lognormvariate(0., self.latency_sigma)
+            # Same share of time to the first chunk as recorded
+            if entry.get("first_chunk_sec") is not None and entry["latency_sec"] > 0.:
+                return total * entry["first_chunk_sec"] / entry["latency_sec"], total
+            return total, total
+        first_chunk_sec = entry.get("first_chunk_sec")
+        return first_chunk_sec if first_chunk_sec is not None else entry["latency_sec"], entry["latency_sec"]
+
+    @staticmethod
+    def __message(entry: dict) -> AIMessage:
+        usage = entry.get("usage") or {}
+        return AIMessage(content=entry["response"],
+                         usage_metadata={"input_tokens": usage.get("input_tokens", 0),
+                                         "output_tokens": usage.get("output_tokens", 0),
+                                         "total_tokens": usage.get("total_tokens", 0)})
+
+    @staticmethod
+    def __chunks(entry: dict) -> list[str]:
+        response = entry["response"]
+        return [response[i:i + REPLAY_CHUNK_CHARS] for i in range(0, len(response), REPLAY_CHUNK_CHARS)] or [""]
+
+    @staticmethod
+    def __usage(message) -> dict | None:
+        return getattr(message, "usage_metadata", None) or None
+
+    def invoke(self, messages):
+        if self.mode == RECORD:
+            start = time.perf_counter()
+            result = self.llm_chat.invoke(messages)
+            self.__append(messages, result.content, time.perf_counter() - start, None, self.__usage(result))
+            return result
+
+        entry = self.__next_entry(messages)
+        time.sleep(self.__delays(entry)[1])
+        return self.__message(entry)
+
+    async def ainvoke(self, messages):
+        if self.mode == RECORD:
+            start = time.perf_counter()
+            result = await self.llm_chat.ainvoke(messages)
+            self.__append(messages, result.content, time.perf_counter() - start, None, self.__usage(result))
+            return result
+
+        entry = self.__next_entry(messages)
+        await asyncio.sleep(self.__delays(entry)[1])
+        return self.__message(entry)
+
+    def stream(self, messages):
+        if self.mode == RECORD:
+            return self.__record_stream(messages)
+        return self.__replay_stream(messages)
+
+    def astream(self, messages):
+        if self.mode == RECORD:
+            return self.__arecord_stream(messages)
+        return self.__areplay_stream(messages)
+
+    def __record_stream(self, messages):
+        start = time.perf_counter()
+        first_chunk_sec = None
+        received = []
+        usage = None
+        complete = False
+        try:
+            for chunk in self.llm_chat.stream(messages):
+                if first_chunk_sec is None:
+                    first_chunk_sec = time.perf_counter() - start
+                received.append(chunk.content)
+                usage = self.__usage(chunk) or usage
+                yield chunk
+            complete = True
+        finally:
+            if received:
+                self.__append(messages, "".join(received), time.perf_counter() - start, first_chunk_sec,
+                              usage, complete)
+
+    async def __arecord_stream(self, messages):
+        start = time.perf_counter()
+        first_chunk_sec = None
+        received = []
+        usage = None
+        complete = False
+        try:
+            async for chunk in self.llm_chat.astream(messages):
+                if first_chunk_sec is None:
+                    first_chunk_sec = time.perf_counter() - start
+                received.append(chunk.content)
+                usage = self.__usage(chunk) or usage
+                yield chunk
+            complete = True
+        finally:
+            if received:
+                self.__append(messages, "".join(received), time.perf_counter() - start, first_chunk_sec,
+                              usage, complete)
+
+    def __replay_stream(self, messages):
+        entry = self.__next_entry(messages)
+        first_chunk_sec, latency_sec = self.__delays(entry)
+        chunks = self.__chunks(entry)
+        # Rest of the time is spread evenly between chunks
+        chunk_delay = max(latency_sec - first_chunk_sec, 0.) / len(chunks)
+
+        time.sleep(first_chunk_sec)
+        for i, content in enumerate(chunks):
+            if i:
+                time.sleep(chunk_delay)
+            yield AIMessageChunk(content=content)
+
+    async def __areplay_stream(self, messages):
+        entry = self.__next_entry(messages)
+        first_chunk_sec, latency_sec = self.__delays(entry)
+        chunks = self.__chunks(entry)
+        chunk_delay = max(latency_sec - first_chunk_sec, 0.) / len(chunks)
+
+        await asyncio.sleep(first_chunk_sec)
+        for i, content in enumerate(chunks):
+            if i:
+                await asyncio.sleep(chunk_delay)
+            yield AIMessageChunk(content=content)
+
+    def __call__(self, messages):
+        return self.invoke(messages)
+
+    def stats(self) -> str:
+        """
+        :return: Human-readable cassette stats
+        """
+        return f"{self.name} cassette ({self.mode}): recorded {self.recorded}, replayed {self.replayed}, " \
+               f"missed {self.missed}"
@@ -2,6 +2,7 @@ import yaml
 import os
 from utils import Singleton
 from custom_types import *
+from skill_index import SkillExperienceIndex
 
 
 # Making this a singleton class
@@ -22,10 +23,30 @@ class ConfigManager(metaclass=Singleton):
 
         self.prompt_cv_fill_in: FewShotPrompt
 
+        self.prompt_answer_batch: FewShotPrompt
+
+        self.prompt_cv_sections: FewShotPrompt
+
+        # Incremented every time prompts.yaml is (re)loaded
+        self.prompts_version: int = 0
+        self.__prompts_mtime: int = 0
+
         self.user_info: UserInfo
+        # Built from user_info, rebuilt with it
+        self.skill_index: SkillExperienceIndex
+
+        # Incremented every time user_info.yaml is (re)loaded
+        self.user_info_version: int = 0
+        self.__user_info_mtime: int = 0
+        # Serialized resume for the current user_info version, format -> string
+        self.__resume_strings: dict[str, str] = {}
 
         self.linkedin_xpaths: LinkedinXPaths
 
+        self.llm_settings: LLMSettings
+
+        self.answer_rules: AnswerRules
+
         self.__load_config()
 
     def __reload_blacklist(self):
@@ -33,6 +54,68 @@ class ConfigManager(metaclass=Singleton):
             blacklist_yaml = yaml.safe_load(f)
             self.blacklist = Blacklist.from_blacklist_yaml(blacklist_yaml)
 
+    def __load_prompts(self):
+        prompts_path = os.path.join(os.getcwd(), "app_config", "prompts.yaml")
+        # Remember when the file was changed, before reading, so edits during the read are not missed
+        self.__prompts_mtime = os.stat(prompts_path).st_mtime_ns
+
+        with open(prompts_path, "r", encoding="UTF-8") as f:
+            prompts_yaml = yaml.safe_load(f)
+            self.prompt_answer_with_options = FewShotPrompt.from_prompts_yaml(prompts_yaml["answer_with_options"])
+            self.prompt_answer_freely = FewShotPrompt.from_prompts_yaml(prompts_yaml["answer_freely"])
+
+            self.prompt_cv_fill_in = FewShotPrompt.from_prompts_yaml(prompts_yaml["cv_fill_in"])
+
+            # Optional prompt, built-in one is used if it's not in the config
+            if "answer_batch" in prompts_yaml:
+                self.prompt_answer_batch = FewShotPrompt.from_prompts_yaml(prompts_yaml["answer_batch"])
+            else:
+                self.prompt_answer_batch = DEFAULT_ANSWER_BATCH_PROMPT
+
+            if "cv_sections" in prompts_yaml:
+                self.prompt_cv_sections = FewShotPrompt.from_prompts_yaml(prompts_yaml["cv_sections"])
+            else:
+                self.prompt_cv_sections = DEFAULT_CV_SECTIONS_PROMPT
+
+        self.prompts_version += 1
+
+    def __reload_prompts_if_changed(self):
+        if os.stat(os.path.join(os.getcwd(), "app_config", "prompts.yaml")).st_mtime_ns != self.__prompts_mtime:
+            self.__load_prompts()
+
+    def __load_user_info(self):
+        user_info_path = os.path.join(os.getcwd(), "app_config", "user_info.yaml")
+        self.__user_info_mtime = os.stat(user_info_path).st_mtime_ns
+
+        with open(user_info_path, "r", encoding="UTF-8") as f:
+            user_info_yaml = yaml.safe_load(f)
+            self.user_info = UserInfo.from_user_info_yaml(user_info_yaml)
+
+        self.skill_index = SkillExperienceIndex(self.user_info)
+        self.__resume_strings = {}
+        self.user_info_version += 1
+
+    def __reload_user_info_if_changed(self):
+        if os.stat(os.path.join(os.getcwd(), "app_config", "user_info.yaml")).st_mtime_ns != self.__user_info_mtime:
+            self.__load_user_info()
+
+    def resume_string(self, resume_format: str = "yaml") -> str:
+        """
+        Serialized resume for prompts, computed once per user_info.yaml version
+
+        :param resume_format: "yaml" for YAML-like pretty print, "compact" for token-lean single line entries
+        :return: Serialized resume
+        """
+        # Accessing user_info reloads it if the file changed, which also drops serialized strings
+        user_info = self.user_info
+
+        resume = self.__resume_strings.get(resume_format)
+        if resume is None:
+            resume = user_info.serialize(resume_format)
+            self.__resume_strings[resume_format] = resume
+
+        return resume
+
     def __load_config(self):
         with open(os.path.join(os.getcwd(), "app_config", "secrets.yaml"), "r", encoding="UTF-8") as f:
             secrets_yaml = yaml.safe_load(f)
@@ -45,25 +128,39 @@ class ConfigManager(metaclass=Singleton):
             filters_yaml = yaml.safe_load(f)
             self.filters = Filters.from_filters_yaml(filters_yaml)
 
-        with open(os.path.join(os.getcwd(), "app_config", "prompts.yaml"), "r", encoding="UTF-8") as f:
-            prompts_yaml = yaml.safe_load(f)
-            self.prompt_answer_with_options = FewShotPrompt.from_prompts_yaml(prompts_yaml["answer_with_options"])
-            self.prompt_answer_freely = FewShotPrompt.from_prompts_yaml(prompts_yaml["answer_freely"])
-
-            self.prompt_cv_fill_in = FewShotPrompt.from_prompts_yaml(prompts_yaml["cv_fill_in"])
+        self.__load_prompts()
 
-        with open(os.path.join(os.getcwd(), "app_config", "user_info.yaml"), "r", encoding="UTF-8") as f:
-            user_info_yaml = yaml.safe_load(f)
-            self.user_info = UserInfo.from_user_info_yaml(user_info_yaml)
+        self.__load_user_info()
 
         with open(os.path.join(os.getcwd(), "app_config", "xpaths.yaml"), "r", encoding="UTF-8") as f:
             xpaths_yaml = yaml.safe_load(f)
             self.linkedin_xpaths = LinkedinXPaths.from_linkedin_xpaths_yaml(xpaths_yaml["linkedin"])
 
+        # Optional config, defaults are used if there's no file
+        llm_settings_path = os.path.join(os.getcwd(), "app_config", "llm_settings.yaml")
+        if os.path.exists(llm_settings_path):
+            with open(llm_settings_path, "r", encoding="UTF-8") as f:
+                self.llm_settings = LLMSettings.from_llm_settings_yaml(yaml.safe_load(f))
+        else:
+            self.llm_settings = LLMSettings.from_llm_settings_yaml(None)
+
+        # Optional config as well, built-in rules are used if there's no file
+        answer_rules_path = os.path.join(os.getcwd(), "app_config", "answer_rules.yaml")
+        if os.path.exists(answer_rules_path):
+            with open(answer_rules_path, "r", encoding="UTF-8") as f:
+                self.answer_rules = AnswerRules.from_answer_rules_yaml(yaml.safe_load(f))
+        else:
+            self.answer_rules = AnswerRules.from_answer_rules_yaml(None)
+
     def __getattribute__(self, name):
         # Reload blacklist configs on the fly, every time they are accessed
         # I have a feeling that could be done cleaner, but should work for now :)
         if any([name in n for n in ["blacklist_mode", "company", "title_keywords"]]):
             self.__reload_blacklist()
+        # Same goes for prompts, but only when the file actually changed
+        elif name.startswith("prompt_"):
+            self.__reload_prompts_if_changed()
+        elif name in ("user_info", "skill_index"):
+            self.__reload_user_info_if_changed()
         # Default __getattribute__ behaviour
         return object.__getattribute__(self, name)
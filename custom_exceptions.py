@@ -38,3 +38,9 @@ class CVManagerException(Exception):
     def __init__(self, message: str, data: CustomExceptionData):
         super().__init__(message)
         self.data = data
+
+
+class DeadlineExceededException(Exception):
+    def __init__(self, message: str, data: CustomExceptionData):
+        super().__init__(message)
+        self.data = data
@@ -1,10 +1,17 @@
 from .field import Field, FieldTypeEnum
 from .filters import Filters, LocalResumeTrigger
 from .job import Job
-from .prompt import FewShotPrompt, OneShot
+from .prompt import FewShotPrompt, OneShot, DEFAULT_ANSWER_BATCH_PROMPT, DEFAULT_CV_SECTIONS_PROMPT
 from .user_info import (UserInfo,
                         Personal, Education, Exam, JobExperience,
                         Project, Achievement, Certification, Language,
                         SelfIdentification, LegalAuthorization, WorkPreferences)
 from .blacklist import Blacklist, BlacklistEnum
 from .linkedin_xpaths import LinkedinXPaths
+from .answer_rules import AnswerRules, AnswerRule, DEFAULT_ANSWER_RULES
+from .llm_settings import (LLMSettings,
+                           AnswerCacheSettings, SemanticCacheSettings, BatchAnswersSettings, AsyncPoolSettings,
+                           ResumeSettings, StreamingSettings, RouterSettings, ProviderSettings,
+                           TelemetrySettings, RetrySettings, OptionsSettings,
+                           PromptLayoutSettings, ExamplesSettings, TiersSettings, TierSettings,
+                           TierRouteSettings, HttpPoolSettings, CVSectionsSettings, DuplicateJobsSettings)
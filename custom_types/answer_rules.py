@@ -0,0 +1,120 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class AnswerRules:
+    enabled: bool = True
+    # Built-in rules are checked after the ones from the file
+    use_default_rules: bool = True
+    rules: list["AnswerRule"] = None
+
+    @staticmethod
+    def from_answer_rules_yaml(answer_rules_yaml):
+        """
+        Construct AnswerRules instance from answer_rules.yaml
+
+        The file is optional, built-in rules are used if there's none
+
+        :param answer_rules_yaml: loaded yaml object from answer_rules.yaml (or None if there's no file)
+        :return: AnswerRules instance with provided data
+        """
+        answer_rules_yaml = answer_rules_yaml or {}
+
+        answer_rules = AnswerRules(enabled=answer_rules_yaml.get("enabled", True),
+                                   use_default_rules=answer_rules_yaml.get("use_default_rules", True))
+        answer_rules.rules = [AnswerRule(**r) for r in answer_rules_yaml.get("rules", [])]
+        if answer_rules.use_default_rules:
+            answer_rules.rules += DEFAULT_ANSWER_RULES
+        return answer_rules
+
+
+@dataclass
+class AnswerRule:
+    name: str = ""
+    # Regex searched case-insensitively in the field label (plus option text for checkboxes), ^ and $ anchor
+    # to the label, (?-i:...) matches case-sensitively.
+    # No named groups, those are used by the compiled matcher
+    pattern: str = ""
+    # Field types the rule applies to: "input", "list", "radio", "checkbox"
+    types: list[str] = field(default_factory=lambda: ["input", "list", "radio"])
+    # Answer template over UserInfo fields, e.g. "{personal.phone_prefix}{personal.phone}"
+    value: str = ""
+    # How the answer is made of the value:
+    #  "value" - the value itself, or the option equal to it / containing it as a whole word
+    #  "yes_no" - "Yes" or "No" for a true/false value, or the option starting with it.
+    #            Text inputs only if the label is a yes/no question ("Are you...", "Would you...")
+    #  "number" - the first number of the value, e.g. "80000" of "80000 - 100000"
+    #  "first_option" - the first option, no value needed (agree checkboxes)
+    #  "skill_years" - years of experience with the skill from the label, no value needed,
+    #                  skills not found in job_experience are left to the LLM
+    strategy: str = "value"
+
+
+# Rules are checked in order, the first one matching the label answers (or leaves the field to the LLM)
+# Bare "US" only in capitals, otherwise it's the pronoun ("Tell us...", "join us in Berlin")
+US = r"(?<!\w)((?-i:US)|u\.s\.(a\.?)?|usa|united states|america)(?!\w)"
+EU = r"(?<!\w)(eu|e\.u\.?|european union|europe)(?!\w)"
+AUTHORIZED = r"(authori[sz]ed|legally (allowed|able|eligible|permitted)|right to work|eligible to work)"
+WILLING = (r"\b(willing|able|agree|consent|comfortable|open|okay|ok|undergo|submit|complete|pass|consider|"
+           r"prepared|happy)\b")
+
+DEFAULT_ANSWER_RULES = [
+    # Personal
+    AnswerRule(name="first_name", pattern=r"^first name$", value="{personal.name}"),
+    AnswerRule(name="last_name", pattern=r"^(last name|surname|family name)$", value="{personal.surname}"),
+    AnswerRule(name="full_name", pattern=r"^(full name|name)$", value="{personal.name} {personal.surname}"),
+    AnswerRule(name="phone_country_code", pattern=r"phone country code", value="{personal.phone_prefix}"),
+    AnswerRule(name="phone", pattern=r"^(mobile )?phone( number)?$", types=["input"],
+               value="{personal.phone_prefix}{personal.phone}"),
+    AnswerRule(name="email", pattern=r"^e-?mail( address)?$", value="{personal.email}"),
+    AnswerRule(name="linkedin", pattern=r"linkedin", types=["input"], value="{personal.linkedin}"),
+    AnswerRule(name="github", pattern=r"github", types=["input"], value="{personal.github}"),
+    AnswerRule(name="city", pattern=r"^(current )?(city|location \(city\))$", value="{personal.city}"),
+    # Legal authorization, sponsorship and visa go before plain authorization,
+    # "authorized to work in the US without sponsorship" is about sponsorship
+    AnswerRule(name="us_sponsorship", pattern=rf"(?=.*sponsor)(?=.*{US})",
+               value="{legal_authorization.requires_us_sponsorship}", strategy="yes_no"),
+    AnswerRule(name="eu_sponsorship", pattern=rf"(?=.*sponsor)(?=.*{EU})",
+               value="{legal_authorization.requires_eu_sponsorship}", strategy="yes_no"),
+    AnswerRule(name="us_visa", pattern=rf"(?=.*\bvisa\b)(?=.*{US})",
+               value="{legal_authorization.requires_us_visa}", strategy="yes_no"),
+    AnswerRule(name="eu_visa", pattern=rf"(?=.*\bvisa\b)(?=.*{EU})",
+               value="{legal_authorization.requires_eu_visa}", strategy="yes_no"),
+    AnswerRule(name="us_authorization", pattern=rf"(?=.*{AUTHORIZED})(?=.*{US})",
+               value="{legal_authorization.us_work_authorization}", strategy="yes_no"),
+    AnswerRule(name="eu_authorization", pattern=rf"(?=.*{AUTHORIZED})(?=.*{EU})",
+               value="{legal_authorization.eu_work_authorization}", strategy="yes_no"),
+    # Work preferences
+    AnswerRule(name="remote_work", pattern=rf"(?=.*\bremote(ly)?\b)(?=.*{WILLING})",
+               value="{work_preferences.remote_work}", strategy="yes_no"),
+    # Willingness only, "How long is your commute?" and "Do you require relocation assistance?" are for the LLM
+    AnswerRule(name="in_person_work", pattern=rf"(?=.*(on-?site|in[- ]person|in the office|commut))(?=.*{WILLING})",
+               value="{work_preferences.in_person_work}", strategy="yes_no"),
+    AnswerRule(name="relocation", pattern=rf"(?=.*relocat)(?=.*{WILLING})",
+               value="{work_preferences.open_to_relocation}", strategy="yes_no"),
+    AnswerRule(name="assessments", pattern=rf"(?=.*assessment)(?=.*{WILLING})",
+               value="{work_preferences.willing_to_complete_assessments}", strategy="yes_no"),
+    AnswerRule(name="drug_tests", pattern=rf"(?=.*drug (test|screen))(?=.*{WILLING})",
+               value="{work_preferences.willing_to_undergo_drug_tests}", strategy="yes_no"),
+    AnswerRule(name="background_checks", pattern=rf"(?=.*background (check|screen|investigation))(?=.*{WILLING})",
+               value="{work_preferences.willing_to_undergo_background_checks}", strategy="yes_no"),
+    # The most common question, "How many years of work experience do you have with Python?"
+    AnswerRule(name="years_of_experience", pattern=r"(?=.*\byears?\b)(?=.*\bexperience\b)", types=["input"],
+               strategy="skill_years"),
+    # Salary and availability
+    AnswerRule(name="expected_salary", pattern=r"(?=.*(expected|desired|expectation))(?=.*(salary|compensation))",
+               types=["input"], value="{expected_salary_range_usd}", strategy="number"),
+    AnswerRule(name="availability", pattern=r"(notice period|availability|when can you start|earliest start)",
+               types=["input"], value="{availability}"),
+    # Self identification, options that don't contain the value as a whole word are left to the LLM
+    AnswerRule(name="gender", pattern=r"^(gender|sex)\b", value="{self_identification.gender}"),
+    AnswerRule(name="pronouns", pattern=r"pronoun", value="{self_identification.pronouns}"),
+    AnswerRule(name="veteran", pattern=r"veteran", value="{self_identification.veteran}"),
+    AnswerRule(name="disability", pattern=r"disabilit", value="{self_identification.disability}"),
+    AnswerRule(name="ethnicity", pattern=r"(ethnicity|\brace\b)", value="{self_identification.ethnicity}"),
+    # Auto agree on terms and conditions and privacy policies checkboxes
+    AnswerRule(name="terms_and_conditions", pattern=r"(?=.*\bterms\b)(?=.*\bconditions\b)", types=["checkbox"],
+               strategy="first_option"),
+    AnswerRule(name="privacy_policy", pattern=r"(?=.*\bprivacy\b)(?=.*\bpolicy\b)", types=["checkbox"],
+               strategy="first_option"),
+]
@@ -0,0 +1,287 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class LLMSettings:
+    answer_cache: "AnswerCacheSettings" = None
+    semantic_cache: "SemanticCacheSettings" = None
+    batch_answers: "BatchAnswersSettings" = None
+    async_pool: "AsyncPoolSettings" = None
+    resume: "ResumeSettings" = None
+    streaming: "StreamingSettings" = None
+    router: "RouterSettings" = None
+    telemetry: "TelemetrySettings" = None
+    retry: "RetrySettings" = None
+    options: "OptionsSettings" = None
+    prompt_layout: "PromptLayoutSettings" = None
+    examples: "ExamplesSettings" = None
+    tiers: "TiersSettings" = None
+    http_pool: "HttpPoolSettings" = None
+    cv_sections: "CVSectionsSettings" = None
+    duplicate_jobs: "DuplicateJobsSettings" = None
+
+    @staticmethod
+    def from_llm_settings_yaml(llm_settings_yaml):
+        """
+        Construct LLMSettings instance from llm_settings.yaml
+
+        The file is optional, every missing section falls back to defaults
+
+        :param llm_settings_yaml: loaded yaml object from llm_settings.yaml (or None if there's no file)
+        :return: LLMSettings instance with provided data
+        """
+        llm_settings_yaml = llm_settings_yaml or {}
+
+        llm_settings = LLMSettings()
+        llm_settings.answer_cache = AnswerCacheSettings(**llm_settings_yaml.get("answer_cache", {}))
+        llm_settings.semantic_cache = SemanticCacheSettings(**llm_settings_yaml.get("semantic_cache", {}))
+        llm_settings.batch_answers = BatchAnswersSettings(**llm_settings_yaml.get("batch_answers", {}))
+        llm_settings.async_pool = AsyncPoolSettings(**llm_settings_yaml.get("async_pool", {}))
+        llm_settings.resume = ResumeSettings(**llm_settings_yaml.get("resume", {}))
+        llm_settings.streaming = StreamingSettings(**llm_settings_yaml.get("streaming", {}))
+        llm_settings.router = RouterSettings(**llm_settings_yaml.get("router", {}))
+        llm_settings.router.providers = [ProviderSettings(**p) for p in llm_settings.router.providers]  # noqa
+        llm_settings.telemetry = TelemetrySettings(**llm_settings_yaml.get("telemetry", {}))
+        llm_settings.retry = RetrySettings(**llm_settings_yaml.get("retry", {}))
+        llm_settings.options = OptionsSettings(**llm_settings_yaml.get("options", {}))
+        llm_settings.prompt_layout = PromptLayoutSettings(**llm_settings_yaml.get("prompt_layout", {}))
+        llm_settings.examples = ExamplesSettings(**llm_settings_yaml.get("examples", {}))
+        llm_settings.tiers = TiersSettings(**llm_settings_yaml.get("tiers", {}))
+        llm_settings.tiers.tiers = [TierSettings(**t) for t in llm_settings.tiers.tiers]  # noqa
+        for tier in llm_settings.tiers.tiers:
+            tier.providers = [ProviderSettings(**p) for p in tier.providers]  # noqa
+        llm_settings.tiers.routes = [TierRouteSettings(**r) for r in llm_settings.tiers.routes]  # noqa
+        llm_settings.http_pool = HttpPoolSettings(**llm_settings_yaml.get("http_pool", {}))
+        llm_settings.cv_sections = CVSectionsSettings(**llm_settings_yaml.get("cv_sections", {}))
+        llm_settings.duplicate_jobs = DuplicateJobsSettings(**llm_settings_yaml.get("duplicate_jobs", {}))
+        return llm_settings
+
+
+@dataclass
+class AnswerCacheSettings:
+    enabled: bool = True
+    # 30 days, answers depend on resume and prompt anyway, which are part of the key
+    ttl_sec: int = 30 * 24 * 60 * 60
+    max_entries: int = 5000
+
+
+@dataclass
+class SemanticCacheSettings:
+    # Off by default, python -m benchmarks.bench_semantic_cache shows what gets reused with these settings
+    enabled: bool = False
+    # Cosine similarity of char n-gram vectors, content words of the questions have to match anyway
+    similarity_threshold: float = 0.9
+    n_features: int = 512
+    # Index file is rewritten whole, new entries are saved at most that often, and at exit
+    save_interval_sec: float = 60.
+
+
+@dataclass
+class BatchAnswersSettings:
+    # Answer the whole form page with a single LLM call
+    enabled: bool = True
+    # Don't bother batching pages with fewer questions for the LLM
+    min_fields: int = 2
+
+
+@dataclass
+class AsyncPoolSettings:
+    # Max LLM calls in flight at once, shared by every async call
+    max_concurrency: int = 4
+    # Per call timeout, waiting for a free slot is not counted
+    timeout_sec: float = 90.
+    # Worker threads for sync calls with a deadline. Calls the caller stopped waiting for keep their worker
+    # until they finish (retries and backoff included), so there are more of them than max_concurrency
+    deadline_workers: int = 16
+
+
+@dataclass
+class ResumeSettings:
+    # How resume is serialized into prompts: "yaml" (YAML-like) or "compact" (fewer tokens)
+    format: str = "yaml"
+    # Send only resume sections relevant to the question instead of the whole resume
+    pruning: bool = True
+    # Max estimated tokens of the pruned resume, the most relevant section is always sent whatever its size
+    token_budget: int = 400
+    # Below this relevance score of the best section the whole resume is sent
+    min_confidence: float = 2.
+    # UserInfo sections sent with every question
+    always_include: list[str] = field(default_factory=lambda: ["personal"])
+
+
+@dataclass
+class StreamingSettings:
+    # Stream LLM output, the answer is extracted as it comes
+    enabled: bool = True
+    # Stop reading once the answer tag is closed, so whatever the LLM writes after it is never generated.
+    # Usage comes with the very last chunk, so cost and tokens of streams stopped early are estimated,
+    # and their prefix cache hits are never reported. Off reads streams to the end, for exact usage
+    stop_at_answer: bool = True
+
+
+@dataclass
+class RouterSettings:
+    # Every call goes to the fastest healthy provider, the first one is used until others are measured
+    providers: list["ProviderSettings"] = field(default_factory=lambda: [{"name": "DeepSeek", "type": "deepseek"}])
+    # Rolling window of calls per provider, by count and by age
+    window: int = 50
+    window_sec: float = 300.
+    # Calls needed before provider's latency is trusted
+    min_samples: int = 3
+    # Providers failing more often are used only if there's nothing else
+    max_error_rate: float = 0.5
+    # Fire the second best provider for questions with options, if the best one is slower than its p95
+    hedge_options: bool = True
+    hedge_quantile: float = 0.95
+    # Delay before hedging while there's not enough data
+    hedge_default_delay_sec: float = 3.
+
+
+@dataclass
+class ProviderSettings:
+    name: str = None
+    # "deepseek" or "openai" (any OpenAI-compatible API with base_url)
+    type: str = "deepseek"
+    # Provider's default if None
+    model: str = None
+    base_url: str = None
+    # Key from secrets.yaml if None
+    api_key: str = None
+    temperature: float = 0.32
+    # Provider limits, shared by every call, no limit if None
+    requests_per_minute: int = None
+    tokens_per_minute: int = None
+    # Record calls to this file, or replay them from it without calling the provider, see cassette.py
+    cassette: str = None
+    # "record" or "replay"
+    cassette_mode: str = "replay"
+    # Replay latency: "recorded", "none" or "synthetic" (lognormal with this median and sigma)
+    cassette_latency: str = "recorded"
+    cassette_latency_median_sec: float = 1.
+    cassette_latency_sigma: float = 0.5
+
+
+@dataclass
+class TelemetrySettings:
+    # Collect and export per-call LLM metrics, calls are logged either way
+    enabled: bool = True
+    # Relative to the working directory
+    directory: str = "telemetry"
+    # How often metrics files are rewritten, if anything changed
+    export_interval_sec: float = 30.
+    # Per-application rollups kept in the JSON file
+    keep_applications: int = 200
+
+
+@dataclass
+class RetrySettings:
+    # Throttled (429), failed (5xx) and not connected calls are retried with jittered exponential backoff,
+    # longer if the provider asks for it with Retry-After
+    max_retries: int = 5
+    base_delay_sec: float = 1.
+    max_delay_sec: float = 60.
+
+
+@dataclass
+class OptionsSettings:
+    # Number options in prompts, the LLM answers with a number instead of echoing the option text
+    numbered: bool = True
+    # Answers that are neither a number nor an exact option are mapped to the closest option
+    # with at least this similarity (0 to 1), anything less fails the question
+    fuzzy_cutoff: float = 0.8
+
+
+@dataclass
+class PromptLayoutSettings:
+    # Resume goes to the system message, so system message, resume and examples are the same prefix in every call,
+    # which DeepSeek and OpenAI cache (cheaper and faster). Resume pruning would change the prefix
+    # with every question, so it's skipped while this is on. Off by default: system message and examples
+    # are cached anyway, and with pruned resume fewer tokens are billed (benchmarks/bench_prefix_cache.py)
+    prefix_cache: bool = False
+
+
+@dataclass
+class ExamplesSettings:
+    # Examples from prompts.yaml sent with every call: 0 none, 1 the first one, 2 all of them,
+    # 3 the ones most similar to the question, up to top_k and token_budget
+    mode: int = 0
+    top_k: int = 3
+    # Max estimated tokens of selected examples, inputs and outputs together
+    token_budget: int = 600
+    # Selections are cached per question
+    cache_size: int = 1024
+
+
+@dataclass
+class TiersSettings:
+    # Route calls to model tiers by prompt, field type and question complexity, everything goes to router.providers
+    # (the "default" tier) if disabled
+    enabled: bool = False
+    # Tiers on top of the default one, e.g. a cheaper and faster model for simple questions
+    tiers: list["TierSettings"] = field(default_factory=list)
+    # Checked in order, the first matching route picks the tier, calls no route matches go to the default tier.
+    # Routes to tiers that aren't defined are dropped. E.g. with a tier named "fast":
+    #   - {prompt: answer_with_options, max_options: 5, max_question_chars: 150, tier: fast}  # yes/no and such
+    #   - {prompt: answer_freely, max_question_chars: 100, tier: fast}  # "Years of experience with X?"
+    routes: list["TierRouteSettings"] = field(default_factory=list)
+
+
+@dataclass
+class TierSettings:
+    name: str = None
+    # Same as router.providers, the tier has its own provider router over them
+    providers: list["ProviderSettings"] = field(default_factory=list)
+    # Connections kept open to the tier's providers, every tier has its own pool,
+    # so slow CV rewrites don't hold up the connections of quick form questions
+    max_connections: int = 10
+
+
+@dataclass
+class TierRouteSettings:
+    # Every condition that is set has to match: prompt name (answer_freely, answer_with_options, answer_batch,
+    # cv_fill_in, cv_sections), field type (input, list, radio, checkbox) and question complexity.
+    # Field type and complexity conditions match only calls with questions, every question of a batch has to match
+    prompt: str = None
+    field_type: str = None
+    max_question_chars: int = None
+    max_options: int = None
+    tier: str = "default"
+
+
+@dataclass
+class HttpPoolSettings:
+    # Keep-alive connections shared by every provider of router.providers, each tier has a pool of its own
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    # Idle connections are closed after that, providers drop them after a minute or two anyway
+    keepalive_expiry_sec: float = 60.
+    # Needs the h2 package (pip install httpx[http2]), HTTP/1.1 is used without it
+    http2: bool = False
+    # Open connections to every provider in the background at startup, while Chrome is launching
+    warm_up: bool = True
+    warm_up_timeout_sec: float = 10.
+
+
+@dataclass
+class CVSectionsSettings:
+    # Tailor every CV section with a single LLM call answering JSON, instead of a call per section.
+    # Sections that don't match their schema are tailored one by one
+    single_call: bool = False
+
+
+@dataclass
+class DuplicateJobsSettings:
+    # Reuse CV generated for a repost of the same job (other city, other agency) instead of tailoring a new one
+    enabled: bool = True
+    # Estimated Jaccard similarity of title and description word shingles. Reposts with a line added or reworded
+    # are above 0.8, other roles of the same company (same boilerplate) are around 0.4
+    similarity_threshold: float = 0.7
+    # Jaccard similarity of title words, so the same company boilerplate with another role in it isn't reused
+    title_similarity_threshold: float = 0.5
+    # 30 days, resume and prompts are part of the key anyway
+    ttl_sec: int = 30 * 24 * 60 * 60
+    max_entries: int = 2000
+    # MinHash signature length and LSH bands (has to divide it), 32 bands of 4 find 99% of pairs above 0.6 similarity
+    num_perm: int = 128
+    bands: int = 32
+    shingle_size: int = 3
@@ -19,3 +19,45 @@ class FewShotPrompt:
 class OneShot:
     user_message: str = ""
     ai_message: str = ""
+
+
+# Used when prompts.yaml has no "answer_batch" prompt
+DEFAULT_ANSWER_BATCH_PROMPT = FewShotPrompt(
+    system_message=(
+        "You are filling in a job application form on behalf of the candidate, using only the candidate's resume. "
+        "You will get several numbered form questions. "
+        "Free text questions need a short answer that fits into a form field, numbers written as plain digits. "
+        "Questions with options must be answered with the number of one of the options, "
+        "or with the option copied character by character if options are not numbered. "
+        "If the resume has no data to answer a question, answer CANDIDATE_NO_DATA for that question. "
+        "Reply with a single JSON object that maps question numbers to answers, "
+        "wrapped into <answer></answer> tags."),
+    user_message_template="Resume:\n{resume}\n\nQuestions:\n{questions}",
+    examples=[OneShot(
+        user_message=("Resume:\n...\n\nQuestions:\n"
+                      "1. How many years of work experience do you have with Python?\n"
+                      "   Answer: free text\n"
+                      "2. Are you legally authorized to work in Germany?\n"
+                      "   Options: {\"1\": \"Yes\", \"2\": \"No\"}"),
+        ai_message="<answer>{\"1\": \"5\", \"2\": \"1\"}</answer>")])
+
+
+# Used when prompts.yaml has no "cv_sections" prompt
+DEFAULT_CV_SECTIONS_PROMPT = FewShotPrompt(
+    system_message=(
+        "You tailor resume sections to the position, using only facts from the candidate's resume. "
+        "You will get the resume, the position and the current resume sections as a JSON object. "
+        "Rewrite every section for the position: bring forward the experience and skills the position asks for, "
+        "reword, reorder or drop what is irrelevant, never invent anything. "
+        "Reply with a single JSON object with every section, matching the given JSON schema, "
+        "wrapped into <answer></answer> tags."),
+    user_message_template=("Resume:\n{resume}\n\nPosition:\n{position}\n\n"
+                           "Sections:\n{sections}\n\nJSON schema:\n{schema}"),
+    examples=[OneShot(
+        user_message=("Resume:\n...\n\nPosition:\nBackend developer, Django and PostgreSQL\n\n"
+                      "Sections:\n{\"hard_skills\": [\"C++\", \"Python\", \"Unity\"]}\n\n"
+                      "JSON schema:\n"
+                      "{\"type\": \"object\", \"properties\": {\"hard_skills\": {\"type\": \"array\", "
+                      "\"items\": {\"type\": \"string\"}}}, \"required\": [\"hard_skills\"]}"),
+        # Only what's in the section, reordered, irrelevant dropped, Django and PostgreSQL are not added
+        ai_message="<answer>{\"hard_skills\": [\"Python\", \"C++\"]}</answer>")])
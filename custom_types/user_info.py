@@ -53,6 +53,21 @@ class UserInfo(PrettyPrintable):
         user_info.work_preferences = WorkPreferences(**user_info.work_preferences.copy())  # noqa
         return user_info
 
+    def serialize(self, resume_format: str = "yaml") -> str:
+        """
+        Resume as text for prompts
+
+        :param resume_format: "yaml" for YAML-like pretty print, "compact" for token-lean single line entries
+        :return: Serialized resume
+        """
+        match resume_format:
+            case "yaml":
+                return str(self)
+            case "compact":
+                return self.to_compact()
+            case _:
+                raise ValueError(f"Unknown resume format: {resume_format}")
+
 
 @dataclass
 class Personal(PrettyPrintable):
@@ -1,11 +1,18 @@
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
 
-from pyhtml2pdf import converter
-from airium import Airium
 import os
 from browser_client import BrowserClient
 from config_manager import ConfigManager
 from llm_client import LLMClient
+from deadline import Deadline, check_deadline
+from pdf_renderer import PdfRenderer
+from cv_sections import (SHORT_INTRO, WORK_EXPERIENCE, HARD_SKILLS, SOFT_SKILLS, SECTION_SCHEMAS,
+                         sections_schema, valid_sections, format_section, parse_section)
+from cv_template import CVTemplate
+from job_index import JobIndex
+from answer_cache import AnswerCache
 import secrets
 import string
 from custom_types import *
@@ -27,11 +34,36 @@ class CVManager:
 
         self.exception_data = CustomExceptionData()
 
-    def __convert_cv(self, html_path: str) -> str:
+        # Sections are generated at once, a thread per section
+        self.__section_executor: ThreadPoolExecutor | None = None
+
+        # Everything in the CV that doesn't depend on the job, rendered once per user info version
+        self.__template: CVTemplate | None = None
+        self.__template_version = 0
+
+        # Headless Chrome for PDFs is kept for the whole run, launched now so it's ready by the first CV
+        self.pdf_renderer = PdfRenderer()
+        self.pdf_renderer.start_in_background()
+
+        # Reposts of the same job get the CV that was already generated for it
+        duplicate_jobs = self.config.llm_settings.duplicate_jobs
+        if duplicate_jobs.enabled:
+            self.job_index = JobIndex(os.path.join(os.getcwd(), "generated_resume", "job_index.sqlite3"),
+                                      similarity_threshold=duplicate_jobs.similarity_threshold,
+                                      title_similarity_threshold=duplicate_jobs.title_similarity_threshold,
+                                      ttl_sec=duplicate_jobs.ttl_sec,
+                                      max_entries=duplicate_jobs.max_entries,
+                                      num_perm=duplicate_jobs.num_perm,
+                                      bands=duplicate_jobs.bands,
+                                      shingle_size=duplicate_jobs.shingle_size)
+        else:
+            self.job_index = None
+
+    def __convert_cv(self, html: str) -> str:
         """
         Converting generated html resume to pdf, return absolute path and filename
 
-        :param html_path: Absolute path to the CV's html file
+        :param html: CV's html
 
         :return: Absolute path to the CV's pdf file
         """
@@ -44,426 +76,188 @@ class CVManager:
                             f"{''.join(secrets.choice(string.ascii_uppercase) for _ in range(8))}"
                             f".pdf")
 
-        converter.convert(f'file:///{html_path}', os.path.join(pdf_resume_path, pdf_resume_fname))
+        pdf = self.pdf_renderer.render(html)
+        with open(os.path.join(pdf_resume_path, pdf_resume_fname), 'wb') as f:
+            f.write(pdf)
 
         return os.path.join(pdf_resume_path, pdf_resume_fname)
 
-    def __generate_cv_html(self, llm_client: LLMClient, job_object: Job) -> str:
+    def __section_defaults(self) -> dict:
         """
-        Generating html and filling it with LLM and local user data
+        CV sections for LLM to tailor, straight from user info, none of them depends on the others.
+        These are used as is if LLM fails to tailor them
+
+        :return: Section keyword -> section, see cv_sections.SECTION_SCHEMAS
+        """
+
+        short_intro = {
+            # Just an example intro from one of my CV's
+            "title": "Software Developer",
+            "summary": "Skilled in Python, and AI development. Some experience with C++, C# and various game engines."
+        }
+
+        # TODO: I think the current CV format will fit 3 work experience entries at maximum
+        work_experience = [{"company": entry.company,
+                            "location": entry.location,
+                            "position": entry.position,
+                            "dates": f"{entry.date_from} - {entry.date_to}",
+                            # TODO: Add short description of what you did in that position
+                            "highlights": list(entry.highlights)}
+                           for entry in self.config.user_info.job_experience[:3]]
+
+        # TODO: Limiting to 8 entries
+        hard_skills = list(self.config.user_info.hard_skills[:8])
+        # TODO: Limiting to 8 entries, also
+        soft_skills = list(self.config.user_info.soft_skills[:8])
+
+        return {SHORT_INTRO: short_intro,
+                WORK_EXPERIENCE: work_experience,
+                HARD_SKILLS: hard_skills,
+                SOFT_SKILLS: soft_skills}
+
+    def __generate_sections(self, llm_client: LLMClient, job_object: Job,
+                            deadline: Deadline | None = None) -> dict:
+        """
+        Tailoring every CV section to the job with LLM, in a single call if enabled,
+        sections it doesn't get right (or all of them) with a call per section, all at once
 
         :param llm_client: LLM client instance to use
         :param job_object: Job object to tailor CV to
+        :param deadline: Deadline of the application (optional)
 
-        :return: Absolute path to the CV's html file
+        :return: Section keyword -> LLM tailored section
         """
+        defaults = self.__section_defaults()
+
+        sections = {}
+        if self.config.llm_settings.cv_sections.single_call:
+            sections = self.__generate_sections_at_once(llm_client, job_object, defaults, deadline)
 
-        # I can divide the HTML into
-        # Left Side
-        # - Title (name get from config, anything else - generate) +
-        # - Work experience (generate) +
-        # - Education (get from config) +
-        # Right Side
-        # - Contact information (get from config) +
-        # - Hard Skills (generate) +
-        # - Soft Skills (generate) +
-        # - Languages (get from config) +
-        # - Certifications and Courses (get from config) +
+        missing = {keyword: section for keyword, section in defaults.items() if keyword not in sections}
+        if missing:
+            sections.update(self.__generate_sections_one_by_one(llm_client, job_object, missing, deadline))
+        return sections
+
+    def __generate_sections_at_once(self, llm_client: LLMClient, job_object: Job, defaults: dict,
+                                    deadline: Deadline | None = None) -> dict:
+        """
+        :return: Section keyword -> LLM tailored section, for sections that match their schema only
+        """
+        start = time.perf_counter()
+        answer = llm_client.cv_sections(job_object,
+                                        {keyword.lower(): section for keyword, section in defaults.items()},
+                                        sections_schema(list(defaults)),
+                                        deadline)
+        if answer is None:
+            return {}
+
+        sections = valid_sections(answer, list(defaults))
+        invalid = [keyword for keyword in defaults if keyword not in sections]
+        if invalid:
+            logger.warning(f"CV sections not matching their schema, tailoring them one by one: {', '.join(invalid)}")
+        logger.info(f"{len(sections)} CV sections generated in a single call in {time.perf_counter() - start:.2f} sec")
+        return sections
+
+    def __generate_sections_one_by_one(self, llm_client: LLMClient, job_object: Job, defaults: dict,
+                                       deadline: Deadline | None = None) -> dict:
+        """
+        :return: Section keyword -> LLM tailored section, the default one if LLM output doesn't follow the format
+        """
+        full_name = f'{self.config.user_info.personal.name} {self.config.user_info.personal.surname}'
+
+        if self.__section_executor is None:
+            self.__section_executor = ThreadPoolExecutor(max_workers=len(SECTION_SCHEMAS),
+                                                         thread_name_prefix="CVManager")
+
+        logger.info(f"Generating {len(defaults)} CV sections at once")
+        start = time.perf_counter()
+        # Calls run in the caller's context, so langchain callbacks (cost and tokens) see them
+        futures = {keyword: self.__section_executor.submit(contextvars.copy_context().run,
+                                                           llm_client.cv_fill_in, job_object,
+                                                           format_section(keyword, section, full_name), deadline)
+                   for keyword, section in defaults.items()}
+
+        # First failure is raised right away, sections still in flight are bounded by the deadline anyway
+        done, _ = wait(futures.values(), return_when=FIRST_EXCEPTION)
+        for future in futures.values():
+            if future in done and future.exception() is not None:
+                raise future.exception()
+
+        sections = {}
+        for keyword, future in futures.items():
+            sections[keyword] = parse_section(keyword, future.result())
+            if sections[keyword] is None:
+                logger.warning(f"LLM output for {keyword} doesn't follow the format, using the resume as is")
+                sections[keyword] = defaults[keyword]
+
+        logger.info(f"CV sections generated in {time.perf_counter() - start:.2f} sec")
+        return sections
+
+    def __cv_template(self) -> CVTemplate:
+        """
+        :return: CV template for the current user info, built once per user info version
+        """
+        # Accessing user_info reloads it if the file changed, version has to be read after that
+        user_info = self.config.user_info
+        if self.__template is None or self.__template_version != self.config.user_info_version:
+            start = time.perf_counter()
+            self.__template = CVTemplate(user_info)
+            self.__template_version = self.config.user_info_version
+            logger.info(f"CV template built in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return self.__template
+
+    def __generate_cv_html(self, job_object: Job, sections: dict) -> str:
+        """
+        Generating html from LLM tailored sections and the pre-rendered rest of the CV
 
-        # I think I'll just hardcode logging
+        :param job_object: Job object to tailor CV to
+        :param sections: LLM tailored sections, from __generate_sections
 
+        :return: CV's html
+        """
         logger.info(f"Starting to generate CV for {job_object.title} ({job_object.company})")
 
-        a = Airium(base_indent='    ')
-
-        a('<!DOCTYPE html>')
-        with a.html(lang='en'):
-            # ----------------------------------------------------------------------------------------------------------
-            # Metadata and CSS section
-            # ----------------------------------------------------------------------------------------------------------
-            with a.head():
-                a.meta(charset='UTF-8')
-                a.meta(content='width=device-width, initial-scale=1.0', name='viewport')
-                a.meta(content='IE=edge', **{'http-equiv': 'X-UA-Compatible'})
-                a.title(_t='The Resume')
-                with a.style():
-                    a('@import url(\'https://fonts.googleapis.com/css2?'
-                      'family=Merriweather:wght@700&'
-                      'family=Open+Sans:wght@400;700&'
-                      'family=Open+Sans:ital,wght@0,400;1,400&'
-                      'display=swap\');\n'
-                      '            \n'
-                      '            body {\n'
-                      '                font-family: "Open Sans", sans-serif;\n'
-                      '                margin: 0;\n'
-                      '                padding: 20px;\n'
-                      '                background-color: #ffffff;\n'
-                      '            }\n'
-                      '            .container {\n'
-                      '                display: flex;\n'
-                      '                justify-content: space-between;\n'
-                      '                max-width: 960px;\n'
-                      '                margin: 0 auto;\n'
-                      '            }\n'
-                      '            .left-column, .right-column {\n'
-                      '                padding: 10px;\n'
-                      '            }\n'
-                      '            .left-column {\n'
-                      '                width: 65%;\n'
-                      '            }\n'
-                      '            .right-column {\n'
-                      '                width: 30%;\n'
-                      '            }\n'
-                      '            h1 {\n'
-                      '            font-family: \'Merriweather\', serif;\n'
-                      '                font-size: 28px;\n'
-                      '                margin-bottom: 0;\n'
-                      '                color: #000000;\n'
-                      '            }\n'
-                      '            h2, h3 {\n'
-                      '                font-family: \'Merriweather\', serif;\n'
-                      '                color: #9370DB;\n'
-                      '            }\n'
-                      '            h2 {\n'
-                      '                font-size: 20px;\n'
-                      '                margin-bottom: 10px;\n'
-                      '            }\n'
-                      '            h3 {\n'
-                      '                font-size: 16px;\n'
-                      '                margin-bottom: 5px;\n'
-                      '            }\n'
-                      '            p, li {\n'
-                      '                font-family: \'Open Sans\', sans-serif;\n'
-                      '                font-size: 12px;\n'
-                      '                line-height: 1.4;\n'
-                      '                color: #696969;\n'
-                      '            }\n'
-                      '            .section {\n'
-                      '                margin-bottom: 15px;\n'
-                      '            }\n'
-                      '            .contact-info p, .contact-info a {\n'
-                      '                font-size: 12px;\n'
-                      '                margin-bottom: 5px;\n'
-                      '                color: #696969;\n'
-                      '            }\n'
-                      '            ul {\n'
-                      '                list-style-type: none;\n'
-                      '                padding: 0;\n'
-                      '            }\n'
-                      '            ul li {\n'
-                      '                margin-bottom: 8px;\n'
-                      '            }\n'
-                      '            a {\n'
-                      '                color: #696969;\n'
-                      '                text-decoration: none;\n'
-                      '            }\n'
-                      '            .subheading {\n'
-                      '                font-family: \'Open Sans\', sans-serif;\n'
-                      '                font-weight: bold;\n'
-                      '                color: #000000;\n'
-                      '            }\n'
-                      '            .section-title {\n'
-                      '                font-family: \'Merriweather\', serif;\n'
-                      '                font-weight: bold;\n'
-                      '                color: #9370DB;\n'
-                      '                margin-top: 10px;\n'
-                      '                margin-bottom: 5px;\n'
-                      '            }\n'
-                      '            .italic {\n'
-                      '                    font-style: italic;\n'
-                      '            }\n'
-                      '            \n'
-                      '            @media print {\n'
-                      '                body {\n'
-                      '                    font-size: 10px;\n'
-                      '                }\n'
-                      '                h1 {\n'
-                      '                    font-size: 20px;\n'
-                      '                }\n'
-                      '                h2 {\n'
-                      '                    font-size: 16px;\n'
-                      '                }\n'
-                      '                h3 {\n'
-                      '                    font-size: 14px;\n'
-                      '                }\n'
-                      '                p, li {\n'
-                      '                    font-size: 10px;\n'
-                      '                }\n'
-                      '            }')
-            # ----------------------------------------------------------------------------------------------------------
-
-            # ----------------------------------------------------------------------------------------------------------
-            # Body section
-            # ----------------------------------------------------------------------------------------------------------
-            with a.body():
-                with a.div(klass='container'):
-                    with a.div(klass='left-column'):
-                        # TODO: Is it even a good idea to generate while we construct HTML...?
-                        # Short intro generation
-                        logger.info(f"Filling in intro (1/8)")
-                        # ----------------------------------------------------------------------------------------------
-                        example_title = (
-                            # Whatever we are generating right now, it's for LLM
-                            'SHORT_INTRO\n'
-                            # Name and Surname
-                            f'{self.config.user_info.personal.name} {self.config.user_info.personal.surname}\n'
-                            # Title
-                            'Software Developer\n'
-                            # Just an example intro from one of my CV's
-                            'Skilled in Python, and AI development. '
-                            'Some experience with C++, C# and various game engines.'
-                        )
-
-                        generated_title = llm_client.cv_fill_in(job_object, example_title)
-                        # generated_title = example_title
-                        # ----------------------------------------------------------------------------------------------
-
-                        # Parsing and formatting the output
-                        # ----------------------------------------------------------------------------------------------
-                        # We are at the mercy of the LLM here
-                        # Expect line 0 contain keyword the LLM returned to us
-                        # Expect line 1 to be the name and surname (but we are getting them from the config anyways)
-                        # Expect line 2 to be the title
-                        # Expect starting from line 3 our little "catchphrase"
-
-                        generated_title = generated_title.removeprefix("SHORT_INTRO\n")
-
-                        a.h1(_t=f'{self.config.user_info.personal.name} {self.config.user_info.personal.surname}')
-
-                        a.p(klass='subheading', _t=generated_title.split('\n')[1])
-
-                        for line in generated_title.split('\n')[2:]:
-                            # TODO: What the hell are you naming the variables xd
-                            for line_line in line.split('. '):
-                                with a.p(klass='italic'):
-                                    a(line_line if line_line.endswith('.') else f'{line_line}.')
-                        # ----------------------------------------------------------------------------------------------
-
-                        # Work experience generation
-                        logger.info(f"Filling in work experience (2/8)")
-                        # ----------------------------------------------------------------------------------------------
-                        example_work_experience = "WORK_EXPERIENCE\n"
-                        # TODO: I think the current CV format will fit 3 work experience entries at maximum
-                        for entry in self.config.user_info.job_experience[:3]:
-                            example_work_experience += f'{entry.company} - {entry.location} - {entry.position}\n'
-                            example_work_experience += f'{entry.date_from} - {entry.date_to}\n'
-                            # TODO: Add short description of what you did in that position
-                            # example_work_experience += '\n'
-                            for highlight in entry.highlights:
-                                example_work_experience += f'{highlight}\n'
-                            example_work_experience += '\n'
-                        example_work_experience = example_work_experience.strip()
-
-                        generated_work_experience = llm_client.cv_fill_in(job_object, example_work_experience)
-                        # generated_work_experience = example_work_experience
-                        # ----------------------------------------------------------------------------------------------
-
-                        # Parsing and formatting the output
-                        # ----------------------------------------------------------------------------------------------
-                        # Still at the mercy of the LLM
-                        # Expect first line to be keyword that LLM returned to us
-                        # Expect each work entry separated by double newline
-                        # Expect first line of work entry be [company, location, position], delimited by ' - '
-                        # Expect second line of work entry be [start, end] dates, delimited by ' - '
-                        # Expect all other lines in work entry to be highlights
-
-                        generated_work_experience = generated_work_experience.removeprefix("WORK_EXPERIENCE\n")
-
-                        with a.div(klass='section'):
-                            a.h2(klass='section-title', _t='Work Experience')
-                            for generated_entry in generated_work_experience.split('\n\n'):
-                                company, location, position = generated_entry.split('\n')[0].split(' - ')
-                                with a.h3(klass='subheading'):
-                                    a(f'{company} - {location} - ')
-                                    a.em(_t=position)
-
-                                with a.p():
-                                    a.strong(_t=generated_entry.split('\n')[1])
-
-                                with a.ul():
-                                    for line in generated_entry.split('\n')[2:]:
-                                        a.li(_t=line)
-                        # ----------------------------------------------------------------------------------------------
-
-                        # TODO: What even can we generate in the education section
-                        #  Just following the same structure as with generated ones
-                        #  (in case we will actually NEED to ask LLM)
-                        # TODO: Should I add institute name? (like, the part of the university)
-                        # Education history generation (?)
-                        logger.info(f"Filling in education history (3/8)")
-                        # ----------------------------------------------------------------------------------------------
-                        example_education_history = "EDUCATION\n"
-
-                        # TODO: I'll just limit the education to two first entries
-                        #  (CV have to fit into one page after all)
-                        for entry in self.config.user_info.education[:2]:
-                            example_education_history += f"{entry.educational_institution}\n"
-                            example_education_history += f"{entry.degree_name}\n"
-                            example_education_history += f"{entry.date_from} - {entry.date_to}\n"
-                            example_education_history += f"{entry.field_of_study}\n"
-                            example_education_history += "\n"
-                        example_education_history = example_education_history.strip()
-
-                        generated_education_history = example_education_history
-                        # ----------------------------------------------------------------------------------------------
-
-                        # Parsing and formatting the output
-                        # ----------------------------------------------------------------------------------------------
-                        # Surprisingly we are not at the mercy of the LLM (for now...)
-                        # First contains keyword the LLM would've returned to us
-                        # Each education entry is split by double newline
-                        # First line of the entry is an institution name
-                        # Second line of the entry is a degree name
-                        # Third line is [start, end] dates, delimited by ' - '
-                        # Fourth line is a field of study
-
-                        generated_education_history = generated_education_history.removeprefix("EDUCATION\n")
-
-                        with a.div(klass='section'):
-                            a.h2(klass='section-title', _t='Education')
-                            for generated_entry in generated_education_history.split('\n\n'):
-                                institution, degree, date, study_field = generated_entry.split('\n')
-
-                                a.h3(klass='subheading', _t=institution)
-
-                                with a.p():
-                                    a.em(_t=degree)
-
-                                with a.p():
-                                    a.strong(_t=date)
-                                a.p(_t=study_field)
-                        # ----------------------------------------------------------------------------------------------
-
-                    with a.div(klass='right-column'):
-                        # Contact info
-                        logger.info(f"Filling in contact info (4/8)")
-                        # ----------------------------------------------------------------------------------------------
-                        with a.div(klass='section contact-info'):
-                            with a.p():
-                                a.strong(_t='Phone:')
-                                a(f'{self.config.user_info.personal.phone_prefix} '
-                                  f'{self.config.user_info.personal.phone}')
-                            with a.p():
-                                a.strong(_t='Email:')
-                                a.a(href=f'mailto:{self.config.user_info.personal.email}',
-                                    _t=self.config.user_info.personal.email)
-                            with a.p():
-                                with a.a(href=self.config.user_info.personal.linkedin):
-                                    a.strong(_t='LinkedIn')
-                            with a.p():
-                                with a.a(href=self.config.user_info.personal.telegram):
-                                    a.strong(_t='Telegram')
-                            with a.p():
-                                a.strong(_t='Location:')
-                                a(f'{self.config.user_info.personal.city}, {self.config.user_info.personal.country}')
-                        # ----------------------------------------------------------------------------------------------
-
-                        # Hard skills generation
-                        logger.info(f"Filling in hard skills (5/8)")
-                        # ----------------------------------------------------------------------------------------------
-                        # TODO: Limiting to 8 entries
-                        example_hard_skills = (
-                                "HARD_SKILLS\n" + "".join([f'{entry}\n'
-                                                           for entry in self.config.user_info.hard_skills[:8]])
-                        )
-                        example_hard_skills = example_hard_skills.strip()
-
-                        generated_hard_skills = llm_client.cv_fill_in(job_object, example_hard_skills)
-                        # generated_hard_skills = example_hard_skills
-                        # ----------------------------------------------------------------------------------------------
-
-                        # Parsing and formatting the output
-                        # ----------------------------------------------------------------------------------------------
-                        # You guessed it, the mercy of the LLM
-                        # Expect first line to be keyword that LLM returned to us
-                        # Expect every other line to be hard skills list
-
-                        generated_hard_skills = generated_hard_skills.removeprefix("HARD_SKILLS\n")
-
-                        with a.div(klass='section'):
-                            a.h2(klass='section-title', _t='Hard Skills')
-                            with a.ul():
-                                for entry in generated_hard_skills.split('\n'):
-                                    a.li(_t=entry)
-                        # ----------------------------------------------------------------------------------------------
-
-                        # Soft skills generation
-                        logger.info(f"Filling in soft skills (6/8)")
-                        # TODO: Resembles hard skills generation above, can I do something about that?
-                        # ----------------------------------------------------------------------------------------------
-                        # TODO: Limiting to 8 entries, also
-                        example_soft_skills = (
-                                "SOFT_SKILLS\n" + "".join([f'{entry}\n'
-                                                           for entry in self.config.user_info.soft_skills[:8]])
-                        )
-                        example_soft_skills = example_soft_skills.strip()
-
-                        generated_soft_skills = llm_client.cv_fill_in(job_object, example_soft_skills)
-                        # generated_soft_skills = example_soft_skills
-                        # ----------------------------------------------------------------------------------------------
-
-                        # Parsing and formatting the output
-                        # ----------------------------------------------------------------------------------------------
-                        # You will never believe that, the mercy of the LLM again!
-                        # Expect first line to be keyword that LLM returned to us
-                        # Expect every other line to be soft skills list
-
-                        generated_soft_skills = generated_soft_skills.removeprefix("SOFT_SKILLS\n")
-
-                        with a.div(klass='section'):
-                            a.h2(klass='section-title', _t='Soft Skills')
-                            with a.ul():
-                                for entry in generated_soft_skills.split('\n'):
-                                    a.li(_t=entry)
-                        # ----------------------------------------------------------------------------------------------
-
-                        # Languages
-                        logger.info(f"Filling in languages (7/8)")
-                        # ----------------------------------------------------------------------------------------------
-                        with a.div(klass='section'):
-                            a.h2(klass='section-title', _t='Languages')
-                            with a.ul():
-                                # TODO: Not limiting these, it's important!
-                                for entry in self.config.user_info.languages:
-                                    a.li(_t=f'{entry.language} ({entry.proficiency})')
-                        # ----------------------------------------------------------------------------------------------
-
-                        # Certifications
-                        logger.info(f"Filling in certifications (8/8)")
-                        # TODO: I don't think letting LLM change certifications is a good idea.
-                        #  I guess it can be asked what certification to put into the CV.
-                        #  For now just leaving maximum of three certifications (to fit into one page).
-                        # ----------------------------------------------------------------------------------------------
-                        with a.div(klass='section'):
-                            a.h2(klass='section-title', _t='Certifications and Courses')
-                            with a.ul():
-                                for entry in self.config.user_info.certifications[:3]:
-                                    a.li(_t=f'{entry.name} - {entry.date}')
-                        # ----------------------------------------------------------------------------------------------
-            # ----------------------------------------------------------------------------------------------------------
-
-        html_resume_path = os.path.join(os.getcwd(), "generated_resume", "resume_html.html")
-
-        with open(html_resume_path, 'wb') as f:
-            f.write(bytes(a))
-
-        return html_resume_path
-
-    def generate_cv_pdf(self, llm_client: LLMClient, job_object: Job) -> str:
+        start = time.perf_counter()
+        html = self.__cv_template().render(sections)
+        logger.info(f"CV html assembled in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return html
+
+    def __job_index_group(self) -> str:
+        """
+        :return: Job index group of the current user info and CV prompts
+        """
+        prompts = repr((self.config.prompt_cv_fill_in, self.config.prompt_cv_sections))
+        return JobIndex.group_key(AnswerCache.fingerprint(repr(self.config.user_info)),
+                                  AnswerCache.fingerprint(prompts))
+
+    def generate_cv_pdf(self, llm_client: LLMClient, job_object: Job, deadline: Deadline | None = None) -> str:
         """
         Generating CV pdf and filling it with LLM and local user data
 
         :param llm_client: LLM client instance to use
         :param job_object: Job object to tailor CV to
+        :param deadline: Deadline of the application, every LLM call is bounded by it (optional)
 
         :return: Absolute path to the CV's pdf file
         """
 
-        html_resume_path = self.__generate_cv_html(llm_client=llm_client, job_object=job_object)
-        pdf_resume_path = self.__convert_cv(html_resume_path)
-        logger.debug("Removing cv html file, since it's not needed anymore")
-        os.remove(html_resume_path)
-        return pdf_resume_path
+        if self.job_index is not None:
+            group = self.__job_index_group()
+            duplicate = self.job_index.lookup(job_object, group)
+            if duplicate is not None:
+                pdf_path, title, similarity = duplicate
+                logger.info(f"Reusing CV generated for \"{title}\" (similarity {similarity:.2f}). "
+                            f"Job index {self.job_index.stats()}")
+                return pdf_path
+
+        sections = self.__generate_sections(llm_client=llm_client, job_object=job_object, deadline=deadline)
+        html_resume = self.__generate_cv_html(job_object=job_object, sections=sections)
+        check_deadline(deadline, "CV pdf conversion")
+        pdf_path = self.__convert_cv(html_resume)
+
+        if self.job_index is not None:
+            self.job_index.add(job_object, group, pdf_path)
+        return pdf_path
 
 
 if __name__ == '__main__':
@@ -0,0 +1,130 @@
+# Sections of the CV the LLM tailors to the job. Keyword is the first line of the section in cv_fill_in prompts,
+# its lowercase is the key of the section in cv_sections JSON
+SHORT_INTRO = "SHORT_INTRO"
+WORK_EXPERIENCE = "WORK_EXPERIENCE"
+HARD_SKILLS = "HARD_SKILLS"
+SOFT_SKILLS = "SOFT_SKILLS"
+
+STRING = {"type": "string"}
+STRING_LIST = {"type": "array", "items": STRING, "minItems": 1}
+
+# JSON schema of every section, sent to the LLM and checked locally
+SECTION_SCHEMAS = {
+    SHORT_INTRO: {
+        "type": "object",
+        "properties": {"title": STRING, "summary": STRING},
+        "required": ["title", "summary"]},
+    WORK_EXPERIENCE: {
+        "type": "array",
+        "minItems": 1,
+        "items": {
+            "type": "object",
+            "properties": {"company": STRING, "location": STRING, "position": STRING, "dates": STRING,
+                           "highlights": {"type": "array", "items": STRING}},
+            "required": ["company", "location", "position", "dates", "highlights"]}},
+    HARD_SKILLS: STRING_LIST,
+    SOFT_SKILLS: STRING_LIST,
+}
+
+
+def sections_schema(keywords: list[str]) -> dict:
+    """
+    :param keywords: Section keywords
+    :return: JSON schema of an object with all these sections
+    """
+    return {"type": "object",
+            "properties": {k.lower(): SECTION_SCHEMAS[k] for k in keywords},
+            "required": [k.lower() for k in keywords]}
+
+
+def matches_schema(value, schema: dict) -> bool:
+    """
+    Just the part of JSON schema that SECTION_SCHEMAS use: string, array and object types, minItems and required.
+    Strings have to be non-blank, properties that are not in the schema are ignored
+
+    :param value: Parsed JSON value
+    :param schema: JSON schema
+    :return: Whether the value matches the schema
+    """
+    match schema["type"]:
+        case "string":
+            return isinstance(value, str) and bool(value.strip())
+        case "array":
+            return (isinstance(value, list) and len(value) >= schema.get("minItems", 0)
+                    and all(matches_schema(item, schema["items"]) for item in value))
+        case "object":
+            return isinstance(value, dict) and all(
+                key in value and matches_schema(value[key], schema["properties"][key])
+                for key in schema.get("required", []))
+        case _:
+            raise ValueError(f"Unsupported JSON schema type: {schema['type']}")
+
+
+def valid_sections(answer: dict, keywords: list[str]) -> dict:
+    """
+    :param answer: cv_sections answer, section JSON key -> section
+    :param keywords: Expected section keywords
+    :return: Section keyword -> section, for sections that match their schema only
+    """
+    return {k: answer[k.lower()] for k in keywords
+            if k.lower() in answer and matches_schema(answer[k.lower()], SECTION_SCHEMAS[k])}
+
+
+def format_section(keyword: str, section, full_name: str) -> str:
+    """
+    Section in the text format of cv_fill_in prompts
+
+    :param keyword: Section keyword
+    :param section: Section, matching its schema
+    :param full_name: Candidate's name and surname, second line of the intro
+    :return: Keyword line followed by the section
+    """
+    match keyword:
+        case "SHORT_INTRO":
+            lines = [full_name, section["title"], section["summary"]]
+        case "WORK_EXPERIENCE":
+            # Entries are separated by an empty line
+            lines = ["\n".join([f"{entry['company']} - {entry['location']} - {entry['position']}",
+                                entry["dates"],
+                                *entry["highlights"]]) + "\n"
+                     for entry in section]
+        case "HARD_SKILLS" | "SOFT_SKILLS":
+            lines = section
+        case _:
+            raise ValueError(f"Unknown CV section: {keyword}")
+    return "\n".join([keyword, *lines]).strip()
+
+
+def parse_section(keyword: str, text: str):
+    """
+    Section out of cv_fill_in text
+
+    :param keyword: Section keyword
+    :param text: LLM tailored section, in the text format of cv_fill_in prompts
+    :return: Section matching its schema, None if the text doesn't follow the format
+    """
+    text = text.strip().removeprefix(keyword).strip("\n")
+
+    match keyword:
+        case "SHORT_INTRO":
+            # Name and surname, title, then the summary, name comes from the config anyway
+            lines = text.split("\n")
+            if len(lines) < 3:
+                return None
+            section = {"title": lines[1].strip(), "summary": "\n".join(lines[2:]).strip()}
+        case "WORK_EXPERIENCE":
+            section = []
+            for entry in text.split("\n\n"):
+                lines = entry.strip().split("\n")
+                head = lines[0].split(" - ")
+                if len(lines) < 2 or len(head) != 3:
+                    return None
+                company, location, position = (h.strip() for h in head)
+                section.append({"company": company, "location": location, "position": position,
+                                "dates": lines[1].strip(), "highlights": [line.strip() for line in lines[2:]]})
+        case "HARD_SKILLS" | "SOFT_SKILLS":
+            section = [line.strip() for line in text.split("\n") if line.strip()]
+        case _:
+            raise ValueError(f"Unknown CV section: {keyword}")
+
+    return section if matches_schema(section, SECTION_SCHEMAS[keyword]) else None
@@ -0,0 +1,378 @@
+import logging
+from airium import Airium
+from custom_types import UserInfo
+from cv_sections import SHORT_INTRO, WORK_EXPERIENCE, HARD_SKILLS, SOFT_SKILLS, SECTION_SCHEMAS
+
+logger = logging.getLogger("CVTemplate")
+
+BASE_INDENT = '    '
+
+
+def placeholder(keyword: str) -> str:
+    """
+    :param keyword: Section keyword
+    :return: Line that marks the section in the template
+    """
+    return f'<!--{keyword}-->'
+
+
+def write_section(a: Airium, keyword: str, sections: dict | None) -> None:
+    """
+    Write LLM tailored section into the document
+
+    :param a: Document
+    :param keyword: Section keyword
+    :param sections: Section keyword -> section, None to write a placeholder instead (for the template)
+    """
+    if sections is None:
+        a(placeholder(keyword))
+        return
+
+    section = sections[keyword]
+    match keyword:
+        case "SHORT_INTRO":
+            a.p(klass='subheading', _t=section["title"])
+
+            for line in section["summary"].split('\n'):
+                # TODO: What the hell are you naming the variables xd
+                for line_line in line.split('. '):
+                    with a.p(klass='italic'):
+                        a(line_line if line_line.endswith('.') else f'{line_line}.')
+        case "WORK_EXPERIENCE":
+            with a.div(klass='section'):
+                a.h2(klass='section-title', _t='Work Experience')
+                for entry in section:
+                    with a.h3(klass='subheading'):
+                        a(f'{entry["company"]} - {entry["location"]} - ')
+                        a.em(_t=entry["position"])
+
+                    with a.p():
+                        a.strong(_t=entry["dates"])
+
+                    with a.ul():
+                        for line in entry["highlights"]:
+                            a.li(_t=line)
+        case "HARD_SKILLS" | "SOFT_SKILLS":
+            with a.div(klass='section'):
+                a.h2(klass='section-title', _t='Hard Skills' if keyword == HARD_SKILLS else 'Soft Skills')
+                with a.ul():
+                    for entry in section:
+                        a.li(_t=entry)
+        case _:
+            raise ValueError(f"Unknown CV section: {keyword}")
+
+
+def build_cv_html(user_info: UserInfo, sections: dict | None = None) -> str:
+    """
+    Generating html and filling it with LLM tailored sections and local user data
+
+    :param user_info: User info from config
+    :param sections: LLM tailored sections, see cv_sections.SECTION_SCHEMAS, None for the template
+
+    :return: CV's html
+    """
+
+    # I can divide the HTML into
+    # Left Side
+    # - Title (name get from config, anything else - generate) +
+    # - Work experience (generate) +
+    # - Education (get from config) +
+    # Right Side
+    # - Contact information (get from config) +
+    # - Hard Skills (generate) +
+    # - Soft Skills (generate) +
+    # - Languages (get from config) +
+    # - Certifications and Courses (get from config) +
+
+    # I think I'll just hardcode logging
+
+    a = Airium(base_indent=BASE_INDENT)
+
+    a('<!DOCTYPE html>')
+    with a.html(lang='en'):
+        # --------------------------------------------------------------------------------------------------------------
+        # Metadata and CSS section
+        # --------------------------------------------------------------------------------------------------------------
+        with a.head():
+            a.meta(charset='UTF-8')
+            a.meta(content='width=device-width, initial-scale=1.0', name='viewport')
+            a.meta(content='IE=edge', **{'http-equiv': 'X-UA-Compatible'})
+            a.title(_t='The Resume')
+            with a.style():
+                a('@import url(\'https://fonts.googleapis.com/css2?'
+                  'family=Merriweather:wght@700&'
+                  'family=Open+Sans:wght@400;700&'
+                  'family=Open+Sans:ital,wght@0,400;1,400&'
+                  'display=swap\');\n'
+                  '            \n'
+                  '            body {\n'
+                  '                font-family: "Open Sans", sans-serif;\n'
+                  '                margin: 0;\n'
+                  '                padding: 20px;\n'
+                  '                background-color: #ffffff;\n'
+                  '            }\n'
+                  '            .container {\n'
+                  '                display: flex;\n'
+                  '                justify-content: space-between;\n'
+                  '                max-width: 960px;\n'
+                  '                margin: 0 auto;\n'
+                  '            }\n'
+                  '            .left-column, .right-column {\n'
+                  '                padding: 10px;\n'
+                  '            }\n'
+                  '            .left-column {\n'
+                  '                width: 65%;\n'
+                  '            }\n'
+                  '            .right-column {\n'
+                  '                width: 30%;\n'
+                  '            }\n'
+                  '            h1 {\n'
+                  '            font-family: \'Merriweather\', serif;\n'
+                  '                font-size: 28px;\n'
+                  '                margin-bottom: 0;\n'
+                  '                color: #000000;\n'
+                  '            }\n'
+                  '            h2, h3 {\n'
+                  '                font-family: \'Merriweather\', serif;\n'
+                  '                color: #9370DB;\n'
+                  '            }\n'
+                  '            h2 {\n'
+                  '                font-size: 20px;\n'
+                  '                margin-bottom: 10px;\n'
+                  '            }\n'
+                  '            h3 {\n'
+                  '                font-size: 16px;\n'
+                  '                margin-bottom: 5px;\n'
+                  '            }\n'
+                  '            p, li {\n'
+                  '                font-family: \'Open Sans\', sans-serif;\n'
+                  '                font-size: 12px;\n'
+                  '                line-height: 1.4;\n'
+                  '                color: #696969;\n'
+                  '            }\n'
+                  '            .section {\n'
+                  '                margin-bottom: 15px;\n'
+                  '            }\n'
+                  '            .contact-info p, .contact-info a {\n'
+                  '                font-size: 12px;\n'
+                  '                margin-bottom: 5px;\n'
+                  '                color: #696969;\n'
+                  '            }\n'
+                  '            ul {\n'
+                  '                list-style-type: none;\n'
+                  '                padding: 0;\n'
+                  '            }\n'
+                  '            ul li {\n'
+                  '                margin-bottom: 8px;\n'
+                  '            }\n'
+                  '            a {\n'
+                  '                color: #696969;\n'
+                  '                text-decoration: none;\n'
+                  '            }\n'
+                  '            .subheading {\n'
+                  '                font-family: \'Open Sans\', sans-serif;\n'
+                  '                font-weight: bold;\n'
+                  '                color: #000000;\n'
+                  '            }\n'
+                  '            .section-title {\n'
+                  '                font-family: \'Merriweather\', serif;\n'
+                  '                font-weight: bold;\n'
+                  '                color: #9370DB;\n'
+                  '                margin-top: 10px;\n'
+                  '                margin-bottom: 5px;\n'
+                  '            }\n'
+                  '            .italic {\n'
+                  '                    font-style: italic;\n'
+                  '            }\n'
+                  '            \n'
+                  '            @media print {\n'
+                  '                body {\n'
+                  '                    font-size: 10px;\n'
+                  '                }\n'
+                  '                h1 {\n'
+                  '                    font-size: 20px;\n'
+                  '                }\n'
+                  '                h2 {\n'
+                  '                    font-size: 16px;\n'
+                  '                }\n'
+                  '                h3 {\n'
+                  '                    font-size: 14px;\n'
+                  '                }\n'
+                  '                p, li {\n'
+                  '                    font-size: 10px;\n'
+                  '                }\n'
+                  '            }')
+        # --------------------------------------------------------------------------------------------------------------
+
+        # --------------------------------------------------------------------------------------------------------------
+        # Body section
+        # --------------------------------------------------------------------------------------------------------------
+        with a.body():
+            with a.div(klass='container'):
+                with a.div(klass='left-column'):
+                    # Short intro
+                    logger.info(f"Filling in intro (1/8)")
+                    # --------------------------------------------------------------------------------------------------
+                    # Name and surname come from the config anyway, title and our little "catchphrase" from LLM
+                    a.h1(_t=f'{user_info.personal.name} {user_info.personal.surname}')
+
+                    write_section(a, SHORT_INTRO, sections)
+                    # --------------------------------------------------------------------------------------------------
+
+                    # Work experience
+                    logger.info(f"Filling in work experience (2/8)")
+                    # --------------------------------------------------------------------------------------------------
+                    write_section(a, WORK_EXPERIENCE, sections)
+                    # --------------------------------------------------------------------------------------------------
+
+                    # TODO: What even can we generate in the education section
+                    #  Just following the same structure as with generated ones
+                    #  (in case we will actually NEED to ask LLM)
+                    # TODO: Should I add institute name? (like, the part of the university)
+                    # Education history generation (?)
+                    logger.info(f"Filling in education history (3/8)")
+                    # --------------------------------------------------------------------------------------------------
+                    example_education_history = "EDUCATION\n"
+
+                    # TODO: I'll just limit the education to two first entries
+                    #  (CV have to fit into one page after all)
+                    for entry in user_info.education[:2]:
+                        example_education_history += f"{entry.educational_institution}\n"
+                        example_education_history += f"{entry.degree_name}\n"
+                        example_education_history += f"{entry.date_from} - {entry.date_to}\n"
+                        example_education_history += f"{entry.field_of_study}\n"
+                        example_education_history += "\n"
+                    example_education_history = example_education_history.strip()
+
+                    generated_education_history = example_education_history
+                    # --------------------------------------------------------------------------------------------------
+
+                    # Parsing and formatting the output
+                    # --------------------------------------------------------------------------------------------------
+                    # Surprisingly we are not at the mercy of the LLM (for now...)
+                    # First contains keyword the LLM would've returned to us
+                    # Each education entry is split by double newline
+                    # First line of the entry is an institution name
+                    # Second line of the entry is a degree name
+                    # Third line is [start, end] dates, delimited by ' - '
+                    # Fourth line is a field of study
+
+                    generated_education_history = generated_education_history.removeprefix("EDUCATION\n")
+
+                    with a.div(klass='section'):
+                        a.h2(klass='section-title', _t='Education')
+                        for generated_entry in generated_education_history.split('\n\n'):
+                            institution, degree, date, study_field = generated_entry.split('\n')
+
+                            a.h3(klass='subheading', _t=institution)
+
+                            with a.p():
+                                a.em(_t=degree)
+
+                            with a.p():
+                                a.strong(_t=date)
+                            a.p(_t=study_field)
+                    # --------------------------------------------------------------------------------------------------
+
+                with a.div(klass='right-column'):
+                    # Contact info
+                    logger.info(f"Filling in contact info (4/8)")
+                    # --------------------------------------------------------------------------------------------------
+                    with a.div(klass='section contact-info'):
+                        with a.p():
+                            a.strong(_t='Phone:')
+                            a(f'{user_info.personal.phone_prefix} '
+                              f'{user_info.personal.phone}')
+                        with a.p():
+                            a.strong(_t='Email:')
+                            a.a(href=f'mailto:{user_info.personal.email}',
+                                _t=user_info.personal.email)
+                        with a.p():
+                            with a.a(href=user_info.personal.linkedin):
+                                a.strong(_t='LinkedIn')
+                        with a.p():
+                            with a.a(href=user_info.personal.telegram):
+                                a.strong(_t='Telegram')
+                        with a.p():
+                            a.strong(_t='Location:')
+                            a(f'{user_info.personal.city}, {user_info.personal.country}')
+                    # --------------------------------------------------------------------------------------------------
+
+                    # Hard skills
+                    logger.info(f"Filling in hard skills (5/8)")
+                    # --------------------------------------------------------------------------------------------------
+                    write_section(a, HARD_SKILLS, sections)
+                    # --------------------------------------------------------------------------------------------------
+
+                    # Soft skills
+                    logger.info(f"Filling in soft skills (6/8)")
+                    # --------------------------------------------------------------------------------------------------
+                    write_section(a, SOFT_SKILLS, sections)
+                    # --------------------------------------------------------------------------------------------------
+
+                    # Languages
+                    logger.info(f"Filling in languages (7/8)")
+                    # --------------------------------------------------------------------------------------------------
+                    with a.div(klass='section'):
+                        a.h2(klass='section-title', _t='Languages')
+                        with a.ul():
+                            # TODO: Not limiting these, it's important!
+                            for entry in user_info.languages:
+                                a.li(_t=f'{entry.language} ({entry.proficiency})')
+                    # --------------------------------------------------------------------------------------------------
+
+                    # Certifications
+                    logger.info(f"Filling in certifications (8/8)")
+                    # TODO: I don't think letting LLM change certifications is a good idea.
+                    #  I guess it can be asked what certification to put into the CV.
+                    #  For now just leaving maximum of three certifications (to fit into one page).
+                    # --------------------------------------------------------------------------------------------------
+                    with a.div(klass='section'):
+                        a.h2(klass='section-title', _t='Certifications and Courses')
+                        with a.ul():
+                            for entry in user_info.certifications[:3]:
+                                a.li(_t=f'{entry.name} - {entry.date}')
+                    # --------------------------------------------------------------------------------------------------
+        # --------------------------------------------------------------------------------------------------------------
+
+    return str(a)
+
+
+class CVTemplate:
+    def __init__(self, user_info: UserInfo):
+        """
+        CV html with everything that doesn't depend on the job rendered once:
+        CSS, name, education, contact info, languages and certifications.
+        Only LLM tailored sections are rendered per CV and spliced in
+
+        :param user_info: User info from config, build a new template when it changes
+        """
+        # Static html between the sections, and section keyword with its indent level, in document order
+        self.fragments: list[str] = []
+        self.sections: list[tuple[str, int]] = []
+
+        markers = {placeholder(keyword): keyword for keyword in SECTION_SCHEMAS}
+        static_lines = []
+        for line in build_cv_html(user_info).split('\n'):
+            keyword = markers.get(line.strip())
+            if keyword is None:
+                static_lines.append(line)
+                continue
+            self.fragments.append('\n'.join(static_lines))
+            self.sections.append((keyword, (len(line) - len(line.lstrip())) // len(BASE_INDENT)))
+            static_lines = []
+        self.fragments.append('\n'.join(static_lines))
+
+    def render(self, sections: dict) -> str:
+        """
+        :param sections: LLM tailored sections, see cv_sections.SECTION_SCHEMAS
+        :return: CV's html, same as build_cv_html would make
+        """
+        parts = [self.fragments[0]]
+        for (keyword, level), fragment in zip(self.sections, self.fragments[1:]):
+            a = Airium(base_indent=BASE_INDENT, current_level=level)
+            write_section(a, keyword, sections)
+            parts.append(str(a))
+            parts.append(fragment)
+        # Sections next to each other have nothing in between
+        return '\n'.join(part for part in parts if part)
@@ -0,0 +1,82 @@
+import logging
+import time
+from custom_exceptions import DeadlineExceededException, CustomExceptionData
+
+logger = logging.getLogger("Deadline")
+
+
+class Deadline:
+    def __init__(self, budget_sec: float):
+        """
+        Time budget of a single job application, shared by every step of it
+
+        Steps (LLM calls, browser waits, CV generation) take their timeouts out of what's left,
+        so one slow LLM reply or a hung page can't hold the application for longer than the budget
+
+        :param budget_sec: Seconds the whole application may take
+        """
+        self.budget_sec = budget_sec
+        self.start = time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def remaining(self) -> float:
+        return self.budget_sec - self.elapsed()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.
+
+    def exceeded(self, step: str) -> DeadlineExceededException:
+        """
+        :param step: What was running when the budget ran out, for logs
+        :return: Exception to raise
+        """
+        exception_data = CustomExceptionData(reason=f"Deadline exceeded at {step}: "
+                                                    f"{self.elapsed():.1f} of {self.budget_sec:g} sec spent!")
+        return DeadlineExceededException(exception_data.reason, exception_data)
+
+    def check(self, step: str) -> None:
+        """
+        Raise DeadlineExceededException if the budget ran out
+
+        :param step: Step that is about to start
+        """
+        if self.expired():
+            raise self.exceeded(step)
+
+    def timeout(self, step: str, step_timeout_sec: float | None = None) -> float:
+        """
+        Timeout for the next step, raises DeadlineExceededException if the budget ran out already
+
+        :param step: Step that is about to start
+        :param step_timeout_sec: Step's own timeout, whatever is left of the budget if None
+        :return: Step's own timeout or what's left of the budget, whichever is shorter
+        """
+        self.check(step)
+        remaining = self.remaining()
+        if step_timeout_sec is None or remaining < step_timeout_sec:
+            logger.debug(f"{step} is limited by the deadline to {remaining:.1f} sec")
+            return remaining
+        return step_timeout_sec
+
+
+def step_timeout(deadline: Deadline | None, step: str, step_timeout_sec: float) -> float:
+    """
+    :param deadline: Deadline of the application, None if there's none
+    :param step: Step that is about to start
+    :param step_timeout_sec: Step's own timeout
+    :return: Step's timeout, shortened to what's left of the deadline
+    """
+    return deadline.timeout(step, step_timeout_sec) if deadline is not None else step_timeout_sec
+
+
+def check_deadline(deadline: Deadline | None, step: str) -> None:
+    """
+    Raise DeadlineExceededException if there's a deadline and it ran out
+
+    :param deadline: Deadline of the application, None if there's none
+    :param step: Step that is about to start
+    """
+    if deadline is not None:
+        deadline.check(step)
@@ -0,0 +1,117 @@
+import hashlib
+import string
+import threading
+from collections import OrderedDict
+import numpy as np
+from langchain_core.example_selectors import BaseExampleSelector
+from text_vectorizer import CharNgramVectorizer, smooth_idf
+from utils import estimate_tokens
+
+
+class SimilarExampleSelector(BaseExampleSelector):
+    def __init__(self, examples: list[dict], query_template: str, top_k: int = 3, token_budget: int = 600,
+                 cache_size: int = 1024, n_features: int = 512):
+        """
+        Few-shot examples most similar to the current question, instead of every example on every call
+
+        Example inputs are TF-IDF vectors of hashed character n-grams, built once into a single matrix,
+        so selection is one matrix-vector product. Selections are cached per question fingerprint
+
+        :param examples: Examples, {"input": user message, "output": AI message}
+        :param query_template: Part of the user message template with per-call variables, e.g. "Question: {question}",
+                               it's filled in with the prompt variables and compared to example inputs
+        :param top_k: Max amount of examples
+        :param token_budget: Max estimated tokens of all selected examples, inputs and outputs
+        :param cache_size: Max amount of cached selections
+        :param n_features: Vector size of the hashed features
+        """  # noqa
+        self.examples = examples
+        self.query_template = query_template
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.cache_size = cache_size
+        self.vectorizer = CharNgramVectorizer(n_features=n_features)
+
+        self.hits = 0
+        self.misses = 0
+
+        self.__lock = threading.Lock()
+        # Question fingerprint -> indices of selected examples
+        self.__selections: OrderedDict[str, list[int]] = OrderedDict()
+        # Only the variables of the query template are compared, the resume would just add noise
+        self.__query_variables = [v for _, v, _, _ in string.Formatter().parse(query_template) if v]
+
+        self.__tokens = [estimate_tokens(e["input"]) + estimate_tokens(e["output"]) for e in examples]
+        self.__build_index()
+
+    def __build_index(self) -> None:
+        features = [self.vectorizer.feature_counts(e["input"]) for e in self.examples]
+
+        document_frequency = np.zeros(self.vectorizer.n_features, dtype=np.float32)
+        for indices, _ in features:
+            document_frequency[indices] += 1.
+        self.__idf = smooth_idf(document_frequency, len(features))
+
+        self.__matrix = np.zeros((len(features), self.vectorizer.n_features), dtype=np.float32)
+        for row, (indices, values) in enumerate(features):
+            self.__matrix[row] = self.vectorizer.dense(indices, values, self.__idf)
+
+    def query(self, input_variables: dict) -> str:
+        """
+        :param input_variables: Prompt variables
+        :return: Text compared to example inputs
+        """
+        return "\n".join(str(input_variables.get(v, "")) for v in self.__query_variables)
+
+    @staticmethod
+    def fingerprint(query: str) -> str:
+        return hashlib.sha256(" ".join(query.casefold().split()).encode("UTF-8")).hexdigest()[:16]
+
+    def __select(self, query: str) -> list[int]:
+        """
+        :return: Indices of the most similar examples that fit into the budget, most similar first
+        """
+        if not self.examples or self.top_k <= 0:
+            return []
+
+        scores = self.__matrix @ self.vectorizer.transform(query, self.__idf)
+        selected = []
+        tokens = 0
+        # Examples that don't fit are skipped, a shorter less similar one may still fit
+        for row in np.argsort(-scores, kind="stable"):
+            if tokens + self.__tokens[row] > self.token_budget:
+                continue
+            selected.append(int(row))
+            tokens += self.__tokens[row]
+            if len(selected) == self.top_k:
+                break
+        return selected
+
+    def select_examples(self, input_variables: dict) -> list[dict]:
+        query = self.query(input_variables)
+        key = self.fingerprint(query)
+
+        with self.__lock:
+            selected = self.__selections.get(key)
+            if selected is not None:
+                self.__selections.move_to_end(key)
+                self.hits += 1
+                return [self.examples[i] for i in selected]
+
+        selected = self.__select(query)
+
+        with self.__lock:
+            self.misses += 1
+            self.__selections[key] = selected
+            if len(self.__selections) > self.cache_size:
+                self.__selections.popitem(last=False)
+
+        return [self.examples[i] for i in selected]
+
+    def add_example(self, example: dict) -> None:
+        with self.__lock:
+            self.examples.append(example)
+            self.__tokens.append(estimate_tokens(example["input"]) + estimate_tokens(example["output"]))
+            self.__build_index()
+            # Old selections could miss the new example
+            self.__selections.clear()
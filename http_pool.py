@@ -0,0 +1,93 @@
+import importlib.util
+import logging
+import threading
+import time
+import httpx
+import openai
+from custom_types import HttpPoolSettings
+
+logger = logging.getLogger("HttpPool")
+
+
+def make_http_clients(settings: HttpPoolSettings,
+                      max_connections: int | None = None) -> tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Keep-alive connection pools for chat wrappers, one for sync and one for async calls
+
+    Every wrapper given the same clients shares their connections, so DNS, TCP and TLS setup
+    is paid once per connection, not once per wrapper
+
+    :param settings: Pool settings from llm_settings.yaml
+    :param max_connections: Pool size instead of the one from settings, for tier pools
+    :return: Sync and async httpx clients, with openai's default timeouts
+    """
+    if max_connections is not None:
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=max_connections,
+                              keepalive_expiry=settings.keepalive_expiry_sec)
+    else:
+        limits = httpx.Limits(max_connections=settings.max_connections,
+                              max_keepalive_connections=settings.max_keepalive_connections,
+                              keepalive_expiry=settings.keepalive_expiry_sec)
+
+    http2 = settings.http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 needs the h2 package (pip install httpx[http2]), using HTTP/1.1")
+        http2 = False
+
+    return (openai.DefaultHttpxClient(limits=limits, http2=http2),
+            openai.DefaultAsyncHttpxClient(limits=limits, http2=http2))
+
+
+class ConnectionWarmUp:
+    def __init__(self, wrappers: list, timeout_sec: float = 10.):
+        """
+        Opens a connection to every provider in background threads, so the first LLM call doesn't pay for
+        DNS, TCP and TLS setup. Connections stay in the sync pools of the wrappers
+
+        Async pools are not warmed up, their connections belong to the event loop that opened them
+
+        :param wrappers: Chat wrappers, the ones without warm_up are skipped
+        :param timeout_sec: Max time per provider
+        """  # noqa
+        self.wrappers = [w for w in wrappers if hasattr(w, "warm_up")]
+        self.timeout_sec = timeout_sec
+
+        # Provider name -> seconds it took, failed providers are not there
+        self.warmed_up: dict[str, float] = {}
+
+        self.__lock = threading.Lock()
+        self.__threads: list[threading.Thread] = []
+
+    def __warm_up(self, wrapper) -> None:
+        start = time.perf_counter()
+        try:
+            wrapper.warm_up(self.timeout_sec)
+        # Nothing is lost, the first call will just open the connection itself
+        except Exception as ex:  # noqa
+            logger.warning(f"Could not warm up connection to {wrapper.name}: {ex}")
+            return
+
+        elapsed = time.perf_counter() - start
+        with self.__lock:
+            self.warmed_up[wrapper.name] = elapsed
+        logger.info(f"Connection to {wrapper.name} warmed up in {elapsed * 1000:.0f} ms")
+
+    def start(self) -> "ConnectionWarmUp":
+        for wrapper in self.wrappers:
+            # Daemon, a provider that hangs shouldn't keep the bot from exiting
+            thread = threading.Thread(target=self.__warm_up, args=(wrapper,), name=f"WarmUp-{wrapper.name}",
+                                      daemon=True)
+            thread.start()
+            self.__threads.append(thread)
+        return self
+
+    def join(self, timeout_sec: float | None = None) -> bool:
+        """
+        :param timeout_sec: Max time to wait for all providers, no limit if None
+        :return: Whether warm up is done for every provider, successfully or not
+        """
+        deadline = time.monotonic() + timeout_sec if timeout_sec is not None else None
+        for thread in self.__threads:
+            thread.join(None if deadline is None else max(0., deadline - time.monotonic()))
+        return not any(t.is_alive() for t in self.__threads)
@@ -0,0 +1,256 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+import numpy as np
+from custom_types import Job
+
+logger = logging.getLogger("JobIndex")
+
+# Bump when shingling or hashing changes, signatures of old entries won't be comparable anymore
+INDEX_SCHEMA_VERSION = 1
+
+# Jobs with fewer shingles than that are neither looked up nor stored,
+# with a description that short (or none at all) the title alone would decide it
+MIN_SHINGLES = 20
+
+WORD_PATTERN = re.compile(r"\w+(?:[.+#]\w*)*")
+# Universal hashing modulo Mersenne prime, as in the MinHash paper, hashes are cut down to 32 bits afterwards
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class JobIndex:
+    def __init__(self, db_path: str, similarity_threshold: float, title_similarity_threshold: float,
+                 ttl_sec: int, max_entries: int, num_perm: int = 128, bands: int = 32, shingle_size: int = 3):
+        """
+        On-disk index of jobs a CV was generated for, to find reposts of the same job (other city, other agency)
+        and reuse their CV, SQLite backed
+
+        Jobs are sets of word shingles of title and description, compared by MinHash signatures.
+        Signatures are split into bands, jobs sharing at least one band are candidates (LSH),
+        so lookup doesn't go over the whole index. Candidate is a duplicate if estimated Jaccard similarity
+        of the shingles and Jaccard similarity of title words are both above thresholds
+
+        Title check guards against the most common false positive: same company boilerplate with a different
+        role in it, "Junior Python Developer" vs "Senior Data Engineer" share most of the description
+
+        Entries expire after ttl_sec, least recently used entries are evicted above max_entries,
+        and entries whose CV file is gone are dropped when found
+
+        :param db_path: Path to the SQLite database file, created if needed
+        :param similarity_threshold: Minimum estimated Jaccard similarity of title and description shingles
+        :param title_similarity_threshold: Minimum Jaccard similarity of title words
+        :param ttl_sec: Time to live of an entry in seconds
+        :param max_entries: Max amount of entries to keep
+        :param num_perm: MinHash signature length
+        :param bands: LSH bands, has to divide num_perm. More bands find less similar candidates
+        :param shingle_size: Words in a shingle
+        """
+        if num_perm % bands:
+            raise ValueError(f"MinHash signature length {num_perm} is not divisible by {bands} bands")
+
+        self.similarity_threshold = similarity_threshold
+        self.title_similarity_threshold = title_similarity_threshold
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Fixed seed, signatures are stored and have to be comparable between runs
+        generator = np.random.RandomState(INDEX_SCHEMA_VERSION)
+        self.__a = generator.randint(1, int(MAX_HASH), size=num_perm, dtype=np.uint64)
+        self.__b = generator.randint(0, int(MAX_HASH), size=num_perm, dtype=np.uint64)
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        # Connection is shared between threads, guarded by the lock
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS jobs ("
+                                  "id INTEGER PRIMARY KEY, "
+                                  "grp TEXT NOT NULL, "
+                                  "title TEXT NOT NULL, "
+                                  "company TEXT NOT NULL, "
+                                  "signature BLOB NOT NULL, "
+                                  "pdf_path TEXT NOT NULL, "
+                                  "created REAL NOT NULL, "
+                                  "last_access REAL NOT NULL)")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS jobs_last_access ON jobs (last_access)")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS bands ("
+                                  "band INTEGER NOT NULL, "
+                                  "job_id INTEGER NOT NULL)")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS bands_band ON bands (band)")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS bands_job_id ON bands (job_id)")
+        self.__connection.commit()
+
+        logger.info(f"Job index opened at {db_path} ({len(self)} entries)")
+
+    @staticmethod
+    def group_key(user_info_fingerprint: str, prompt_version: str) -> str:
+        """
+        CVs are reused only between jobs with the same resume and prompts, and the same index parameters
+
+        :param user_info_fingerprint: Fingerprint of the resume
+        :param prompt_version: Fingerprint of the prompts used to tailor CV
+        :return: Group key
+        """
+        key_parts = [str(INDEX_SCHEMA_VERSION), user_info_fingerprint, prompt_version]
+        return hashlib.sha256("\x1e".join(key_parts).encode("UTF-8")).hexdigest()[:16]
+
+    @staticmethod
+    def words(text: str) -> list[str]:
+        """
+        :param text: Any text
+        :return: Casefolded words, "C++", "C#" and "Node.js" are kept whole
+        """
+        return WORD_PATTERN.findall(text.casefold())
+
+    @staticmethod
+    def title_similarity(title: str, other_title: str) -> float:
+        """
+        :return: Jaccard similarity of the titles' word sets
+        """
+        words, other_words = set(JobIndex.words(title)), set(JobIndex.words(other_title))
+        if not words or not other_words:
+            return 0.
+        return len(words & other_words) / len(words | other_words)
+
+    def shingles(self, job: Job) -> set[str]:
+        """
+        :param job: Job
+        :return: Word shingles of the title and description
+        """
+        words = self.words(f"{job.title}\n{job.desc}")
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, shingles: set[str]) -> np.ndarray:
+        """
+        :param shingles: Shingles of a job, not empty
+        :return: MinHash signature, num_perm 32-bit hashes
+        """
+        hashes = np.fromiter((zlib.crc32(s.encode("UTF-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # a, x < 2 ** 32, so a * x + b fits into uint64
+        permuted = (np.outer(hashes, self.__a) + self.__b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def __band_keys(self, signature: np.ndarray, group: str) -> list[int]:
+        """
+        :return: Hash of every band of the signature, signed 64-bit for SQLite
+        """
+        rows = self.num_perm // self.bands
+        return [int.from_bytes(hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(),
+                                               digest_size=8, person=band.to_bytes(2, "little"),
+                                               key=group.encode("UTF-8")).digest(), "little", signed=True)
+                for band in range(self.bands)]
+
+    def __remove(self, job_ids: list[int]) -> None:
+        """
+        Remove jobs and their bands, without committing
+        """
+        placeholders = ", ".join("?" * len(job_ids))
+        self.__connection.execute(f"DELETE FROM jobs WHERE id IN ({placeholders})", job_ids)
+        self.__connection.execute(f"DELETE FROM bands WHERE job_id IN ({placeholders})", job_ids)
+
+    def lookup(self, job: Job, group: str) -> tuple[str, str, float] | None:
+        """
+        Find the most similar indexed job in the group
+
+        :param job: Job to tailor CV to
+        :param group: Group key from group_key
+        :return: CV file of the similar job, its title and estimated similarity, None if nothing is similar enough
+        """
+        shingles = self.shingles(job)
+        if len(shingles) < MIN_SHINGLES:
+            return None
+
+        signature = self.signature(shingles)
+        band_keys = self.__band_keys(signature, group)
+        now = time.time()
+
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT id, title, signature, pdf_path, created FROM jobs WHERE id IN ("
+                f"SELECT job_id FROM bands WHERE band IN ({', '.join('?' * len(band_keys))})) AND grp = ?",
+                (*band_keys, group)).fetchall()
+
+            best = None
+            stale = []
+            for job_id, title, candidate_signature, pdf_path, created in rows:
+                if created + self.ttl_sec < now or not os.path.exists(pdf_path):
+                    stale.append(job_id)
+                    continue
+                similarity = float(np.mean(np.frombuffer(candidate_signature, dtype=np.uint32) == signature))
+                if (similarity >= self.similarity_threshold
+                        and self.title_similarity(job.title, title) >= self.title_similarity_threshold
+                        and (best is None or similarity > best[3])):
+                    best = (job_id, pdf_path, title, similarity)
+
+            if stale:
+                self.__remove(stale)
+                self.evictions += len(stale)
+
+            if best is None:
+                self.misses += 1
+                self.__connection.commit()
+                return None
+
+            self.__connection.execute("UPDATE jobs SET last_access = ? WHERE id = ?", (now, best[0]))
+            self.__connection.commit()
+            self.hits += 1
+            return best[1], best[2], best[3]
+
+    def add(self, job: Job, group: str, pdf_path: str) -> None:
+        """
+        Index the job, CV of which is in pdf_path, and evict expired and least recently used entries
+
+        :param job: Job the CV was tailored to
+        :param group: Group key from group_key
+        :param pdf_path: Absolute path to the CV's pdf file
+        """
+        shingles = self.shingles(job)
+        if len(shingles) < MIN_SHINGLES:
+            return
+
+        signature = self.signature(shingles)
+        band_keys = self.__band_keys(signature, group)
+        now = time.time()
+
+        with self.__lock:
+            job_id = self.__connection.execute(
+                "INSERT INTO jobs (grp, title, company, signature, pdf_path, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (group, job.title, job.company, signature.tobytes(), pdf_path, now, now)).lastrowid
+            self.__connection.executemany("INSERT INTO bands (band, job_id) VALUES (?, ?)",
+                                          [(band_key, job_id) for band_key in band_keys])
+
+            evicted = self.__connection.execute(
+                "DELETE FROM jobs WHERE created < ? OR id IN ("
+                "SELECT id FROM jobs ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (now - self.ttl_sec, self.max_entries)).rowcount
+            if evicted:
+                self.__connection.execute("DELETE FROM bands WHERE job_id NOT IN (SELECT id FROM jobs)")
+                self.evictions += evicted
+            self.__connection.commit()
+
+    def stats(self) -> str:
+        """
+        :return: Human-readable hit/miss stats
+        """
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.
+        return (f"hits: {self.hits}, misses: {self.misses}, hit rate: {hit_rate:.0%}, "
+                f"evictions: {self.evictions}, entries: {len(self)}")
+
+    def __len__(self):
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
@@ -6,11 +6,14 @@ from cv_manager import CVManager
 from llm_client import LLMClient
 from utils import wait_extra
 from log_writer import LogWriter
+from llm_telemetry import LLMTelemetry
+from rule_engine import AnswerRuleEngine
+from deadline import Deadline
 
 from custom_types import *
 
 from custom_exceptions import (BrowserClientException, CustomExceptionData,
-                               BotClientException, LLMException, CVManagerException)
+                               BotClientException, LLMException, CVManagerException, DeadlineExceededException)
 
 logger = logging.getLogger("LinkedInClient")
 
@@ -18,6 +21,9 @@ NEXT_SEARCH_PAGE_DELAY = (30., 40.)
 NEXT_SEARCH_DELAY = (50., 60.)
 NEXT_JOB_APPLICATION_DELAY = (6., 8.)
 
+# Whole application from opening the job to submitting the form, human-like delays included
+APPLICATION_DEADLINE_SEC = 600.
+
 
 class LinkedInClient:
     def __init__(self):
@@ -27,11 +33,15 @@ class LinkedInClient:
         Think of this as a human that uses tools to apply
         """
 
-        self.browser_client = BrowserClient()
         self.config = ConfigManager()
+        # Before the browser, LLM client warms up provider connections in the background while Chrome is launching
         self.llm_client = LLMClient()
+        self.browser_client = BrowserClient()
         self.custom_logger = LogWriter()
         self.cv_manager = CVManager()
+        self.telemetry = LLMTelemetry()
+        # Compiled once, rules can't change during the run
+        self.answer_rules = AnswerRuleEngine(self.config.answer_rules.rules if self.config.answer_rules.enabled else [])
 
         self.exception_data = CustomExceptionData()
 
@@ -39,40 +49,23 @@ class LinkedInClient:
 
     def __try_no_llm_answer(self, field_type: FieldTypeEnum,
                             field_label: str,
-                            field_options: list[str] | None) -> str:
+                            field_options: list[str] | None,
+                            count: bool = True) -> str:
         """
-        Function with simple filters to try and answer simple questions without the llm involved
+        Try and answer standard questions straight from user info, with rules from answer_rules.yaml
 
         :param field_type: Field type
         :param field_label: The question
         :param field_options: Options (optional)
+        :param count: Count the answer as an avoided LLM call, False when just checking if the field is answerable
         :return: Answer if any
         """
-        answer = ""
-
-        if field_type == FieldTypeEnum.INPUT:
-            if field_label == "First name":
-                answer = self.config.user_info.personal.name
-            elif field_label == "Last name":
-                answer = self.config.user_info.personal.surname
-            elif field_label == "Mobile phone number":
-                answer = self.config.user_info.personal.phone_prefix + self.config.user_info.personal.phone
-            elif field_label == "LinkedIn Profile":
-                answer = self.config.user_info.personal.linkedin
-
-        elif field_type == FieldTypeEnum.LIST:
-            if field_label == "Phone country code":
-                answer = next((a for a in field_options if self.config.user_info.personal.phone_prefix in a), "")
-            elif field_label == "Email address":
-                answer = next((a for a in field_options if self.config.user_info.personal.email == a), "")
-
-        elif field_type == FieldTypeEnum.CHECKBOX:
-            # Auto agree on terms and conditions checkbox with these keywords
-            if ("terms" in field_options[0].lower()) and ("conditions" in field_options[0].lower()):
-                answer = field_options[0]
-            # Auto agree on any privacy policies checkbox with these keywords
-            elif ("privacy" in field_options[0].lower()) and ("policy" in field_options[0].lower()):
-                answer = field_options[0]
+        answer = self.answer_rules.answer(field_type, field_label, field_options,
+                                          self.config.user_info, self.config.skill_index, count=count)
+
+        if answer and count:
+            self.telemetry.record_cache_hit("answer_freely" if field_type == FieldTypeEnum.INPUT
+                                            else "answer_with_options", "rules")
 
         return answer
 
@@ -134,75 +127,135 @@ class LinkedInClient:
     #     form_element = self.browser_client.get_easy_apply_form()
     #     self.__apply_to_job(form_element, Job())
 
-    def __apply_to_job(self, easy_apply_form, resume_path):
-        for form_field in self.browser_client.get_form_fields(easy_apply_form):
-            if form_field is None:
-                break
-
-            # TODO: I have a feeling this monstrosity can be refactored to something more readable
-            match form_field.type:
-                case FieldTypeEnum.LIST:
-                    answer = self.__try_no_llm_answer(form_field.type, form_field.label, form_field.data)
-                    if answer:
-                        logger.info("Saved a cent!\n"
-                                    f"The question: {form_field.label}\n"
-                                    f"Local answer: {answer}")
-                    else:
-                        answer = self.llm_client.answer_with_options(form_field.label, form_field.data)
-
-                    self.browser_client.set_dropdown_field(form_field.element, answer)
-
-                case FieldTypeEnum.RADIO:
-                    answer = self.llm_client.answer_with_options(form_field.label, form_field.data)
-
-                    self.browser_client.set_radio_field(form_field.element, answer)
-
-                case FieldTypeEnum.INPUT:
-                    answer = self.__try_no_llm_answer(form_field.type, form_field.label, form_field.data)
-                    if answer:
-                        logger.info("Saved a cent!\n"
-                                    f"The question: {form_field.label}\n"
-                                    f"Local answer: {answer}")
-                    else:
-                        answer = self.llm_client.answer_freely(form_field.label)
+    def __prefetch_page_answers(self, page_fields: list[Field], deadline: Deadline) -> list[str | None]:
+        """
+        Answer every question on the form page that needs the LLM with a single call
 
-                    self.browser_client.set_input_field(form_field.element, answer)
+        :param page_fields: All fields of the current form page
+        :param deadline: Deadline of the application
+        :return: LLM answers in the same order as fields, None where field should be answered on its own
+        """
+        llm_answers = [None] * len(page_fields)
 
-                    # In a text input field a suggestions list can appear, check every time
-                    (suggestions_element,
-                     suggestions_options) = self.browser_client.is_suggestions_list_appeared()
+        if not self.config.llm_settings.batch_answers.enabled:
+            return llm_answers
 
-                    if suggestions_element is not None:
-                        answer = self.llm_client.answer_with_options(form_field.label, suggestions_options)
+        llm_field_ids = []
+        for i, form_field in enumerate(page_fields):
+            match form_field.type:
+                case FieldTypeEnum.LIST | FieldTypeEnum.INPUT | FieldTypeEnum.RADIO:
+                    if not self.__try_no_llm_answer(form_field.type, form_field.label, form_field.data, count=False):
+                        llm_field_ids.append(i)
 
-                        self.browser_client.set_suggestions_list(suggestions_element, answer)
+        if len(llm_field_ids) < self.config.llm_settings.batch_answers.min_fields:
+            return llm_answers
 
-                case FieldTypeEnum.UPLOAD_CV:
-                    self.browser_client.upload_file(form_field.element, resume_path)
+        batch_answers = self.llm_client.answer_batch([page_fields[i] for i in llm_field_ids], deadline)
+        for i, answer in zip(llm_field_ids, batch_answers):
+            llm_answers[i] = answer
 
-                case FieldTypeEnum.UPLOAD_COVER:
-                    self.exception_data.reason = "Cover letter upload not implemented yet!"
-                    raise BotClientException(self.exception_data.reason, self.exception_data)
+        return llm_answers
 
-                case FieldTypeEnum.CARDS:
-                    logger.info("Cards page, skipping")
+    def __fill_form_field(self, form_field: Field, resume_path: str, deadline: Deadline,
+                          llm_answer: str | None = None) -> None:
+        """
+        Answer and fill in single form field
 
-                case FieldTypeEnum.CHECKBOX:
-                    # TODO: Checkboxes are weird, should I compare answer to label, and then set it?
-                    answer = self.__try_no_llm_answer(form_field.type, form_field.label, form_field.data)
-                    if answer:
-                        logger.info("Saved a cent!\n"
-                                    f"The question: {form_field.label}\n"
-                                    f"Local answer: {answer}")
-                    else:
-                        self.llm_client.answer_with_options(form_field.label, form_field.data)
+        :param form_field: Form field to fill in
+        :param resume_path: Resume to upload, if that's an upload field
+        :param deadline: Deadline of the application
+        :param llm_answer: Already known LLM answer for the field (if any)
+        """
+        # TODO: I have a feeling this monstrosity can be refactored to something more readable
+        match form_field.type:
+            case FieldTypeEnum.LIST:
+                answer = self.__try_no_llm_answer(form_field.type, form_field.label, form_field.data)
+                if answer:
+                    logger.info("Saved a cent!\n"
+                                f"The question: {form_field.label}\n"
+                                f"Local answer: {answer}")
+                elif llm_answer is not None:
+                    answer = llm_answer
+                else:
+                    answer = self.llm_client.answer_with_options(form_field.label, form_field.data, deadline,
+                                                                 form_field.type)
+
+                self.browser_client.set_dropdown_field(form_field.element, answer, deadline)
+
+            case FieldTypeEnum.RADIO:
+                answer = self.__try_no_llm_answer(form_field.type, form_field.label, form_field.data)
+                if answer:
+                    logger.info("Saved a cent!\n"
+                                f"The question: {form_field.label}\n"
+                                f"Local answer: {answer}")
+                elif llm_answer is not None:
+                    answer = llm_answer
+                else:
+                    answer = self.llm_client.answer_with_options(form_field.label, form_field.data, deadline,
+                                                                 form_field.type)
+
+                self.browser_client.set_radio_field(form_field.element, answer, deadline)
+
+            case FieldTypeEnum.INPUT:
+                answer = self.__try_no_llm_answer(form_field.type, form_field.label, form_field.data)
+                if answer:
+                    logger.info("Saved a cent!\n"
+                                f"The question: {form_field.label}\n"
+                                f"Local answer: {answer}")
+                elif llm_answer is not None:
+                    answer = llm_answer
+                else:
+                    answer = self.llm_client.answer_freely(form_field.label, deadline)
+
+                self.browser_client.set_input_field(form_field.element, answer, deadline)
+
+                # In a text input field a suggestions list can appear, check every time
+                (suggestions_element,
+                 suggestions_options) = self.browser_client.is_suggestions_list_appeared(deadline)
+
+                if suggestions_element is not None:
+                    answer = self.llm_client.answer_with_options(form_field.label, suggestions_options, deadline,
+                                                                 form_field.type)
+
+                    self.browser_client.set_suggestions_list(suggestions_element, answer, deadline)
+
+            case FieldTypeEnum.UPLOAD_CV:
+                self.browser_client.upload_file(form_field.element, resume_path, deadline)
+
+            case FieldTypeEnum.UPLOAD_COVER:
+                self.exception_data.reason = "Cover letter upload not implemented yet!"
+                raise BotClientException(self.exception_data.reason, self.exception_data)
+
+            case FieldTypeEnum.CARDS:
+                logger.info("Cards page, skipping")
+
+            case FieldTypeEnum.CHECKBOX:
+                # TODO: Checkboxes are weird, should I compare answer to label, and then set it?
+                answer = self.__try_no_llm_answer(form_field.type, form_field.label, form_field.data)
+                if answer:
+                    logger.info("Saved a cent!\n"
+                                f"The question: {form_field.label}\n"
+                                f"Local answer: {answer}")
+                else:
+                    self.llm_client.answer_with_options(form_field.label, form_field.data, deadline, form_field.type)
+
+                self.browser_client.set_checkbox_field(form_field.element, deadline)
+
+            case _:
+                self.exception_data.reason = (f"LinkedIn client got field type it doesn't recognize "
+                                              f"({form_field.type})")
+                raise BotClientException(self.exception_data.reason, self.exception_data)
+
+    def __apply_to_job(self, easy_apply_form, resume_path, deadline: Deadline):
+        for page_fields in self.browser_client.get_form_pages(easy_apply_form, deadline):
+            if page_fields is None:
+                break
 
-                    self.browser_client.set_checkbox_field(form_field.element)
+            # One LLM call for the whole page instead of one per field (if enabled)
+            llm_answers = self.__prefetch_page_answers(page_fields, deadline)
 
-                case _:
-                    self.exception_data.reason = (f"LinkedIn client got field type it doesn't recognize "
-                                                  f"({form_field.type})")
-                    raise BotClientException(self.exception_data.reason, self.exception_data)
+            for form_field, llm_answer in zip(page_fields, llm_answers):
+                self.__fill_form_field(form_field, resume_path, deadline, llm_answer)
 
     def start(self) -> None:
         self.browser_client.initialize()
@@ -234,11 +287,16 @@ class LinkedInClient:
                             self.exception_data.job_title = current_job.title
                             self.exception_data.job_link = current_job.link
 
-                            self.browser_client.get_job_description_and_hiring_team(current_job)
+                            # Every LLM call from here on is counted to this application
+                            self.telemetry.begin_application(current_job)
+                            # And every step takes its time out of this budget
+                            deadline = Deadline(APPLICATION_DEADLINE_SEC)
+
+                            self.browser_client.get_job_description_and_hiring_team(current_job, deadline)
 
-                            form_element = self.browser_client.get_easy_apply_form()
+                            form_element = self.browser_client.get_easy_apply_form(deadline)
 
-                            resume_path = self.cv_manager.generate_cv_pdf(self.llm_client, current_job)
+                            resume_path = self.cv_manager.generate_cv_pdf(self.llm_client, current_job, deadline)
 
                             # TODO: Should I leave local resume here?
                             # resume_path = self.__get_local_resume_path_by_title(job_object)
@@ -246,22 +304,36 @@ class LinkedInClient:
                             #     self.exception_data.reason = "Resume generation not implemented yet!"
                             #     raise BotClientException(self.exception_data.reason, self.exception_data)
 
-                            self.__apply_to_job(form_element, resume_path)
+                            self.__apply_to_job(form_element, resume_path, deadline)
 
-                            self.browser_client.finalize_easy_apply()
+                            self.browser_client.finalize_easy_apply(deadline)
 
                             self.custom_logger.log_success(current_job, f"file:///{resume_path}")
+                            self.telemetry.end_application("success")
 
                             wait_extra(extra_range_sec=NEXT_JOB_APPLICATION_DELAY)
 
                         except (BrowserClientException, BotClientException) as ex:
                             self.custom_logger.log_error(ex.data)
+                            self.telemetry.end_application("failed")
                             logger.error("Easy Apply failed!\n"
                                          f"{ex.data}")
                             # If bail out fails - everything fails and bot dies :)
                             self.browser_client.bail_out()
                             continue
 
+                        except DeadlineExceededException as ex:
+                            ex.data.job_title = current_job.title
+                            ex.data.job_link = current_job.link
+
+                            self.custom_logger.log_error(ex.data)
+                            self.telemetry.end_application("deadline_exceeded")
+                            logger.error("Easy Apply took too long, moving on!\n"
+                                         f"{ex.data}")
+                            # If bail out fails - everything fails and bot dies :)
+                            self.browser_client.bail_out()
+                            continue
+
                         except (LLMException, CVManagerException) as ex:
                             # LLM exception can only be raised when answering form fields,
                             # and CV exception is thrown when we already opened the apply form,
@@ -270,6 +342,7 @@ class LinkedInClient:
                             ex.data.job_link = current_job.link
 
                             self.custom_logger.log_error(ex.data)
+                            self.telemetry.end_application("failed")
                             logger.error("Easy Apply failed!\n"
                                          f"{ex.data}")
                             # If bail out fails - everything fails and bot dies :)
@@ -282,6 +355,11 @@ class LinkedInClient:
                     logger.info("Advancing to page {}".format(self.current_page + 1))
 
                 self.current_page = 0
+                logger.info(self.answer_rules.stats())
+                if self.llm_client.model_tiers is not None:
+                    logger.info(self.llm_client.model_tiers.stats())
+                if self.cv_manager.job_index is not None:
+                    logger.info(f"Job index {self.cv_manager.job_index.stats()}")
                 wait_extra(extra_range_sec=NEXT_SEARCH_DELAY)
                 logger.info("Advancing to next search")
         else:
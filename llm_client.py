@@ -1,153 +1,432 @@
 from langchain_openai import ChatOpenAI
 from langchain_deepseek import ChatDeepSeek
 from langchain_community.callbacks import get_openai_callback
-from langchain_core.prompts import ChatPromptTemplate, FewShotChatMessagePromptTemplate
+from langchain_community.callbacks.openai_info import (MODEL_COST_PER_1K_TOKENS, TokenType, standardize_model_name,
+                                                       get_openai_token_cost_for_model)
+from langchain_core.prompts import ChatPromptTemplate
 from config_manager import ConfigManager
-from langchain_core.messages import AIMessage
+import asyncio
+import contextvars
+import openai
+import json
 import logging
-from html.parser import HTMLParser
-from custom_exceptions import LLMException, CustomExceptionData
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, aclosing
+from custom_exceptions import LLMException, CustomExceptionData, DeadlineExceededException
 from custom_types import *
+from answer_cache import AnswerCache
+from semantic_cache import SemanticAnswerCache
+from prompt_registry import PromptRegistry
+from resume_retriever import ResumeRetriever
+from tag_extractor import AnswerTagExtractor, extract_answer_tag
+from provider_router import ProviderRouter
+from rate_limiter import RateLimiter
+from option_resolver import format_options, resolve_option, NUMBERED_OPTIONS_HINT
+from cassette import CassetteChatWrapper, RECORD
+from llm_telemetry import (LLMTelemetry, LLMCallRecord,
+                           OUTCOME_ANSWER, OUTCOME_NO_DATA, OUTCOME_TIMEOUT, OUTCOME_ERROR)
+from deadline import Deadline, check_deadline, step_timeout
+from model_tiers import ModelTierRouter, DEFAULT_TIER
+from http_pool import make_http_clients, ConnectionWarmUp
+from utils import estimate_tokens
 
 logger = logging.getLogger("LLMClient")
 
 
 class ChatOpenAIWrapper:
-    def __init__(self):
+    def __init__(self, model: str = "gpt-4o-2024-08-06", base_url: str | None = None, api_key: str | None = None,
+                 name: str = "OpenAI", rate_limiter: RateLimiter | None = None, temperature: float = 0.32,
+                 http_client=None, http_async_client=None):
         """
         Langchain's ChatOpenAI class with some additional functionality  
+
+        :param model: Model name
+        :param base_url: Any OpenAI-compatible API, OpenAI itself if None
+        :param api_key: API key, the one from secrets.yaml if None
+        :param name: Provider name for logs and stats
+        :param rate_limiter: Limits and retries of the provider, retries with default backoff if None
+        :param temperature: Sampling temperature
+        :param http_client: httpx client (connection pool) for sync calls, langchain's default if None
+        :param http_async_client: httpx client (connection pool) for async calls, langchain's default if None
         """  # noqa
 
-        self.config = ConfigManager()
-        self.llm_chat = ChatOpenAI(model="gpt-4o-2024-08-06",
-                                   openai_api_key=self.config.openai_api_key,
-                                   temperature=0.32)
+        self.name = name
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(name)
+        # Retries are done by the rate limiter, so they are shared with other calls and respect Retry-After
+        self.llm_chat = ChatOpenAI(model=model,
+                                   base_url=base_url,
+                                   openai_api_key=api_key if api_key is not None else ConfigManager().openai_api_key,
+                                   temperature=temperature,
+                                   max_retries=0,
+                                   http_client=http_client,
+                                   http_async_client=http_async_client,
+                                   # Usage (with cached prompt tokens) in the last chunk, if the stream gets there
+                                   stream_usage=True)
 
     def invoke(self, messages):
-        logger.info("Calling OpenAI")
-        return self.llm_chat.invoke(messages)
+        logger.info(f"Calling {self.name}")
+        return self.rate_limiter.call(self.llm_chat.invoke, messages)
+
+    async def ainvoke(self, messages):
+        logger.info(f"Calling {self.name} (async)")
+        return await self.rate_limiter.acall(self.llm_chat.ainvoke, messages)
+
+    def stream(self, messages):
+        logger.info(f"Calling {self.name} (streaming)")
+        return self.rate_limiter.stream(self.llm_chat.stream, messages)
+
+    def astream(self, messages):
+        logger.info(f"Calling {self.name} (async streaming)")
+        return self.rate_limiter.astream(self.llm_chat.astream, messages)
+
+    def warm_up(self, timeout_sec: float = 10.) -> None:
+        """
+        Open a keep-alive connection to the provider, any response will do, an error one included
+
+        :param timeout_sec: Max time for the request
+        """
+        try:
+            self.llm_chat.root_client.with_options(timeout=timeout_sec, max_retries=0).models.list()
+        except openai.APIStatusError:
+            pass
 
     def __call__(self, messages):
         return self.invoke(messages)
 
 
 class ChatDeepSeekWrapper:
-    def __init__(self):
+    def __init__(self, model: str = "deepseek-chat", base_url: str | None = None, api_key: str | None = None,
+                 name: str = "DeepSeek", rate_limiter: RateLimiter | None = None, temperature: float = 0.32,
+                 http_client=None, http_async_client=None):
         """
         Langchain's ChatDeepSeek class with some additional functionality  
+
+        :param model: Model name
+        :param base_url: Any DeepSeek-compatible API, DeepSeek itself if None
+        :param api_key: API key, the one from secrets.yaml if None
+        :param name: Provider name for logs and stats
+        :param rate_limiter: Limits and retries of the provider, retries with default backoff if None
+        :param temperature: Sampling temperature
+        :param http_client: httpx client (connection pool) for sync calls, langchain's default if None
+        :param http_async_client: httpx client (connection pool) for async calls, langchain's default if None
         """  # noqa
 
-        self.config = ConfigManager()
-        self.llm_chat = ChatDeepSeek(model="deepseek-chat",
-                                     temperature=0.32,
-                                     api_key=self.config.deepseek_api_key)
+        self.name = name
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(name)
+        # Only pass base url when set, otherwise ChatDeepSeek picks its default
+        extra_kwargs = {"api_base": base_url} if base_url is not None else {}
+        # Retries are done by the rate limiter, so they are shared with other calls and respect Retry-After
+        self.llm_chat = ChatDeepSeek(model=model,
+                                     temperature=temperature,
+                                     api_key=api_key if api_key is not None else ConfigManager().deepseek_api_key,
+                                     max_retries=0,
+                                     http_client=http_client,
+                                     http_async_client=http_async_client,
+                                     stream_usage=True,
+                                     **extra_kwargs)
 
     def invoke(self, messages):
-        logger.info("Calling DeepSeek")
-        return self.llm_chat.invoke(messages)
+        logger.info(f"Calling {self.name}")
+        return self.rate_limiter.call(self.llm_chat.invoke, messages)
+
+    async def ainvoke(self, messages):
+        logger.info(f"Calling {self.name} (async)")
+        return await self.rate_limiter.acall(self.llm_chat.ainvoke, messages)
+
+    def stream(self, messages):
+        logger.info(f"Calling {self.name} (streaming)")
+        return self.rate_limiter.stream(self.llm_chat.stream, messages)
+
+    def astream(self, messages):
+        logger.info(f"Calling {self.name} (async streaming)")
+        return self.rate_limiter.astream(self.llm_chat.astream, messages)
+
+    def warm_up(self, timeout_sec: float = 10.) -> None:
+        """
+        Open a keep-alive connection to the provider, any response will do, an error one included
+
+        :param timeout_sec: Max time for the request
+        """
+        try:
+            self.llm_chat.root_client.with_options(timeout=timeout_sec, max_retries=0).models.list()
+        except openai.APIStatusError:
+            pass
 
     def __call__(self, messages):
         return self.invoke(messages)
 
 
+def make_chat_wrapper(provider: ProviderSettings, retry: RetrySettings, http_client=None, http_async_client=None):
+    """
+    :param provider: Provider from llm_settings.yaml
+    :param retry: Retry settings from llm_settings.yaml
+    :param http_client: httpx client (connection pool) for sync calls, langchain's default if None
+    :param http_async_client: httpx client (connection pool) for async calls, langchain's default if None
+    :return: Chat wrapper for the provider
+    """
+    if provider.cassette is not None and provider.cassette_mode != RECORD:
+        # Replay doesn't touch the provider at all
+        return make_cassette_wrapper(provider, None)
+
+    rate_limiter = RateLimiter(provider.name,
+                               requests_per_minute=provider.requests_per_minute,
+                               tokens_per_minute=provider.tokens_per_minute,
+                               max_retries=retry.max_retries,
+                               base_delay_sec=retry.base_delay_sec,
+                               max_delay_sec=retry.max_delay_sec)
+
+    wrapper_kwargs = {"base_url": provider.base_url, "api_key": provider.api_key, "name": provider.name,
+                      "rate_limiter": rate_limiter, "temperature": provider.temperature,
+                      "http_client": http_client, "http_async_client": http_async_client}
+    if provider.model is not None:
+        wrapper_kwargs["model"] = provider.model
+
+    match provider.type:
+        case "deepseek":
+            llm_chat = ChatDeepSeekWrapper(**wrapper_kwargs)
+        case "openai":
+            llm_chat = ChatOpenAIWrapper(**wrapper_kwargs)
+        case _:
+            raise ValueError(f"Unknown LLM provider type: {provider.type}")
+
+    return make_cassette_wrapper(provider, llm_chat) if provider.cassette is not None else llm_chat
+
+
+def make_cassette_wrapper(provider: ProviderSettings, llm_chat):
+    """
+    :param provider: Provider from llm_settings.yaml, with cassette set
+    :param llm_chat: Chat wrapper of the provider to record, None to replay
+    :return: Cassette wrapper for the provider
+    """
+    return CassetteChatWrapper(provider.cassette,
+                               mode=provider.cassette_mode,
+                               llm_chat=llm_chat,
+                               name=provider.name,
+                               latency=provider.cassette_latency,
+                               latency_median_sec=provider.cassette_latency_median_sec,
+                               latency_sigma=provider.cassette_latency_sigma)
+
+
+def make_provider_router(providers: list[ProviderSettings], router_settings: RouterSettings, retry: RetrySettings,
+                         http_client=None, http_async_client=None) -> ProviderRouter:
+    """
+    :param providers: Providers from llm_settings.yaml
+    :param router_settings: Router settings from llm_settings.yaml
+    :param retry: Retry settings from llm_settings.yaml
+    :param http_client: httpx client (connection pool) for sync calls, langchain's default if None
+    :param http_async_client: httpx client (connection pool) for async calls, langchain's default if None
+    :return: Provider router over the providers
+    """
+    return ProviderRouter({p.name: make_chat_wrapper(p, retry, http_client, http_async_client) for p in providers},
+                          window=router_settings.window,
+                          window_sec=router_settings.window_sec,
+                          min_samples=router_settings.min_samples,
+                          max_error_rate=router_settings.max_error_rate,
+                          hedge_quantile=router_settings.hedge_quantile,
+                          hedge_default_delay_sec=router_settings.hedge_default_delay_sec)
+
+
 class LLMClient:
     def __init__(self):
-        self.llm_chat = ChatDeepSeekWrapper()
         self.config = ConfigManager()
+
+        router_settings = self.config.llm_settings.router
+        http_pool = self.config.llm_settings.http_pool
+        # One keep-alive pool for every provider, instead of connections set up per wrapper
+        http_client, http_async_client = make_http_clients(http_pool)
+        self.llm_chat = make_provider_router(router_settings.providers, router_settings, self.config.llm_settings.retry,
+                                             http_client=http_client, http_async_client=http_async_client)
+
+        # Tier name -> provider router, every tier with its own wrappers and connection pool
+        self.tier_chats: dict[str, ProviderRouter] = {DEFAULT_TIER: self.llm_chat}
+        self.model_tiers: ModelTierRouter | None = None
+        tiers_settings = self.config.llm_settings.tiers
+        if tiers_settings.enabled:
+            for tier in tiers_settings.tiers:
+                tier_http_client, tier_http_async_client = make_http_clients(http_pool, tier.max_connections)
+                self.tier_chats[tier.name] = make_provider_router(
+                    tier.providers, router_settings, self.config.llm_settings.retry,
+                    http_client=tier_http_client, http_async_client=tier_http_async_client)
+            self.model_tiers = ModelTierRouter(tiers_settings.routes, set(self.tier_chats))
+
+        # Connections are opened in the background, LLM client is created before Chrome is launched for that
+        self.connection_warm_up: ConnectionWarmUp | None = None
+        if http_pool.warm_up:
+            # Cassettes in replay mode don't have a provider to connect to
+            wrappers = [w.llm_chat if isinstance(w, CassetteChatWrapper) else w
+                        for chat in self.tier_chats.values() for w in chat.providers.values()]
+            self.connection_warm_up = ConnectionWarmUp([w for w in wrappers if w is not None],
+                                                       http_pool.warm_up_timeout_sec).start()
+
         self.no_answer_keyword = "CANDIDATE_NO_DATA"
         self.key_tag = "ANSWER"
 
         self.exception_data = CustomExceptionData()
 
-    @staticmethod
-    def __build_prompt(config_manager_prompt: FewShotPrompt, prompt_example_mode: int = 0) -> ChatPromptTemplate:
+        self.prompt_registry = PromptRegistry()
+
+        self.telemetry = LLMTelemetry()
+
+        self.__async_semaphore: asyncio.Semaphore | None = None
+        self.__async_semaphore_loop: asyncio.AbstractEventLoop | None = None
+        # Sync calls with a deadline run here, so the caller can stop waiting for them
+        self.__deadline_executor: ThreadPoolExecutor | None = None
+
+        if self.config.llm_settings.answer_cache.enabled:
+            self.answer_cache = AnswerCache(os.path.join(os.getcwd(), "llm_cache", "answers.sqlite3"),
+                                            ttl_sec=self.config.llm_settings.answer_cache.ttl_sec,
+                                            max_entries=self.config.llm_settings.answer_cache.max_entries)
+        else:
+            self.answer_cache = None
+
+        if self.config.llm_settings.semantic_cache.enabled:
+            self.semantic_cache = SemanticAnswerCache(
+                os.path.join(os.getcwd(), "llm_cache", "semantic_index.npz"),
+                similarity_threshold=self.config.llm_settings.semantic_cache.similarity_threshold,
+                n_features=self.config.llm_settings.semantic_cache.n_features,
+                save_interval_sec=self.config.llm_settings.semantic_cache.save_interval_sec)
+        else:
+            self.semantic_cache = None
+
+        if (self.config.llm_settings.streaming.enabled and self.config.llm_settings.streaming.stop_at_answer
+                and self.config.llm_settings.prompt_layout.prefix_cache):
+            logger.warning("Streams stop at the answer tag (streaming.stop_at_answer), before usage is sent, "
+                           "prefix cache hits of streamed calls won't be reported")
+
+        # Pruned resume differs per question and would break the cached prompt prefix
+        if self.config.llm_settings.resume.pruning and self.config.llm_settings.prompt_layout.prefix_cache:
+            logger.warning("Resume pruning (resume.pruning) is off while prompt_layout.prefix_cache is on, "
+                           "the whole resume is sent with every question")
+        if self.config.llm_settings.resume.pruning and not self.config.llm_settings.prompt_layout.prefix_cache:
+            self.resume_retriever = ResumeRetriever(
+                token_budget=self.config.llm_settings.resume.token_budget,
+                min_confidence=self.config.llm_settings.resume.min_confidence,
+                always_include=self.config.llm_settings.resume.always_include)
+        else:
+            self.resume_retriever = None
+
+    def __resume_string(self) -> str:
         """
-        Build prompt, essentially getting from config
-        
-        :param config_manager_prompt: prompt object from config
-        :param prompt_example_mode: 0 zer shot, 1 one shot, 2 few shots
-        :return: langchain's ChatPromptTemplate
-        """  # noqa
+        :return: Serialized resume in the configured format, cached by config
+        """
+        return self.config.resume_string(self.config.llm_settings.resume.format)
 
-        example_prompt = ChatPromptTemplate.from_messages([
-            ("user", "{input}"),
-            ("ai", "{output}")
-        ])
-
-        match prompt_example_mode:
-            case 0:
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", config_manager_prompt.system_message),
-                    ("human", config_manager_prompt.user_message_template)
-                ])
-
-            case 1:
-                single_shot = [{"input": config_manager_prompt.examples[0].user_message,
-                                "output": config_manager_prompt.examples[0].ai_message}]
-
-                single_shot_prompt = FewShotChatMessagePromptTemplate(
-                    example_prompt=example_prompt,
-                    examples=single_shot
-                )
-
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", config_manager_prompt.system_message),
-                    single_shot_prompt,
-                    ("human", config_manager_prompt.user_message_template)
-                ])
-
-            case 2:
-                few_shot = [{"input": ex.user_message, "output": ex.ai_message} for ex in
-                            config_manager_prompt.examples]
-
-                few_shot_prompt = FewShotChatMessagePromptTemplate(
-                    example_prompt=example_prompt,
-                    examples=few_shot
-                )
-
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", config_manager_prompt.system_message),
-                    few_shot_prompt,
-                    ("human", config_manager_prompt.user_message_template)
-                ])
-
-            case _:
-                raise
+    def __question_resume_string(self, questions: list[str]) -> str:
+        """
+        Resume for answering form questions, pruned to relevant sections if enabled
+
+        :param questions: Questions that will be answered with this resume
+        :return: Serialized resume, the whole one if pruning is disabled or not confident
+        """
+        if self.resume_retriever is not None:
+            # Accessing user_info reloads it if the file changed, version has to be read after that
+            user_info = self.config.user_info
+            resume = self.resume_retriever.retrieve(questions, user_info, self.config.user_info_version,
+                                                    self.config.llm_settings.resume.format)
+            if resume is not None:
+                return resume
 
-        return prompt
+        return self.__resume_string()
 
-    def __tag_parser(self, message: AIMessage) -> str:
+    def __cache_fingerprints(self, prompt: FewShotPrompt) -> tuple[str, str]:
         """
-        Parser with new type of prompt, when AI should generate output with HTML tags
-        
-        :param message: Langchain's AIMessage object
-        :return: Cleaned up answer string
-        """  # noqa
+        Fingerprints of everything besides the question itself that affects the answer
 
-        message_string = message.content
+        :param prompt: Prompt object from config that would be used to answer
+        :return: Resume fingerprint and prompt version
+        """
+        return AnswerCache.fingerprint(self.__resume_string()), AnswerCache.fingerprint(repr(prompt))
 
-        class TagParser(HTMLParser):
-            answer_data = False
-            answer = ""
+    def __get_cached_answer(self, prompt: FewShotPrompt, question: str, options: list[str] | None) -> str | None:
+        """
+        Look up previously given answer, exact match first, then a paraphrased question
 
-            def handle_starttag(self, tag, attrs):
-                if tag == "answer":
-                    self.answer_data = True
+        :param prompt: Prompt object from config that would be used to answer
+        :param question: Question about resume to answer
+        :param options: Options to choose from (None for free form questions)
+        :return: Cached answer, None if not found or caches are disabled
+        """
+        user_info_fingerprint, prompt_version = self.__cache_fingerprints(prompt)
+        # Options decide which prompt answers the question
+        prompt_name = "answer_freely" if options is None else "answer_with_options"
+
+        cache_key = None
+        if self.answer_cache is not None:
+            cache_key = AnswerCache.make_key(question, options, user_info_fingerprint, prompt_version)
+            answer = self.answer_cache.get(cache_key)
+
+            if answer is not None:
+                logger.info(f"The question: {question}\n"
+                            f"Cached answer: {answer}\n"
+                            f"Answer cache {self.answer_cache.stats()}")
+                self.telemetry.record_cache_hit(prompt_name, "exact")
+                return answer
+
+        if self.semantic_cache is not None:
+            similar = self.semantic_cache.lookup(
+                question, SemanticAnswerCache.group_key(options, user_info_fingerprint, prompt_version))
+
+            if similar is not None:
+                similar_question, answer, similarity = similar
+                logger.info(f"The question: {question}\n"
+                            f"Similar question: {similar_question} (similarity {similarity:.2f})\n"
+                            f"Cached answer: {answer}\n"
+                            f"Semantic cache {self.semantic_cache.stats()}")
+                # Next time it will be an exact hit
+                if cache_key is not None:
+                    self.answer_cache.put(cache_key, question, answer)
+                self.telemetry.record_cache_hit(prompt_name, "semantic")
+                return answer
+
+        return None
+
+    def __put_cached_answer(self, prompt: FewShotPrompt, question: str, options: list[str] | None,
+                            answer: str) -> None:
+        """
+        Remember the answer
 
-            def handle_endtag(self, tag):
-                if tag == "answer":
-                    self.answer_data = False
+        :param prompt: Prompt object from config that was used to answer
+        :param question: Question that was answered
+        :param options: Options to choose from (None for free form questions)
+        :param answer: LLM answer
+        """
+        user_info_fingerprint, prompt_version = self.__cache_fingerprints(prompt)
 
-            def handle_data(self, data):
-                self.answer = str(data)
+        if self.answer_cache is not None:
+            self.answer_cache.put(AnswerCache.make_key(question, options, user_info_fingerprint, prompt_version),
+                                  question, answer)
 
-        parser = TagParser()
+        if self.semantic_cache is not None:
+            self.semantic_cache.add(question,
+                                    SemanticAnswerCache.group_key(options, user_info_fingerprint, prompt_version),
+                                    answer)
 
-        logger.debug(f"Full LLM answer: \n {message_string}")
+    def __build_prompt(self, config_manager_prompt: FewShotPrompt,
+                       prompt_example_mode: int | None = None) -> ChatPromptTemplate:
+        """
+        Get prompt, built once from config and reused until prompts.yaml changes
+
+        :param config_manager_prompt: prompt object from config
+        :param prompt_example_mode: 0 zer shot, 1 one shot, 2 few shots, 3 similar few shots, from settings if None
+        :return: langchain's ChatPromptTemplate
+        """  # noqa
+        if prompt_example_mode is None:
+            prompt_example_mode = self.config.llm_settings.examples.mode
+        return self.prompt_registry.get(config_manager_prompt, prompt_example_mode, self.config.prompts_version,
+                                        self.config.llm_settings.prompt_layout.prefix_cache,
+                                        self.config.llm_settings.examples)
 
-        parser.feed(message_string)
+    def __check_answer(self, answer: str, message_string: str) -> str:
+        """
+        Make sure LLM actually answered
 
-        if self.no_answer_keyword in parser.answer:
+        :param answer: Answer tag contents
+        :param message_string: Raw LLM output
+        :return: Answer tag contents
+        """
+        if self.no_answer_keyword in answer:
             self.exception_data.reason = "LLM did not produce an answer!"
             self.exception_data.llm_answer = message_string
             raise LLMException(self.exception_data.reason, self.exception_data)
@@ -155,42 +434,461 @@ class LLMClient:
             # Return with quick cleanup, expand if needed
             # It should not be here!
             # return parser.answer.replace("\n", "").strip()
-            return parser.answer
+            return answer
 
-    # TODO: These two functions differ just by options field, can I combine it to one?
-    def answer_freely(self, question: str) -> str:
+    def __extract_tag(self, message_string: str) -> str:
         """
-        Answer on question in free format
+        Get contents of the answer tag out of raw LLM output
 
-        Boolean shows if LLM was able to answer a question
+        :param message_string: Raw LLM output
+        :return: Answer tag contents
+        """
+        logger.debug(f"Full LLM answer: \n {message_string}")
 
-        :param question: Question about resume to answer
+        return extract_answer_tag(message_string, self.key_tag)
 
-        :return: Call result and answer
+    def __render_prompt(self, prompt: ChatPromptTemplate, inputs: dict):
+        """
+        Fill in prompt variables, for calls that go to the LLM directly instead of a chain
+
+        :param prompt: Built prompt
+        :param inputs: Prompt variables
+        :return: Langchain's PromptValue
+        """
+        prompt_value = prompt.invoke(inputs)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Full LLM prompt: \n {prompt_value}")
+
+        return prompt_value
+
+    def __stream_answer(self, prompt_value, call_record: LLMCallRecord,
+                        deadline: Deadline | None = None) -> AnswerTagExtractor:
+        """
+        Stream LLM output into the tag extractor, up to the last chunk with usage in it, or as soon as
+        the answer tag is closed if streaming.stop_at_answer is on. Closing the stream closes the HTTP response,
+        so the rest of the output is never generated
+
+        :param prompt_value: Rendered prompt
+        :param call_record: Telemetry record of the call
+        :param deadline: Stop reading once it runs out, the caller has stopped waiting by then
+        :return: Extractor with the answer
+        """
+        extractor = AnswerTagExtractor(self.key_tag)
+        llm_chat = self.tier_chats[call_record.tier]
+
+        with closing(llm_chat.stream(prompt_value, call_record=call_record)) as stream:
+            for chunk in stream:
+                extractor.feed(chunk.content)
+                self.__record_cached_tokens(call_record, chunk)
+                if (extractor.closed and self.config.llm_settings.streaming.stop_at_answer
+                        or deadline is not None and deadline.expired()):
+                    break
+
+        return self.__finish_stream(extractor)
+
+    async def __astream_answer(self, prompt_value, call_record: LLMCallRecord) -> AnswerTagExtractor:
+        """
+        Async version of __stream_answer
+
+        :param prompt_value: Rendered prompt
+        :param call_record: Telemetry record of the call
+        :return: Extractor with the answer
+        """
+        extractor = AnswerTagExtractor(self.key_tag)
+        llm_chat = self.tier_chats[call_record.tier]
+
+        async with aclosing(llm_chat.astream(prompt_value, call_record=call_record)) as stream:
+            async for chunk in stream:
+                extractor.feed(chunk.content)
+                self.__record_cached_tokens(call_record, chunk)
+                if extractor.closed and self.config.llm_settings.streaming.stop_at_answer:
+                    break
+
+        return self.__finish_stream(extractor)
+
+    def __finish_stream(self, extractor: AnswerTagExtractor) -> AnswerTagExtractor:
+        """
+        :param extractor: Extractor fed with the streamed output
+        :return: Same extractor, flushed if the stream ended before the tag was closed
+        """
+        if not extractor.closed:
+            extractor.close()
+
+        if logger.isEnabledFor(logging.DEBUG):
+            skipped = extractor.closed and self.config.llm_settings.streaming.stop_at_answer
+            logger.debug(f"Full LLM answer{' (rest skipped after the answer tag)' if skipped else ''}: \n "
+                         f"{extractor.raw}")
+
+        return extractor
+
+    @staticmethod
+    def __record_cached_tokens(call_record: LLMCallRecord, message) -> None:
+        """
+        Take prompt tokens served from provider's prefix cache, if the provider reported usage
+
+        :param call_record: Telemetry record of the call
+        :param message: Langchain's AIMessage, or a streamed chunk (only the last one has usage)
+        """
+        usage = getattr(message, "usage_metadata", None)
+        if not usage:
+            return
+
+        cached = (usage.get("input_token_details") or {}).get("cache_read")
+        if cached is None:
+            # DeepSeek reports cache hits its own way
+            token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+            cached = token_usage.get("prompt_cache_hit_tokens", 0)
+        call_record.cached_prompt_tokens = cached
+
+    def __should_hedge(self, hedge: bool, tier: str = DEFAULT_TIER) -> bool:
+        """
+        Hedging needs a second provider and whole responses, streaming is skipped for hedged calls
+
+        :param hedge: Caller wants the call hedged
+        :param tier: Model tier the call goes to
+        :return: Call should be hedged
+        """
+        return hedge and self.config.llm_settings.router.hedge_options and len(self.tier_chats[tier].providers) > 1
+
+    def __tier(self, prompt_name: str,
+               questions: list[tuple[FieldTypeEnum | None, str, list[str] | None]] | None = None) -> str:
+        """
+        :param prompt_name: Prompt name
+        :param questions: (field type, question, options) of every question in the call
+        :return: Model tier for the call, the default one if tiers are disabled
+        """
+        if self.model_tiers is None:
+            return DEFAULT_TIER
+        return self.model_tiers.route(prompt_name, questions)
+
+    def __call_llm(self, prompt_value, hedge: bool, call_record: LLMCallRecord,
+                   deadline: Deadline | None = None) -> tuple[str, str]:
+        """
+        Single LLM call: hedged, streamed or plain, whichever applies
+
+        :param prompt_value: Rendered prompt
+        :param hedge: Call should be hedged
+        :param call_record: Telemetry record of the call
+        :param deadline: Deadline of the application, streams stop reading once it runs out
+        :return: Answer tag contents and raw LLM output
+        """
+        llm_chat = self.tier_chats[call_record.tier]
+        if hedge:
+            message = llm_chat.invoke(prompt_value, hedge=True, call_record=call_record)
+        elif self.config.llm_settings.streaming.enabled:
+            extractor = self.__stream_answer(prompt_value, call_record, deadline)
+            return extractor.answer, extractor.raw
+        else:
+            message = llm_chat.invoke(prompt_value, call_record=call_record)
+
+        self.__record_cached_tokens(call_record, message)
+        message_string = message.content
+
+        return self.__extract_tag(message_string), message_string
+
+    def __call_llm_until(self, prompt_value, hedge: bool, call_record: LLMCallRecord, deadline: Deadline | None,
+                         step: str) -> tuple[str, str]:
+        """
+        __call_llm bounded by the per call timeout and the deadline, unbounded as before if there's no deadline
+
+        Sync calls can't be cancelled, so the call runs in a worker thread and the caller stops waiting for it.
+        Abandoned call finishes in background (streams stop at the next chunk)
+
+        :param prompt_value: Rendered prompt
+        :param hedge: Call should be hedged
+        :param call_record: Telemetry record of the call
+        :param deadline: Deadline of the application
+        :param step: Step name for the deadline
+        :return: Answer tag contents and raw LLM output
+        """
+        if deadline is None:
+            return self.__call_llm(prompt_value, hedge, call_record)
+
+        call_timeout_sec = self.config.llm_settings.async_pool.timeout_sec
+        check_deadline(deadline, step)
+
+        if self.__deadline_executor is None:
+            self.__deadline_executor = ThreadPoolExecutor(
+                max_workers=self.config.llm_settings.async_pool.deadline_workers, thread_name_prefix="LLMClient")
+
+        started = threading.Event()
+
+        def call() -> tuple[str, str]:
+            started.set()
+            return self.__call_llm(prompt_value, hedge, call_record, deadline)
+
+        # Call runs in the caller's context, so langchain callbacks (cost and tokens) see it
+        future = self.__deadline_executor.submit(contextvars.copy_context().run, call)
+
+        # Waiting for a free worker is part of the deadline, but not of the call timeout
+        if not started.wait(max(deadline.remaining(), 0.)) and future.cancel():
+            raise deadline.exceeded(step)
+
+        timeout_sec = deadline.timeout(step, call_timeout_sec)
+        try:
+            return future.result(timeout=timeout_sec)
+        except TimeoutError:
+            # Shortened by the deadline, so the deadline is what ran out
+            if timeout_sec < call_timeout_sec:
+                raise deadline.exceeded(step)
+            raise
+
+    async def __acall_llm(self, prompt_value, hedge: bool, call_record: LLMCallRecord) -> tuple[str, str]:
+        """
+        Async version of __call_llm
+
+        :param prompt_value: Rendered prompt
+        :param hedge: Call should be hedged
+        :param call_record: Telemetry record of the call
+        :return: Answer tag contents and raw LLM output
+        """
+        llm_chat = self.tier_chats[call_record.tier]
+        if hedge:
+            message = await llm_chat.ainvoke(prompt_value, hedge=True, call_record=call_record)
+        elif self.config.llm_settings.streaming.enabled:
+            extractor = await self.__astream_answer(prompt_value, call_record)
+            return extractor.answer, extractor.raw
+        else:
+            message = await llm_chat.ainvoke(prompt_value, call_record=call_record)
+
+        self.__record_cached_tokens(call_record, message)
+        message_string = message.content
+
+        return self.__extract_tag(message_string), message_string
+
+    def __finish_call(self, call_record: LLMCallRecord, cb, outcome: str, prompt_value,
+                      message_string: str = "") -> None:
         """
-        prompt = self.__build_prompt(self.config.prompt_answer_freely)
+        Send call metrics to telemetry
 
-        logger.debug("Full LLM prompt: \n {}".format(
-            prompt.invoke({"resume": str(self.config.user_info),
-                           "question": question})))
+        :param call_record: Telemetry record of the call
+        :param cb: Langchain's OpenAI callback handler the call was made with
+        :param outcome: Call outcome
+        :param prompt_value: Rendered prompt
+        :param message_string: Raw LLM output (if any)
+        """
+        if cb.total_tokens:
+            self.telemetry.finish_call(call_record, outcome, cb.prompt_tokens, cb.completion_tokens, cb.total_cost)
+        else:
+            # Usage is not reported for streams stopped early
+            prompt_tokens = estimate_tokens(prompt_value.to_string())
+            completion_tokens = estimate_tokens(message_string)
+            self.telemetry.finish_call(call_record, outcome, prompt_tokens, completion_tokens,
+                                       self.__estimated_cost(call_record, prompt_tokens, completion_tokens),
+                                       tokens_estimated=True)
+
+    def __estimated_cost(self, call_record: LLMCallRecord, prompt_tokens: int, completion_tokens: int) -> float:
+        """
+        Cost of a call without usage reported, by langchain's price list, as the OpenAI callback would count it
+
+        :param call_record: Telemetry record of the call
+        :param prompt_tokens: Estimated prompt tokens
+        :param completion_tokens: Estimated completion tokens
+        :return: Cost in USD, 0 for models missing from the price list
+        """
+        provider = self.tier_chats[call_record.tier].providers.get(call_record.provider)
+        if provider is None:
+            return 0.
+        model_name = standardize_model_name(provider.llm_chat.model_name)
+        if model_name not in MODEL_COST_PER_1K_TOKENS:
+            return 0.
+        return (get_openai_token_cost_for_model(model_name, prompt_tokens)
+                + get_openai_token_cost_for_model(model_name, completion_tokens, token_type=TokenType.COMPLETION))
+
+    @staticmethod
+    def __provider_failed(ex: openai.APIError | LLMException, question: str) -> LLMException:
+        """
+        Provider error that retries and failover didn't get past, as LLMException with the question set,
+        so it fails the application, not the bot
 
-        chain = prompt | self.llm_chat | self.__tag_parser
+        :param ex: Exception raised by the OpenAI client, or by the router when every provider failed
+        :param question: What was asked, for the error log
+        :return: Exception to raise
+        """
+        if isinstance(ex, LLMException):
+            ex.data.llm_question = question
+            return ex
+        exception_data = CustomExceptionData(reason=f"LLM provider failed: {ex}", llm_question=question)
+        exception = LLMException(exception_data.reason, exception_data)
+        exception.__cause__ = ex
+        return exception
+
+    def __answer_outcome(self, answer: str) -> str:
+        return OUTCOME_NO_DATA if self.no_answer_keyword in answer else OUTCOME_ANSWER
+
+    def __invoke(self, prompt_name: str, config_manager_prompt: FewShotPrompt, inputs: dict,
+                 hedge: bool = False, deadline: Deadline | None = None, tier: str = DEFAULT_TIER) -> str:
+        """
+        Call LLM with the prompt from config
+
+        :param prompt_name: Prompt name for telemetry
+        :param config_manager_prompt: prompt object from config
+        :param inputs: Prompt variables
+        :param hedge: Fire the second provider if the first one is slow (questions with options)
+        :param deadline: Deadline of the application, the call is bounded by it and by the per call timeout
+        :param tier: Model tier to call
+        :return: Answer tag contents
+        """
+        step = f"LLM call {prompt_name}"
+        check_deadline(deadline, step)
+
+        prompt_value = self.__render_prompt(self.__build_prompt(config_manager_prompt), inputs)
+        call_record = self.telemetry.start_call(prompt_name, tier)
 
         with get_openai_callback() as cb:
-            answer = chain.invoke({"resume": str(self.config.user_info),
-                                   "question": question})
+            try:
+                answer, message_string = self.__call_llm_until(prompt_value, self.__should_hedge(hedge, tier),
+                                                               call_record, deadline, step)
+            except DeadlineExceededException:
+                self.__finish_call(call_record, cb, OUTCOME_TIMEOUT, prompt_value)
+                raise
+            except TimeoutError:
+                self.__finish_call(call_record, cb, OUTCOME_TIMEOUT, prompt_value)
+                exception_data = CustomExceptionData(reason="LLM call timed out!",
+                                                     llm_question=str(inputs.get("question", "")))
+                raise LLMException(exception_data.reason, exception_data)
+            except (openai.APIError, LLMException) as ex:
+                self.__finish_call(call_record, cb, OUTCOME_ERROR, prompt_value)
+                raise self.__provider_failed(ex, str(inputs.get("question", "")))
+            except Exception:
+                self.__finish_call(call_record, cb, OUTCOME_ERROR, prompt_value)
+                raise
 
-            logger.warning(f"Call cost: {cb.total_cost}")
+            self.__finish_call(call_record, cb, self.__answer_outcome(answer), prompt_value, message_string)
 
+        return self.__check_answer(answer, message_string)
+
+    async def __ainvoke(self, prompt_name: str, config_manager_prompt: FewShotPrompt, inputs: dict,
+                        hedge: bool = False, deadline: Deadline | None = None, tier: str = DEFAULT_TIER) -> str:
+        """
+        Call LLM with the prompt from config, asyncio-native
+
+        Waits for a free slot in the shared concurrency pool, then for the answer with a timeout.
+        Cancelling the awaiting task cancels the HTTP request as well
+
+        :param prompt_name: Prompt name for telemetry
+        :param config_manager_prompt: prompt object from config
+        :param inputs: Prompt variables
+        :param hedge: Fire the second provider if the first one is slow (questions with options)
+        :param deadline: Deadline of the application, the timeout is shortened to what's left of it
+        :param tier: Model tier to call
+        :return: Answer tag contents
+        """
+        step = f"LLM call {prompt_name}"
+        prompt_value = self.__render_prompt(self.__build_prompt(config_manager_prompt), inputs)
+
+        async with self.__get_async_semaphore():
+            call_timeout_sec = self.config.llm_settings.async_pool.timeout_sec
+            # Waiting for a free slot is not part of the call, but it's part of the deadline
+            timeout_sec = step_timeout(deadline, step, call_timeout_sec)
+            call_record = self.telemetry.start_call(prompt_name, tier)
+
+            with get_openai_callback() as cb:
+                try:
+                    answer, message_string = await asyncio.wait_for(
+                        self.__acall_llm(prompt_value, self.__should_hedge(hedge, tier), call_record),
+                        timeout=timeout_sec)
+                except asyncio.TimeoutError:
+                    self.__finish_call(call_record, cb, OUTCOME_TIMEOUT, prompt_value)
+                    if timeout_sec < call_timeout_sec:
+                        raise deadline.exceeded(step)
+                    exception_data = CustomExceptionData(reason="LLM call timed out!",
+                                                         llm_question=str(inputs.get("question", "")))
+                    raise LLMException(exception_data.reason, exception_data)
+                except (openai.APIError, LLMException) as ex:
+                    self.__finish_call(call_record, cb, OUTCOME_ERROR, prompt_value)
+                    raise self.__provider_failed(ex, str(inputs.get("question", "")))
+                except Exception:
+                    self.__finish_call(call_record, cb, OUTCOME_ERROR, prompt_value)
+                    raise
+
+                self.__finish_call(call_record, cb, self.__answer_outcome(answer), prompt_value, message_string)
+
+        return self.__check_answer(answer, message_string)
+
+    def __get_async_semaphore(self) -> asyncio.Semaphore:
+        """
+        Concurrency limit shared by every async call
+
+        Semaphore is bound to the event loop, so new one is made if the loop changes (e.g. between asyncio.run calls)
+
+        :return: Semaphore for the running loop
+        """
+        loop = asyncio.get_running_loop()
+        if self.__async_semaphore_loop is not loop:
+            self.__async_semaphore = asyncio.Semaphore(self.config.llm_settings.async_pool.max_concurrency)
+            self.__async_semaphore_loop = loop
+        return self.__async_semaphore
+
+    def __finalize_answer(self, config_manager_prompt: FewShotPrompt,
+                          question: str, options: list[str] | None, answer: str) -> str:
+        """
+        Clean up, log and cache form answer
+
+        :param config_manager_prompt: prompt object from config that was used
+        :param question: Question about resume
+        :param options: Options to choose from (None for free form questions)
+        :param answer: Answer tag contents
+        :return: Final answer
+        """
         # TODO: Return with quick cleanup, expand if needed
         answer = answer.replace("\n", "").strip()
 
         logger.info(f"The question: {question}\n"
                     f"LLM answer: {answer}")
 
+        self.__put_cached_answer(config_manager_prompt, question, options, answer)
+
         return answer
 
-    def answer_with_options(self, question: str, options: list[str]) -> str:
+    # TODO: These two functions differ just by options field, can I combine it to one?
+    def answer_freely(self, question: str, deadline: Deadline | None = None) -> str:
+        """
+        Answer on question in free format
+
+        Boolean shows if LLM was able to answer a question
+
+        :param question: Question about resume to answer
+        :param deadline: Deadline of the application (optional)
+
+        :return: Call result and answer
+        """
+        cached_answer = self.__get_cached_answer(self.config.prompt_answer_freely, question, None)
+        if cached_answer is not None:
+            return cached_answer
+
+        answer = self.__invoke("answer_freely", self.config.prompt_answer_freely,
+                               {"resume": self.__question_resume_string([question]),
+                                "question": question},
+                               deadline=deadline,
+                               tier=self.__tier("answer_freely", [(FieldTypeEnum.INPUT, question, None)]))
+
+        return self.__finalize_answer(self.config.prompt_answer_freely, question, None, answer)
+
+    async def answer_freely_async(self, question: str, deadline: Deadline | None = None) -> str:
+        """
+        Async version of answer_freely, limited by the shared concurrency pool
+
+        :param question: Question about resume to answer
+        :param deadline: Deadline of the application (optional)
+
+        :return: Call result and answer
+        """
+        cached_answer = self.__get_cached_answer(self.config.prompt_answer_freely, question, None)
+        if cached_answer is not None:
+            return cached_answer
+
+        answer = await self.__ainvoke("answer_freely", self.config.prompt_answer_freely,
+                                      {"resume": self.__question_resume_string([question]),
+                                       "question": question},
+                                      deadline=deadline,
+                                      tier=self.__tier("answer_freely", [(FieldTypeEnum.INPUT, question, None)]))
+
+        return self.__finalize_answer(self.config.prompt_answer_freely, question, None, answer)
+
+    def answer_with_options(self, question: str, options: list[str], deadline: Deadline | None = None,
+                            field_type: FieldTypeEnum | None = None) -> str:
         """
         Answer on question from options provided
 
@@ -198,34 +896,220 @@ class LLMClient:
 
         :param question: Question about resume to answer
         :param options: Options to choose from
+        :param deadline: Deadline of the application (optional)
+        :param field_type: Type of the form field, for model tier routing (optional)
 
         :return: Call result and answer
         """
-        prompt = self.__build_prompt(self.config.prompt_answer_with_options)
+        cached_answer = self.__get_cached_answer(self.config.prompt_answer_with_options, question, options)
+        if cached_answer is not None:
+            return cached_answer
+
+        answer = self.__invoke("answer_with_options", self.config.prompt_answer_with_options,
+                               {"resume": self.__question_resume_string([question]),
+                                "question": question,
+                                "options": self.__options_string(options)},
+                               hedge=True, deadline=deadline,
+                               tier=self.__tier("answer_with_options", [(field_type, question, options)]))
+
+        return self.__finalize_answer(self.config.prompt_answer_with_options, question, options,
+                                      self.__resolve_option(options, answer, field_type))
+
+    async def answer_with_options_async(self, question: str, options: list[str],
+                                        deadline: Deadline | None = None,
+                                        field_type: FieldTypeEnum | None = None) -> str:
+        """
+        Async version of answer_with_options, limited by the shared concurrency pool
+
+        :param question: Question about resume to answer
+        :param options: Options to choose from
+        :param deadline: Deadline of the application (optional)
+        :param field_type: Type of the form field, for model tier routing (optional)
+
+        :return: Call result and answer
+        """
+        cached_answer = self.__get_cached_answer(self.config.prompt_answer_with_options, question, options)
+        if cached_answer is not None:
+            return cached_answer
+
+        answer = await self.__ainvoke("answer_with_options", self.config.prompt_answer_with_options,
+                                      {"resume": self.__question_resume_string([question]),
+                                       "question": question,
+                                       "options": self.__options_string(options)},
+                                      hedge=True, deadline=deadline,
+                                      tier=self.__tier("answer_with_options", [(field_type, question, options)]))
+
+        return self.__finalize_answer(self.config.prompt_answer_with_options, question, options,
+                                      self.__resolve_option(options, answer, field_type))
+
+    def __options_string(self, options: list[str]) -> str:
+        """
+        :param options: Options to choose from
+        :return: Options for the answer_with_options prompt
+        """
+        if not self.config.llm_settings.options.numbered:
+            return str(options)
+        return f"{format_options(options)}\n{NUMBERED_OPTIONS_HINT}"
+
+    def __resolve_option(self, options: list[str], answer: str, field_type: FieldTypeEnum | None = None) -> str:
+        """
+        Map LLM answer to the exact option text, so the form field can actually be set
+
+        :param options: Options to choose from
+        :param answer: Answer tag contents
+        :param field_type: Type of the form field (optional)
+        :return: One of the options, or the answer as is for checkboxes that don't match any
+        """
+        option = resolve_option(answer.replace("\n", " "), options, self.config.llm_settings.options.fuzzy_cutoff,
+                                self.config.llm_settings.options.numbered)
+        if option is None and field_type == FieldTypeEnum.CHECKBOX:
+            # Checkbox gets ticked whatever the answer is
+            logger.warning(f"LLM answer \"{answer.strip()}\" doesn't match any of the checkbox options")
+            return answer.strip()
+        if option is None:
+            self.exception_data.reason = "LLM answer doesn't match any of the options!"
+            self.exception_data.llm_answer = answer
+            raise LLMException(self.exception_data.reason, self.exception_data)
+
+        if option != answer.strip():
+            logger.info(f"LLM answer \"{answer.strip()}\" resolved to option \"{option}\"")
+        return option
+
+    def answer_batch(self, fields: list[Field], deadline: Deadline | None = None) -> list[str | None]:
+        """
+        Answer all questions of a form page in one LLM call
 
-        logger.debug("Full LLM prompt: \n {}".format(
-            prompt.invoke({"resume": str(self.config.user_info),
-                           "question": question,
-                           "options": str(options)})))
+        Fields are text inputs (answered freely) or fields with options (answered with one of the options).
+        Answers that fail to parse or validate come back as None, answer these with single field calls
 
-        chain = prompt | self.llm_chat | self.__tag_parser
+        :param fields: Form fields to answer
+        :param deadline: Deadline of the application (optional)
 
+        :return: Answers in the same order as fields
+        """
+        answers: list[str | None] = [None] * len(fields)
+
+        # Same cache as single field calls, so answers are shared between both ways
+        pending = []
+        for i, field in enumerate(fields):
+            cached_answer = self.__get_cached_answer(self.__single_field_prompt(field), field.label,
+                                                     self.__field_options(field))
+            if cached_answer is not None:
+                answers[i] = cached_answer
+            else:
+                pending.append(i)
+
+        # Nothing to batch
+        if len(pending) < 2:
+            return answers
+
+        questions = []
+        for number, i in enumerate(pending, start=1):
+            options = self.__field_options(fields[i])
+            questions.append(f"{number}. {fields[i].label}\n"
+                             + (f"   Options: {format_options(options, self.config.llm_settings.options.numbered)}"
+                                if options is not None else "   Answer: free text"))
+        questions = "\n".join(questions)
+
+        step = "LLM call answer_batch"
+        check_deadline(deadline, step)
+
+        prompt = self.__build_prompt(self.config.prompt_answer_batch)
+        prompt_value = self.__render_prompt(prompt, {"resume": self.__question_resume_string(
+                                                         [fields[i].label for i in pending]),
+                                                     "questions": questions})
+
+        call_record = self.telemetry.start_call("answer_batch", self.__tier(
+            "answer_batch", [(fields[i].type, fields[i].label, self.__field_options(fields[i])) for i in pending]))
+
+        # No answer check here, CANDIDATE_NO_DATA for one question shouldn't fail all of them
         with get_openai_callback() as cb:
-            answer = chain.invoke({"resume": str(self.config.user_info),
-                                   "question": question,
-                                   "options": str(options)})
+            try:
+                raw_answers, message_string = self.__call_llm_until(prompt_value, False, call_record, deadline, step)
+            except DeadlineExceededException:
+                self.__finish_call(call_record, cb, OUTCOME_TIMEOUT, prompt_value)
+                raise
+            except TimeoutError:
+                # Single field calls will have a go
+                self.__finish_call(call_record, cb, OUTCOME_TIMEOUT, prompt_value)
+                logger.warning("Batch answer timed out, falling back to single field calls")
+                return answers
+            except (openai.APIError, LLMException) as ex:
+                self.__finish_call(call_record, cb, OUTCOME_ERROR, prompt_value)
+                raise self.__provider_failed(ex, questions)
+            except Exception:
+                self.__finish_call(call_record, cb, OUTCOME_ERROR, prompt_value)
+                raise
 
-            logger.warning(f"Call cost: {cb.total_cost}")
+            self.__finish_call(call_record, cb, OUTCOME_ANSWER, prompt_value, message_string)
 
-        # TODO: Return with quick cleanup, expand if needed
-        answer = answer.replace("\n", "").strip()
+        raw_answers = self.__parse_json_object(raw_answers)
+        if raw_answers is None:
+            logger.warning(f"Can't parse batch answer, falling back to single field calls\n"
+                           f"LLM answer: {message_string}")
+            return answers
 
-        logger.info(f"The question: {question}\n "
-                    f"LLM answer: {answer}")
+        for number, i in enumerate(pending, start=1):
+            answer = raw_answers.get(str(number))
+            if not isinstance(answer, (str, int, float)) or isinstance(answer, bool):
+                continue
 
-        return answer
+            answer = str(answer).replace("\n", "").strip()
+            options = self.__field_options(fields[i])
+
+            if not answer or self.no_answer_keyword in answer:
+                continue
+            if options is not None:
+                answer = resolve_option(answer, options, self.config.llm_settings.options.fuzzy_cutoff,
+                                        self.config.llm_settings.options.numbered)
+                if answer is None:
+                    continue
+
+            answers[i] = answer
+            self.__put_cached_answer(self.__single_field_prompt(fields[i]), fields[i].label, options, answer)
+
+        logger.info("Batch answers:\n" + "\n".join(f"The question: {fields[i].label}\n"
+                                                     f"LLM answer: {answers[i]}" for i in pending))
+
+        return answers
+
+    @staticmethod
+    def __parse_json_object(answer: str) -> dict | None:
+        """
+        :param answer: Answer tag contents
+        :return: JSON object from the answer, None if it's not one
+        """
+        # Models like to wrap JSON in markdown code blocks
+        answer = answer.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+
+        try:
+            answer = json.loads(answer)
+        except ValueError:
+            return None
+        return answer if isinstance(answer, dict) else None
+
+    def __single_field_prompt(self, field: Field) -> FewShotPrompt:
+        """
+        :param field: Form field
+        :return: Prompt that is used to answer that field alone
+        """
+        if field.type == FieldTypeEnum.INPUT:
+            return self.config.prompt_answer_freely
+        else:
+            return self.config.prompt_answer_with_options
+
+    @staticmethod
+    def __field_options(field: Field) -> list[str] | None:
+        """
+        :param field: Form field
+        :return: Options to choose from, None for text inputs
+        """
+        if field.type == FieldTypeEnum.INPUT:
+            return None
+        else:
+            return field.data
 
-    def cv_fill_in(self, job_data: Job, resume_part: str) -> str:
+    def cv_fill_in(self, job_data: Job, resume_part: str, deadline: Deadline | None = None) -> str:
         """
         Answer on question from options provided
 
@@ -233,24 +1117,41 @@ class LLMClient:
 
         :param job_data:
         :param resume_part:
+        :param deadline: Deadline of the application (optional)
 
         :return: Call result and answer
         """
-        prompt = self.__build_prompt(self.config.prompt_cv_fill_in)
+        answer = self.__invoke("cv_fill_in", self.config.prompt_cv_fill_in,
+                               {"resume_part": resume_part,
+                                "position": job_data.desc,
+                                "resume": self.__resume_string()},
+                               deadline=deadline,
+                               tier=self.__tier("cv_fill_in"))
+
+        # TODO: Return with quick cleanup, expand if needed
+        answer = answer.strip()
 
-        logger.debug("Full LLM prompt: \n {}".format(
-            prompt.invoke({"resume_part": resume_part,
-                           "position": job_data.desc,
-                           "resume": str(self.config.user_info)})))
+        logger.info(f"Resume part: {resume_part}\n "
+                    f"LLM tailored part: {answer}")
 
-        chain = prompt | self.llm_chat | self.__tag_parser
+        return answer
 
-        with get_openai_callback() as cb:
-            answer = chain.invoke({"resume_part": resume_part,
-                                   "position": job_data.desc,
-                                   "resume": str(self.config.user_info)})
+    async def cv_fill_in_async(self, job_data: Job, resume_part: str, deadline: Deadline | None = None) -> str:
+        """
+        Async version of cv_fill_in, limited by the shared concurrency pool
 
-            logger.warning(f"Call cost: {cb.total_cost}")
+        :param job_data: Job to tailor resume part to
+        :param resume_part: Resume part to tailor
+        :param deadline: Deadline of the application (optional)
+
+        :return: Call result and answer
+        """
+        answer = await self.__ainvoke("cv_fill_in", self.config.prompt_cv_fill_in,
+                                      {"resume_part": resume_part,
+                                       "position": job_data.desc,
+                                       "resume": self.__resume_string()},
+                                      deadline=deadline,
+                                      tier=self.__tier("cv_fill_in"))
 
         # TODO: Return with quick cleanup, expand if needed
         answer = answer.strip()
@@ -259,3 +1160,56 @@ class LLMClient:
                     f"LLM tailored part: {answer}")
 
         return answer
+
+    def cv_sections(self, job_data: Job, sections: dict, schema: dict, deadline: Deadline | None = None) -> dict | None:
+        """
+        Tailor every CV section to the job in one LLM call, instead of a cv_fill_in call per section
+
+        Sections are not validated here, check every one of them against its schema
+
+        :param job_data: Job to tailor sections to
+        :param sections: Section JSON key -> current section
+        :param schema: JSON schema of the answer
+        :param deadline: Deadline of the application (optional)
+
+        :return: Section JSON key -> tailored section, None if the answer is not a JSON object or the call timed out
+        """
+        step = "LLM call cv_sections"
+        check_deadline(deadline, step)
+
+        prompt_value = self.__render_prompt(self.__build_prompt(self.config.prompt_cv_sections),
+                                            {"resume": self.__resume_string(),
+                                             "position": job_data.desc,
+                                             "sections": json.dumps(sections, ensure_ascii=False),
+                                             "schema": json.dumps(schema)})
+        call_record = self.telemetry.start_call("cv_sections", self.__tier("cv_sections"))
+
+        with get_openai_callback() as cb:
+            try:
+                answer, message_string = self.__call_llm_until(prompt_value, False, call_record, deadline, step)
+            except DeadlineExceededException:
+                self.__finish_call(call_record, cb, OUTCOME_TIMEOUT, prompt_value)
+                raise
+            except TimeoutError:
+                # Section by section calls will have a go
+                self.__finish_call(call_record, cb, OUTCOME_TIMEOUT, prompt_value)
+                logger.warning("CV sections call timed out, falling back to a call per section")
+                return None
+            except (openai.APIError, LLMException) as ex:
+                self.__finish_call(call_record, cb, OUTCOME_ERROR, prompt_value)
+                raise self.__provider_failed(ex, f"CV sections for {job_data.title}")
+            except Exception:
+                self.__finish_call(call_record, cb, OUTCOME_ERROR, prompt_value)
+                raise
+
+            self.__finish_call(call_record, cb, OUTCOME_ANSWER, prompt_value, message_string)
+
+        tailored = self.__parse_json_object(answer)
+        if tailored is None:
+            logger.warning(f"Can't parse CV sections answer, falling back to a call per section\n"
+                           f"LLM answer: {message_string}")
+            return None
+
+        logger.info(f"Resume sections: {sections}\n "
+                    f"LLM tailored sections: {tailored}")
+        return tailored
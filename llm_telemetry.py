@@ -0,0 +1,421 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from config_manager import ConfigManager
+from custom_types import Job
+from model_tiers import DEFAULT_TIER
+from utils import Singleton
+
+logger = logging.getLogger("LLMTelemetry")
+
+# Histogram buckets, upper bounds, +Inf is implied
+DURATION_BUCKETS_SEC = (0.1, 0.25, 0.5, 1., 2., 5., 10., 30., 60.)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+# Whole applications, human-like delays included, bounded by the application deadline
+APPLICATION_BUCKETS_SEC = (30., 60., 120., 180., 300., 450., 600., 900.)
+
+# Call outcomes
+OUTCOME_ANSWER = "answer"
+OUTCOME_NO_DATA = "no_data"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_ERROR = "error"
+
+
+@dataclass
+class LLMCallRecord:
+    prompt_name: str
+    # Model tier the call was routed to
+    tier: str = DEFAULT_TIER
+    # Filled in by the provider router
+    provider: str = ""
+    start: float = field(default_factory=time.perf_counter)
+    wall_time_sec: float = 0.
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Usage is not reported for streams stopped early, tokens are estimated then
+    tokens_estimated: bool = False
+    # Prompt tokens served from provider's prefix cache, None if the provider didn't report usage
+    cached_prompt_tokens: int | None = None
+    cost: float = 0.
+    outcome: str = ""
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        """
+        Prometheus-style histogram, counts per bucket upper bound plus sum and count
+
+        :param buckets: Sorted bucket upper bounds, without +Inf
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """
+        :return: (upper bound, cumulative count) pairs, last one is +Inf
+        """
+        bounds = [f"{b:g}" for b in self.buckets] + ["+Inf"]
+        total = 0
+        cumulative = []
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+    def to_dict(self) -> dict:
+        return {"buckets": dict(self.cumulative()), "sum": self.sum, "count": self.count}
+
+
+@dataclass
+class ApplicationRollup:
+    title: str = ""
+    company: str = ""
+    link: str = ""
+    started: str = ""
+    status: str = ""
+    duration_sec: float = 0.
+    llm_calls: int = 0
+    llm_time_sec: float = 0.
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    cost: float = 0.
+    cache_hits: int = 0
+    # Outcome -> amount of calls
+    outcomes: dict = field(default_factory=dict)
+    # Prompt name -> LLM time spent
+    time_by_prompt: dict = field(default_factory=dict)
+
+
+class LLMTelemetry(metaclass=Singleton):
+    def __init__(self):
+        """
+        Metrics of every LLM call: wall time, tokens, cost, provider, prompt name and outcome
+
+        Keeps counters and histograms for the whole run and a rollup per job application.
+        Everything is exported to telemetry/llm_metrics.json and telemetry/llm_metrics.prom
+        (Prometheus text format, e.g. for node_exporter textfile collector),
+        rewritten in background every export_interval_sec if anything changed and after every application
+        """
+        self.config = ConfigManager()
+        self.settings = self.config.llm_settings.telemetry
+
+        self.json_path = os.path.join(os.getcwd(), self.settings.directory, "llm_metrics.json")
+        self.prometheus_path = os.path.join(os.getcwd(), self.settings.directory, "llm_metrics.prom")
+
+        self.__lock = threading.Lock()
+        self.__started = datetime.now().isoformat(timespec="seconds")
+
+        # (prompt name, provider, outcome) -> calls, time, prompt tokens, completion tokens, cost
+        self.__calls: dict[tuple[str, str, str], list] = {}
+        # Prompt name -> histograms
+        self.__duration_histograms: dict[str, Histogram] = {}
+        self.__prompt_token_histograms: dict[str, Histogram] = {}
+        # (prompt name, cache kind) -> hits
+        self.__cache_hits: dict[tuple[str, str], int] = {}
+        # (prompt name, provider) -> calls with reported usage, their prompt tokens, cached prompt tokens
+        self.__prefix_cache: dict[tuple[str, str], list] = {}
+        # Model tier -> calls, wall time, prompt tokens, completion tokens, cost, failed calls
+        self.__tiers: dict[str, list] = {}
+        self.__tier_duration_histograms: dict[str, Histogram] = {}
+
+        self.__current_application: ApplicationRollup | None = None
+        self.__current_application_start = 0.
+        self.__applications: list[ApplicationRollup] = []
+        # Status -> amount of applications, for the whole run, rollups are kept only for the last ones
+        self.__application_statuses: dict[str, int] = {}
+        # Status -> application durations, tail latency of applications
+        self.__application_histograms: dict[str, Histogram] = {}
+
+        self.__dirty = False
+        self.__export_thread: threading.Thread | None = None
+        # Background export and the one after every application write the same files
+        self.__export_lock = threading.Lock()
+
+    def start_call(self, prompt_name: str, tier: str = DEFAULT_TIER) -> LLMCallRecord:
+        """
+        :param prompt_name: answer_freely, answer_with_options, answer_batch, cv_fill_in, cv_sections
+        :param tier: Model tier the call is routed to
+        :return: Record to fill in during the call and pass to finish_call
+        """
+        return LLMCallRecord(prompt_name=prompt_name, tier=tier)
+
+    def finish_call(self, call_record: LLMCallRecord, outcome: str, prompt_tokens: int, completion_tokens: int,
+                    cost: float, tokens_estimated: bool = False) -> None:
+        """
+        Record finished LLM call
+
+        :param call_record: Record from start_call
+        :param outcome: OUTCOME_ANSWER, OUTCOME_NO_DATA, OUTCOME_TIMEOUT or OUTCOME_ERROR
+        :param prompt_tokens: Prompt tokens
+        :param completion_tokens: Completion tokens
+        :param cost: Cost in USD, as langchain calculates it
+        :param tokens_estimated: Tokens are estimated, not reported by the provider
+        """
+        call_record.wall_time_sec = time.perf_counter() - call_record.start
+        call_record.outcome = outcome
+        call_record.prompt_tokens = prompt_tokens
+        call_record.completion_tokens = completion_tokens
+        call_record.cost = cost
+        call_record.tokens_estimated = tokens_estimated
+
+        cached = "" if call_record.cached_prompt_tokens is None else f", {call_record.cached_prompt_tokens} cached"
+        tier = "" if call_record.tier == DEFAULT_TIER else f" ({call_record.tier} tier)"
+        logger.info(f"LLM call {call_record.prompt_name} via {call_record.provider or 'unknown provider'}{tier}: "
+                    f"{outcome}, {call_record.wall_time_sec:.2f} sec, "
+                    f"{prompt_tokens} + {completion_tokens} tokens{' (estimated)' if tokens_estimated else ''}"
+                    f"{cached}, cost {cost}")
+
+        if not self.settings.enabled:
+            return
+
+        with self.__lock:
+            calls = self.__calls.setdefault((call_record.prompt_name, call_record.provider, outcome),
+                                            [0, 0., 0, 0, 0.])
+            calls[0] += 1
+            calls[1] += call_record.wall_time_sec
+            calls[2] += prompt_tokens
+            calls[3] += completion_tokens
+            calls[4] += cost
+
+            self.__duration_histograms.setdefault(
+                call_record.prompt_name, Histogram(DURATION_BUCKETS_SEC)).observe(call_record.wall_time_sec)
+            self.__prompt_token_histograms.setdefault(
+                call_record.prompt_name, Histogram(TOKEN_BUCKETS)).observe(prompt_tokens)
+
+            tier = self.__tiers.setdefault(call_record.tier, [0, 0., 0, 0, 0., 0])
+            tier[0] += 1
+            tier[1] += call_record.wall_time_sec
+            tier[2] += prompt_tokens
+            tier[3] += completion_tokens
+            tier[4] += cost
+            tier[5] += outcome in (OUTCOME_ERROR, OUTCOME_TIMEOUT)
+            self.__tier_duration_histograms.setdefault(
+                call_record.tier, Histogram(DURATION_BUCKETS_SEC)).observe(call_record.wall_time_sec)
+
+            # Hit rate is only known for calls with reported usage, streams stopped early don't have it
+            if call_record.cached_prompt_tokens is not None and not tokens_estimated:
+                prefix_cache = self.__prefix_cache.setdefault((call_record.prompt_name, call_record.provider),
+                                                              [0, 0, 0])
+                prefix_cache[0] += 1
+                prefix_cache[1] += prompt_tokens
+                prefix_cache[2] += call_record.cached_prompt_tokens
+
+            application = self.__current_application
+            if application is not None:
+                application.llm_calls += 1
+                application.llm_time_sec += call_record.wall_time_sec
+                application.prompt_tokens += prompt_tokens
+                application.completion_tokens += completion_tokens
+                application.cached_prompt_tokens += call_record.cached_prompt_tokens or 0
+                application.cost += cost
+                application.outcomes[outcome] = application.outcomes.get(outcome, 0) + 1
+                application.time_by_prompt[call_record.prompt_name] = (
+                        application.time_by_prompt.get(call_record.prompt_name, 0.) + call_record.wall_time_sec)
+
+            self.__mark_dirty()
+
+    def record_cache_hit(self, prompt_name: str, cache: str) -> None:
+        """
+        Record LLM call that wasn't made thanks to a cache
+
+        :param prompt_name: Prompt that would be used
+        :param cache: Which cache answered, e.g. "exact" or "semantic"
+        """
+        if not self.settings.enabled:
+            return
+
+        with self.__lock:
+            self.__cache_hits[(prompt_name, cache)] = self.__cache_hits.get((prompt_name, cache), 0) + 1
+            if self.__current_application is not None:
+                self.__current_application.cache_hits += 1
+            self.__mark_dirty()
+
+    def begin_application(self, job: Job) -> None:
+        """
+        Start per-application rollup, every call until end_application is counted to this job
+
+        :param job: Job that is being applied to
+        """
+        with self.__lock:
+            self.__current_application = ApplicationRollup(title=job.title, company=job.company, link=job.link,
+                                                           started=datetime.now().isoformat(timespec="seconds"))
+            self.__current_application_start = time.perf_counter()
+
+    def end_application(self, status: str) -> None:
+        """
+        Finish per-application rollup and export everything
+
+        :param status: How it went, e.g. "success" or "failed"
+        """
+        with self.__lock:
+            application = self.__current_application
+            if application is None:
+                return
+
+            application.status = status
+            application.duration_sec = time.perf_counter() - self.__current_application_start
+            self.__applications.append(application)
+            self.__application_statuses[status] = self.__application_statuses.get(status, 0) + 1
+            self.__application_histograms.setdefault(
+                status, Histogram(APPLICATION_BUCKETS_SEC)).observe(application.duration_sec)
+            del self.__applications[:-self.settings.keep_applications]
+            self.__current_application = None
+
+        logger.info(f"Application to {application.title} ({application.company}) {status}: "
+                    f"{application.duration_sec:.1f} sec, LLM {application.llm_calls} calls "
+                    f"{application.llm_time_sec:.1f} sec, {application.prompt_tokens} + "
+                    f"{application.completion_tokens} tokens ({application.cached_prompt_tokens} cached), "
+                    f"cost {application.cost:.4f}, "
+                    f"cache hits {application.cache_hits}")
+
+        if self.settings.enabled:
+            self.export()
+
+    def __mark_dirty(self) -> None:
+        """
+        Remember there's something to export and make sure background export is running, lock must be held
+        """
+        self.__dirty = True
+        if self.__export_thread is None:
+            self.__export_thread = threading.Thread(target=self.__export_loop, name="LLMTelemetryExport",
+                                                    daemon=True)
+            self.__export_thread.start()
+
+    def __export_loop(self) -> None:
+        while True:
+            time.sleep(self.settings.export_interval_sec)
+            if self.__dirty:
+                self.export()
+
+    def snapshot(self) -> dict:
+        """
+        :return: Everything collected, JSON-serializable
+        """
+        with self.__lock:
+            return {
+                "started": self.__started,
+                "updated": datetime.now().isoformat(timespec="seconds"),
+                "calls": [{"prompt": prompt_name, "provider": provider, "outcome": outcome,
+                           "calls": calls, "wall_time_sec": wall_time, "prompt_tokens": prompt_tokens,
+                           "completion_tokens": completion_tokens, "cost": cost}
+                          for (prompt_name, provider, outcome), (calls, wall_time, prompt_tokens,
+                                                                 completion_tokens, cost)
+                          in self.__calls.items()],
+                "duration_histograms_sec": {k: h.to_dict() for k, h in self.__duration_histograms.items()},
+                "prompt_token_histograms": {k: h.to_dict() for k, h in self.__prompt_token_histograms.items()},
+                "cache_hits": [{"prompt": prompt_name, "cache": cache, "hits": hits}
+                               for (prompt_name, cache), hits in self.__cache_hits.items()],
+                "prefix_cache": [{"prompt": prompt_name, "provider": provider, "calls": calls,
+                                  "prompt_tokens": prompt_tokens, "cached_prompt_tokens": cached,
+                                  "hit_rate": cached / prompt_tokens if prompt_tokens else 0.}
+                                 for (prompt_name, provider), (calls, prompt_tokens, cached)
+                                 in self.__prefix_cache.items()],
+                "application_duration_histograms_sec": {k: h.to_dict()
+                                                        for k, h in self.__application_histograms.items()},
+                "tiers": [{"tier": tier, "calls": calls, "wall_time_sec": wall_time, "prompt_tokens": prompt_tokens,
+                           "completion_tokens": completion_tokens, "cost": cost, "failed_calls": failed,
+                           "mean_wall_time_sec": wall_time / calls if calls else 0.,
+                           "mean_cost": cost / calls if calls else 0.}
+                          for tier, (calls, wall_time, prompt_tokens, completion_tokens, cost, failed)
+                          in self.__tiers.items()],
+                "tier_duration_histograms_sec": {k: h.to_dict() for k, h in self.__tier_duration_histograms.items()},
+                "current_application": (asdict(self.__current_application)
+                                        if self.__current_application is not None else None),
+                "applications": [asdict(a) for a in self.__applications],
+            }
+
+    def prometheus_text(self) -> str:
+        """
+        :return: Run-wide metrics in Prometheus text exposition format
+        """
+        lines = []
+
+        def labels(**kwargs) -> str:
+            return "{" + ",".join(f'{k}="{v}"' for k, v in kwargs.items()) + "}"
+
+        def counter(name: str, help_text: str, values: list[tuple[str, float]]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{name}{label} {value:g}" for label, value in values)
+
+        def histogram(name: str, help_text: str, histograms: dict[str, Histogram], label: str = "prompt") -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, h in histograms.items():
+                for bound, count in h.cumulative():
+                    lines.append(f"{name}_bucket{labels(**{label: key, 'le': bound})} {count}")
+                lines.append(f"{name}_sum{labels(**{label: key})} {h.sum:g}")
+                lines.append(f"{name}_count{labels(**{label: key})} {h.count}")
+
+        with self.__lock:
+            call_labels = [(labels(prompt=p, provider=pr, outcome=o), v) for (p, pr, o), v in self.__calls.items()]
+            counter("llm_calls_total", "LLM calls", [(la, v[0]) for la, v in call_labels])
+            counter("llm_call_seconds_total", "Wall time of LLM calls", [(la, v[1]) for la, v in call_labels])
+            counter("llm_prompt_tokens_total", "Prompt tokens", [(la, v[2]) for la, v in call_labels])
+            counter("llm_completion_tokens_total", "Completion tokens", [(la, v[3]) for la, v in call_labels])
+            counter("llm_cost_usd_total", "LLM cost", [(la, v[4]) for la, v in call_labels])
+            counter("llm_cache_hits_total", "LLM calls answered from a cache",
+                    [(labels(prompt=p, cache=c), v) for (p, c), v in self.__cache_hits.items()])
+            prefix_labels = [(labels(prompt=p, provider=pr), v) for (p, pr), v in self.__prefix_cache.items()]
+            counter("llm_usage_reported_calls_total", "LLM calls with usage reported by the provider",
+                    [(la, v[0]) for la, v in prefix_labels])
+            counter("llm_usage_reported_prompt_tokens_total", "Prompt tokens of LLM calls with usage reported",
+                    [(la, v[1]) for la, v in prefix_labels])
+            counter("llm_prompt_tokens_cached_total", "Prompt tokens served from provider's prefix cache",
+                    [(la, v[2]) for la, v in prefix_labels])
+            histogram("llm_call_duration_seconds", "Wall time of LLM calls", self.__duration_histograms)
+            histogram("llm_prompt_tokens", "Prompt tokens per LLM call", self.__prompt_token_histograms)
+            tier_labels = [(labels(tier=t), v) for t, v in self.__tiers.items()]
+            counter("llm_tier_calls_total", "LLM calls per model tier", [(la, v[0]) for la, v in tier_labels])
+            counter("llm_tier_call_seconds_total", "Wall time of LLM calls per model tier",
+                    [(la, v[1]) for la, v in tier_labels])
+            counter("llm_tier_prompt_tokens_total", "Prompt tokens per model tier",
+                    [(la, v[2]) for la, v in tier_labels])
+            counter("llm_tier_completion_tokens_total", "Completion tokens per model tier",
+                    [(la, v[3]) for la, v in tier_labels])
+            counter("llm_tier_cost_usd_total", "LLM cost per model tier", [(la, v[4]) for la, v in tier_labels])
+            counter("llm_tier_failed_calls_total", "Failed and timed out LLM calls per model tier",
+                    [(la, v[5]) for la, v in tier_labels])
+            histogram("llm_tier_call_duration_seconds", "Wall time of LLM calls per model tier",
+                      self.__tier_duration_histograms, label="tier")
+            counter("llm_applications_total", "Finished job applications",
+                    [(labels(status=s), v) for s, v in self.__application_statuses.items()])
+            histogram("llm_application_duration_seconds", "Wall time of job applications",
+                      self.__application_histograms, label="status")
+
+        return "".join(f"{line}\n" for line in lines)
+
+    def export(self) -> None:
+        """
+        Rewrite JSON and Prometheus files, through temporary files, so readers never see a half-written one.
+        Metrics are not worth stopping the bot for, so a failed write is only logged
+        """
+        with self.__export_lock:
+            self.__dirty = False
+
+            try:
+                os.makedirs(os.path.dirname(self.json_path), exist_ok=True)
+
+                for path, text in ((self.json_path, json.dumps(self.snapshot(), indent=2)),
+                                   (self.prometheus_path, self.prometheus_text())):
+                    tmp_path = f"{path}.tmp"
+                    with open(tmp_path, "w", encoding="UTF-8") as f:
+                        f.write(text)
+                    os.replace(tmp_path, path)
+            except OSError as ex:
+                # Next background export will try again
+                self.__dirty = True
+                logger.warning(f"Can't export LLM telemetry: {ex}")
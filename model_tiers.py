@@ -0,0 +1,70 @@
+import logging
+from custom_types import FieldTypeEnum, TierRouteSettings
+
+logger = logging.getLogger("ModelTiers")
+
+# Tier of router.providers, where every call goes unless a route says otherwise
+DEFAULT_TIER = "default"
+
+
+class ModelTierRouter:
+    def __init__(self, routes: list[TierRouteSettings], tiers: set[str]):
+        """
+        Picks model tier for a call from the routing table in llm_settings.yaml
+
+        :param routes: Routes, in priority order
+        :param tiers: Names of the configured tiers, routes to other tiers are dropped
+        """
+        self.routes = []
+        for route in routes:
+            if route.tier not in tiers:
+                logger.warning(f"Route to unknown model tier {route.tier} is ignored")
+                continue
+            self.routes.append(route)
+
+        # Tier -> amount of calls routed to it
+        self.routed: dict[str, int] = {}
+
+    @staticmethod
+    def __question_matches(route: TierRouteSettings, field_type: FieldTypeEnum | None, question: str,
+                           options: list[str] | None) -> bool:
+        if route.field_type is not None and (field_type is None or field_type.name.lower() != route.field_type):
+            return False
+        if route.max_question_chars is not None and len(question) > route.max_question_chars:
+            return False
+        if route.max_options is not None and options is not None and len(options) > route.max_options:
+            return False
+        return True
+
+    def __matches(self, route: TierRouteSettings, prompt_name: str,
+                  questions: list[tuple[FieldTypeEnum | None, str, list[str] | None]]) -> bool:
+        if route.prompt is not None and route.prompt != prompt_name:
+            return False
+
+        has_question_conditions = (route.field_type is not None or route.max_question_chars is not None
+                                   or route.max_options is not None)
+        if not has_question_conditions:
+            return True
+        # Complexity of a call without questions (e.g. CV rewrite) is unknown, it's not simple then
+        return bool(questions) and all(self.__question_matches(route, *q) for q in questions)
+
+    def route(self, prompt_name: str,
+              questions: list[tuple[FieldTypeEnum | None, str, list[str] | None]] | None = None) -> str:
+        """
+        :param prompt_name: answer_freely, answer_with_options, answer_batch, cv_fill_in, cv_sections
+        :param questions: (field type, question, options) of every question in the call, field type and options
+                          may be None if unknown or there are none
+        :return: Tier name
+        """  # noqa
+        questions = questions or []
+        tier = next((r.tier for r in self.routes if self.__matches(r, prompt_name, questions)), DEFAULT_TIER)
+        self.routed[tier] = self.routed.get(tier, 0) + 1
+        return tier
+
+    def stats(self) -> str:
+        """
+        :return: Human-readable routing stats
+        """
+        return "Calls routed to model tiers: " + (", ".join(f"{tier} {calls}" for tier, calls in
+                                                            sorted(self.routed.items(), key=lambda r: -r[1]))
+                                                  or "none")
@@ -0,0 +1,65 @@
+import difflib
+import json
+import re
+
+# Appended to numbered options in single question prompts, prompts.yaml examples may still show option text
+NUMBERED_OPTIONS_HINT = "Answer with the number of the option only."
+
+
+def format_options(options: list[str], numbered: bool = True) -> str:
+    """
+    :param options: Options to choose from
+    :param numbered: Number options, so the LLM answers with a number instead of echoing the text
+    :return: Options for a prompt, e.g. {"1": "Yes", "2": "No"}
+    """
+    if not numbered:
+        return str(options)
+    return json.dumps({str(i): option for i, option in enumerate(options, start=1)}, ensure_ascii=False)
+
+
+def resolve_option(answer: str, options: list[str], fuzzy_cutoff: float = 0.8, numbered: bool = True) -> str | None:
+    """
+    Map LLM answer back to the exact option text
+
+    Tried in order: exact text, text ignoring case and punctuation, option number (numbered prompts only),
+    closest text by similarity, option named in a longer answer ("Yes, I am" -> "Yes").
+    Text goes first, options are often numbers themselves (["0", "1", "2", "3+"]),
+    and prompts.yaml examples answer with option text even when options are numbered
+
+    :param answer: LLM answer
+    :param options: Options to choose from
+    :param fuzzy_cutoff: Min similarity (0 to 1) of the closest text
+    :param numbered: Options were numbered in the prompt (see format_options)
+    :return: Option, None if the answer can't be mapped to one
+    """
+    if not options:
+        return None
+
+    answer = answer.strip()
+    if answer in options:
+        return answer
+
+    def normalize(text: str) -> str:
+        return " ".join(re.sub(r"[^\w+#]+", " ", text.casefold()).split())
+
+    normalized_answer = normalize(answer)
+    normalized_options = [normalize(o) for o in options]
+    if normalized_answer in normalized_options:
+        return options[normalized_options.index(normalized_answer)]
+
+    # Options are numbered from 1, "2", "2.", "[2]", "Option 2" all mean the second one
+    if numbered and (number := re.fullmatch(r"(?:option\s*)?[\[(]?(\d+)[\].)]?", answer, re.IGNORECASE)):
+        if 1 <= int(number[1]) <= len(options):
+            return options[int(number[1]) - 1]
+
+    # Typos, "no prefrence" -> "No preference"
+    closest = difflib.get_close_matches(normalized_answer, normalized_options, n=1, cutoff=fuzzy_cutoff)
+    if closest:
+        return options[normalized_options.index(closest[0])]
+
+    # Longest option named in the answer as whole words, "No" shouldn't win over "No preference"
+    named = [(len(o), i) for i, o in enumerate(normalized_options)
+             if o and re.search(rf"(?<!\w){re.escape(o)}(?!\w)", normalized_answer)]
+    if named:
+        return options[max(named)[1]]
+    return None
@@ -0,0 +1,183 @@
+import atexit
+import base64
+import logging
+import threading
+import time
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from custom_exceptions import CVManagerException, CustomExceptionData
+
+logger = logging.getLogger("PdfRenderer")
+
+# Same as pyhtml2pdf, what CVs were printed with before
+DEFAULT_PRINT_OPTIONS = {
+    "landscape": False,
+    "displayHeaderFooter": False,
+    "printBackground": True,
+    "preferCSSPageSize": True,
+}
+
+
+class PdfRenderer:
+    def __init__(self, print_options: dict | None = None, render_timeout_sec: float = 30.,
+                 max_renders: int = 200):
+        """
+        HTML to PDF with one long-lived headless Chrome, instead of a fresh browser for every CV
+
+        Browser is launched once (in the background with start_in_background, or on the first render),
+        HTML is loaded from memory and printed with CDP Page.printToPDF. Browser that stops responding
+        is restarted, and it's restarted every max_renders renders anyway, so its memory doesn't grow forever
+
+        Automation Chrome is not used for that, the bot is in the middle of an application form in it,
+        and its window has to stay where it is
+
+        :param print_options: Page.printToPDF parameters on top of DEFAULT_PRINT_OPTIONS
+        :param render_timeout_sec: Max time to load the HTML (fonts included) and print it
+        :param max_renders: Renders before the browser is restarted
+        """
+        self.print_options = DEFAULT_PRINT_OPTIONS | (print_options or {})
+        self.render_timeout_sec = render_timeout_sec
+        self.max_renders = max_renders
+
+        self.exception_data = CustomExceptionData()
+
+        self.driver: webdriver.Chrome | None = None
+        self.renders = 0
+        self.restarts = 0
+
+        self.__lock = threading.Lock()
+        self.__renders_since_start = 0
+        self.__exit_hook_registered = False
+
+    def __launch(self) -> None:
+        start = time.perf_counter()
+
+        options = webdriver.ChromeOptions()
+        # Mostly the arguments pyhtml2pdf used, so it runs wherever conversion used to
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-extensions")
+        # Nothing to download while rendering but the fonts of the page
+        options.add_experimental_option("prefs", {"profile.default_content_settings": {"images": 2}})
+
+        self.driver = webdriver.Chrome(options=options)
+        self.driver.set_page_load_timeout(self.render_timeout_sec)
+        self.driver.set_script_timeout(self.render_timeout_sec)
+        self.__renders_since_start = 0
+
+        if not self.__exit_hook_registered:
+            # Without the lock, a render stuck in a daemon thread shouldn't hang the exit
+            atexit.register(self.__quit)
+            self.__exit_hook_registered = True
+
+        logger.info(f"Headless Chrome for PDF rendering launched in {time.perf_counter() - start:.2f} sec")
+
+    def __quit(self) -> None:
+        if self.driver is None:
+            return
+        try:
+            self.driver.quit()
+        # Browser is most likely dead already, that's why it's quit
+        except Exception as ex:  # noqa
+            logger.debug(f"Could not quit headless Chrome: {ex}")
+        self.driver = None
+
+    def __is_healthy(self) -> bool:
+        if self.driver is None:
+            return False
+        try:
+            self.driver.execute_cdp_cmd("Browser.getVersion", {})
+            return True
+        except WebDriverException:
+            return False
+
+    def is_healthy(self) -> bool:
+        """
+        :return: Whether the browser is up and responds to CDP commands
+        """
+        with self.__lock:
+            return self.__is_healthy()
+
+    def __restart(self) -> None:
+        self.__quit()
+        self.restarts += 1
+        self.__launch()
+
+    def __ensure_browser(self) -> None:
+        if self.driver is None:
+            self.__launch()
+        elif self.__renders_since_start >= self.max_renders:
+            logger.info(f"Restarting headless Chrome after {self.__renders_since_start} renders")
+            self.__restart()
+        elif not self.__is_healthy():
+            logger.warning("Headless Chrome is not responding, restarting it")
+            self.__restart()
+
+    def start(self) -> None:
+        """
+        Launch the browser now instead of on the first render
+        """
+        with self.__lock:
+            self.__ensure_browser()
+
+    def start_in_background(self) -> threading.Thread:
+        """
+        Launch the browser in a background thread, renders wait for it
+
+        :return: The thread
+        """
+
+        def launch():
+            try:
+                self.start()
+            # The first render will try again
+            except Exception as ex:  # noqa
+                logger.warning(f"Could not launch headless Chrome for PDF rendering: {ex}")
+
+        thread = threading.Thread(target=launch, name="PdfRenderer", daemon=True)
+        thread.start()
+        return thread
+
+    def __print(self, html: str) -> bytes:
+        # Data URL keeps the HTML in memory, get() waits for the load event, so stylesheets are there
+        self.driver.get("data:text/html;charset=utf-8;base64," + base64.b64encode(html.encode("UTF-8")).decode())
+        # Web fonts may still be loading after the load event
+        self.driver.execute_async_script("document.fonts.ready.then(() => arguments[arguments.length - 1]())")
+        result = self.driver.execute_cdp_cmd("Page.printToPDF", self.print_options)
+        return base64.b64decode(result["data"])
+
+    def render(self, html: str) -> bytes:
+        """
+        Render HTML to PDF, restarting the browser once if rendering fails
+
+        :param html: Whole HTML document
+        :return: PDF file contents
+        """
+        with self.__lock:
+            start = time.perf_counter()
+            try:
+                self.__ensure_browser()
+                pdf = self.__print(html)
+            except WebDriverException as ex:
+                logger.warning(f"PDF rendering failed, restarting headless Chrome: {ex.msg}")
+                try:
+                    self.__restart()
+                    pdf = self.__print(html)
+                except WebDriverException as retry_ex:
+                    self.__quit()
+                    self.exception_data.reason = f"Could not render CV to PDF: {retry_ex.msg}"
+                    raise CVManagerException(self.exception_data.reason, self.exception_data)
+
+            self.renders += 1
+            self.__renders_since_start += 1
+            logger.info(f"CV rendered to PDF in {time.perf_counter() - start:.2f} sec")
+            return pdf
+
+    def close(self) -> None:
+        """
+        Quit the browser, the next render launches a new one
+        """
+        with self.__lock:
+            self.__quit()
@@ -0,0 +1,167 @@
+from langchain_core.prompts import ChatPromptTemplate, FewShotChatMessagePromptTemplate
+import string
+import threading
+from custom_types import *
+from example_selector import SimilarExampleSelector
+
+# Prompt variables that are the same for every call (until user_info.yaml changes)
+CONSTANT_VARIABLES = ("resume",)
+
+
+def split_constant_head(user_message_template: str) -> tuple[str, str]:
+    """
+    Split user message template into the head with constant variables only, e.g. "Resume:\n{resume}",
+    and the rest with per-call variables
+
+    :param user_message_template: User message template from config
+    :return: Head and the rest, empty head if the template starts with a per-call variable
+    """
+    head_end = 0
+    position = 0
+    for literal, variable, format_spec, conversion in string.Formatter().parse(user_message_template):
+        if variable is None:
+            break
+        # Variables are rebuilt below without format spec or conversion, don't bother with those
+        if variable not in CONSTANT_VARIABLES or format_spec or conversion:
+            break
+        position = user_message_template.index("{" + variable + "}", position) + len(variable) + 2
+        head_end = position
+
+    return user_message_template[:head_end], user_message_template[head_end:].lstrip()
+
+
+def build_prompt(config_manager_prompt: FewShotPrompt, prompt_example_mode: int = 0,
+                 prefix_cache: bool = False, examples_settings: ExamplesSettings | None = None) -> ChatPromptTemplate:
+    """
+    Build prompt, essentially getting from config
+
+    With prefix_cache, constant head of the user message (the resume) is moved to the end of the system message,
+    so system message, resume and examples are the same bytes in every call and providers can cache them,
+    only the question is left for the last message
+
+    :param config_manager_prompt: prompt object from config
+    :param prompt_example_mode: 0 zer shot, 1 one shot, 2 few shots, 3 few shots most similar to the question
+    :param prefix_cache: Lay out messages for provider prefix caching
+    :param examples_settings: Limits of similar examples selection, defaults if None
+    :return: langchain's ChatPromptTemplate
+    """  # noqa
+    system_message = config_manager_prompt.system_message
+    user_message_template = config_manager_prompt.user_message_template
+
+    if prefix_cache:
+        head, rest = split_constant_head(user_message_template)
+        if head:
+            system_message = f"{system_message}\n\n{head}"
+            user_message_template = rest
+
+    example_prompt = ChatPromptTemplate.from_messages([
+        ("user", "{input}"),
+        ("ai", "{output}")
+    ])
+
+    match prompt_example_mode:
+        case 0:
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", system_message),
+                ("human", user_message_template)
+            ])
+
+        case 1:
+            single_shot = [{"input": ex.user_message, "output": ex.ai_message} for ex in
+                           (config_manager_prompt.examples or [])[:1]]
+
+            single_shot_prompt = FewShotChatMessagePromptTemplate(
+                example_prompt=example_prompt,
+                examples=single_shot
+            )
+
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", system_message),
+                single_shot_prompt,
+                ("human", user_message_template)
+            ])
+
+        case 2:
+            few_shot = [{"input": ex.user_message, "output": ex.ai_message} for ex in
+                        config_manager_prompt.examples]
+
+            few_shot_prompt = FewShotChatMessagePromptTemplate(
+                example_prompt=example_prompt,
+                examples=few_shot
+            )
+
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", system_message),
+                few_shot_prompt,
+                ("human", user_message_template)
+            ])
+
+        case 3:
+            examples_settings = examples_settings or ExamplesSettings()
+            # Selector index is built here once, and rebuilt only when prompts.yaml changes
+            similar_shot_prompt = FewShotChatMessagePromptTemplate(
+                example_prompt=example_prompt,
+                example_selector=SimilarExampleSelector(
+                    [{"input": ex.user_message, "output": ex.ai_message} for ex in
+                     config_manager_prompt.examples or []],
+                    query_template=split_constant_head(config_manager_prompt.user_message_template)[1],
+                    top_k=examples_settings.top_k,
+                    token_budget=examples_settings.token_budget,
+                    cache_size=examples_settings.cache_size),
+                input_variables=[]
+            )
+
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", system_message),
+                similar_shot_prompt,
+                ("human", user_message_template)
+            ])
+
+        case _:
+            raise
+
+    return prompt
+
+
+class PromptRegistry:
+    def __init__(self):
+        """
+        Compiled prompt templates, every (prompt, example mode) pair is built once
+
+        Prompt objects from config are replaced when prompts.yaml is reloaded,
+        pass config's prompts version, and registry will drop everything compiled from the old ones
+        """
+        self.__lock = threading.Lock()
+        # (prompt object id, example mode, prefix cache layout) -> (prompt object, compiled template)
+        # Prompt object is kept alive, so its id can't be reused by another object
+        self.__compiled: dict[tuple[int, int, bool], tuple[FewShotPrompt, ChatPromptTemplate]] = {}
+        self.__version = None
+
+    def get(self, config_manager_prompt: FewShotPrompt, prompt_example_mode: int = 0,
+            version: int = 0, prefix_cache: bool = False,
+            examples_settings: ExamplesSettings | None = None) -> ChatPromptTemplate:
+        """
+        Get compiled prompt, build it if it's the first time
+
+        :param config_manager_prompt: prompt object from config
+        :param prompt_example_mode: 0 zer shot, 1 one shot, 2 few shots, 3 few shots most similar to the question
+        :param version: Version of the prompts config
+        :param prefix_cache: Lay out messages for provider prefix caching
+        :param examples_settings: Limits of similar examples selection, defaults if None
+        :return: langchain's ChatPromptTemplate
+        """  # noqa
+        key = (id(config_manager_prompt), prompt_example_mode, prefix_cache)
+
+        with self.__lock:
+            if version != self.__version:
+                self.__compiled.clear()
+                self.__version = version
+
+            compiled = self.__compiled.get(key)
+            if compiled is None or compiled[0] is not config_manager_prompt:
+                compiled = (config_manager_prompt,
+                            build_prompt(config_manager_prompt, prompt_example_mode, prefix_cache,
+                                         examples_settings))
+                self.__compiled[key] = compiled
+
+        return compiled[1]
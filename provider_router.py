@@ -0,0 +1,353 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from custom_exceptions import LLMException, CustomExceptionData
+
+logger = logging.getLogger("ProviderRouter")
+
+# Request kinds, latency of a whole response and of the first streamed chunk are tracked separately
+RESPONSE = "response"
+FIRST_CHUNK = "first_chunk"
+
+
+class ProviderStats:
+    def __init__(self, window: int, window_sec: float):
+        """
+        Rolling window of call outcomes of a single provider
+
+        :param window: Max amount of calls to keep
+        :param window_sec: Calls older than that are forgotten, so a failed provider gets another chance
+        """
+        self.window_sec = window_sec
+        self.__lock = threading.Lock()
+        # (timestamp, kind, latency, ok)
+        self.__samples: deque[tuple[float, str, float, bool]] = deque(maxlen=window)
+
+    def record(self, kind: str, latency: float, ok: bool) -> None:
+        with self.__lock:
+            self.__samples.append((time.monotonic(), kind, latency, ok))
+
+    def __recent(self) -> list[tuple[float, str, float, bool]]:
+        oldest = time.monotonic() - self.window_sec
+        with self.__lock:
+            while self.__samples and self.__samples[0][0] < oldest:
+                self.__samples.popleft()
+            return list(self.__samples)
+
+    def latency_quantile(self, kind: str, quantile: float) -> float | None:
+        """
+        :param kind: RESPONSE or FIRST_CHUNK, the other kind is used if there's no data for this one
+        :param quantile: 0.5 for median, 0.95 for p95 and so on
+        :return: Latency quantile of successful calls, None if there are none
+        """
+        samples = self.__recent()
+        latencies = sorted(s[2] for s in samples if s[3] and s[1] == kind)
+        if not latencies:
+            latencies = sorted(s[2] for s in samples if s[3])
+        if not latencies:
+            return None
+        return latencies[min(int(quantile * len(latencies)), len(latencies) - 1)]
+
+    def error_rate(self) -> float:
+        samples = self.__recent()
+        return sum(not s[3] for s in samples) / len(samples) if samples else 0.
+
+    def __len__(self):
+        return len(self.__recent())
+
+
+class ProviderRouter:
+    def __init__(self, providers: dict, window: int = 50, window_sec: float = 300., min_samples: int = 3,
+                 max_error_rate: float = 0.5, hedge_quantile: float = 0.95, hedge_default_delay_sec: float = 3.):
+        """
+        Sends every call to the fastest healthy provider, same interface as a single chat wrapper
+
+        Providers with fewer than min_samples recent calls are tried first, so every provider gets measured.
+        Failed call is retried with the next provider. Hedged calls fire the second best provider
+        if the first one didn't answer within its p95 latency, the first answer wins
+
+        :param providers: Provider name -> chat wrapper (invoke, ainvoke, stream, astream)
+        :param window: Max amount of calls per provider in the rolling window
+        :param window_sec: Max age of calls in the rolling window
+        :param min_samples: Calls needed before provider's latency is trusted
+        :param max_error_rate: Providers with higher error rate are used only if there's nothing else
+        :param hedge_quantile: Latency quantile of the primary provider to wait before hedging
+        :param hedge_default_delay_sec: Delay before hedging while there's not enough data
+        """
+        self.providers = providers
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.hedge_quantile = hedge_quantile
+        self.hedge_default_delay_sec = hedge_default_delay_sec
+
+        self.provider_stats = {name: ProviderStats(window, window_sec) for name in providers}
+
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+
+        self.__executor: ThreadPoolExecutor | None = None
+
+    def ranked(self, kind: str = RESPONSE) -> list[str]:
+        """
+        :param kind: RESPONSE or FIRST_CHUNK
+        :return: Provider names, best first
+        """
+        def rank(name):
+            stats = self.provider_stats[name]
+            if stats.error_rate() > self.max_error_rate:
+                return 2, stats.error_rate()
+            if len(stats) < self.min_samples:
+                return 0, len(stats)
+            return 1, stats.latency_quantile(kind, 0.5) or 0.
+
+        return sorted(self.providers, key=rank)
+
+    def __hedge_delay(self, name: str) -> float:
+        delay = None
+        if len(self.provider_stats[name]) >= self.min_samples:
+            delay = self.provider_stats[name].latency_quantile(RESPONSE, self.hedge_quantile)
+        return delay if delay is not None else self.hedge_default_delay_sec
+
+    def __timed_invoke(self, name: str, messages):
+        start = time.perf_counter()
+        try:
+            result = self.providers[name].invoke(messages)
+        except Exception:
+            self.provider_stats[name].record(RESPONSE, time.perf_counter() - start, False)
+            raise
+        self.provider_stats[name].record(RESPONSE, time.perf_counter() - start, True)
+        return result
+
+    @staticmethod
+    def __served_by(call_record, name: str) -> None:
+        if call_record is not None:
+            call_record.provider = name
+
+    @staticmethod
+    def __all_failed(last_exception: Exception) -> LLMException:
+        """
+        :param last_exception: Exception of the last provider tried
+        :return: LLMException to raise when every provider failed, SDK errors shouldn't get past the router
+        """
+        if isinstance(last_exception, LLMException):
+            return last_exception
+        exception_data = CustomExceptionData(reason=f"Every LLM provider failed, the last one with: {last_exception}")
+        exception = LLMException(exception_data.reason, exception_data)
+        exception.__cause__ = last_exception
+        return exception
+
+    async def __timed_ainvoke(self, name: str, messages):
+        start = time.perf_counter()
+        try:
+            result = await self.providers[name].ainvoke(messages)
+        except asyncio.CancelledError:
+            # Lost the hedge race or timed out, says nothing about the provider
+            raise
+        except Exception:
+            self.provider_stats[name].record(RESPONSE, time.perf_counter() - start, False)
+            raise
+        self.provider_stats[name].record(RESPONSE, time.perf_counter() - start, True)
+        return result
+
+    def invoke(self, messages, hedge: bool = False, call_record=None):
+        """
+        :param messages: Prompt
+        :param hedge: Fire the second best provider if the best one is slower than usual
+        :param call_record: Anything with a provider attribute, set to the name of the provider that answered
+        :return: Langchain's AIMessage
+        """
+        ranked = self.ranked()
+        if hedge and len(ranked) > 1:
+            return self.__hedged_invoke(ranked, messages, call_record)
+
+        return self.__invoke_with_failover(ranked, messages, call_record)
+
+    def __invoke_with_failover(self, names: list[str], messages, call_record):
+        last_exception = None
+        for name in names:
+            try:
+                result = self.__timed_invoke(name, messages)
+                self.__served_by(call_record, name)
+                return result
+            except Exception as ex:
+                logger.warning(f"Provider {name} failed, trying next one: {ex}")
+                last_exception = ex
+        raise self.__all_failed(last_exception)
+
+    def __hedged_invoke(self, ranked: list[str], messages, call_record):
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(max_workers=2 * len(self.providers),
+                                                 thread_name_prefix="ProviderRouter")
+
+        primary, secondary = ranked[0], ranked[1]
+        delay = self.__hedge_delay(primary)
+
+        # Calls run in the caller's context, so langchain callbacks (cost and tokens) see them
+        futures = {self.__executor.submit(contextvars.copy_context().run,
+                                          self.__timed_invoke, primary, messages): primary}
+        done, _ = wait(futures, timeout=delay)
+
+        if not done:
+            logger.info(f"Provider {primary} is slower than {delay:.2f} sec, hedging with {secondary}")
+            self.hedged_calls += 1
+            futures[self.__executor.submit(contextvars.copy_context().run,
+                                           self.__timed_invoke, secondary, messages)] = secondary
+
+        last_exception = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if futures[future] != primary:
+                        self.hedge_wins += 1
+                    self.__served_by(call_record, futures[future])
+                    # Slower call can't be stopped, it finishes in background and still counts for stats
+                    return future.result()
+                logger.warning(f"Provider {futures[future]} failed: {future.exception()}")
+                last_exception = future.exception()
+
+            # Primary failed before the hedge was fired, plain failover then
+            if not pending and len(futures) == 1:
+                return self.__invoke_with_failover(ranked[1:], messages, call_record)
+
+        raise self.__all_failed(last_exception)
+
+    async def ainvoke(self, messages, hedge: bool = False, call_record=None):
+        """
+        Async version of invoke, losing hedged call is cancelled
+
+        :param messages: Prompt
+        :param hedge: Fire the second best provider if the best one is slower than usual
+        :param call_record: Anything with a provider attribute, set to the name of the provider that answered
+        :return: Langchain's AIMessage
+        """
+        ranked = self.ranked()
+        if hedge and len(ranked) > 1:
+            return await self.__hedged_ainvoke(ranked, messages, call_record)
+
+        return await self.__ainvoke_with_failover(ranked, messages, call_record)
+
+    async def __ainvoke_with_failover(self, names: list[str], messages, call_record):
+        last_exception = None
+        for name in names:
+            try:
+                result = await self.__timed_ainvoke(name, messages)
+                self.__served_by(call_record, name)
+                return result
+            except Exception as ex:
+                logger.warning(f"Provider {name} failed, trying next one: {ex}")
+                last_exception = ex
+        raise self.__all_failed(last_exception)
+
+    async def __hedged_ainvoke(self, ranked: list[str], messages, call_record):
+        primary, secondary = ranked[0], ranked[1]
+        delay = self.__hedge_delay(primary)
+
+        tasks = {asyncio.create_task(self.__timed_ainvoke(primary, messages)): primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+
+            if not done:
+                logger.info(f"Provider {primary} is slower than {delay:.2f} sec, hedging with {secondary}")
+                self.hedged_calls += 1
+                tasks[asyncio.create_task(self.__timed_ainvoke(secondary, messages))] = secondary
+
+            last_exception = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if tasks[task] != primary:
+                            self.hedge_wins += 1
+                        self.__served_by(call_record, tasks[task])
+                        return task.result()
+                    logger.warning(f"Provider {tasks[task]} failed: {task.exception()}")
+                    last_exception = task.exception()
+
+                if not pending and len(tasks) == 1:
+                    return await self.__ainvoke_with_failover(ranked[1:], messages, call_record)
+
+            raise self.__all_failed(last_exception)
+        finally:
+            # Loser of the race, or everything if the caller gave up
+            for task in tasks:
+                task.cancel()
+
+    def stream(self, messages, call_record=None):
+        """
+        Stream from the provider with the fastest first chunk, next provider is tried if the stream
+        fails before anything was received
+
+        :param messages: Prompt
+        :param call_record: Anything with a provider attribute, set to the name of the provider that answered
+        :return: Generator of langchain's AIMessageChunk
+        """
+        last_exception = None
+        for name in self.ranked(FIRST_CHUNK):
+            start = time.perf_counter()
+            received = False
+            try:
+                for chunk in self.providers[name].stream(messages):
+                    if not received:
+                        received = True
+                        self.provider_stats[name].record(FIRST_CHUNK, time.perf_counter() - start, True)
+                        self.__served_by(call_record, name)
+                    yield chunk
+                return
+            except Exception as ex:
+                if received:
+                    raise
+                self.provider_stats[name].record(FIRST_CHUNK, time.perf_counter() - start, False)
+                logger.warning(f"Provider {name} failed, trying next one: {ex}")
+                last_exception = ex
+        raise self.__all_failed(last_exception)
+
+    async def astream(self, messages, call_record=None):
+        """
+        Async version of stream
+
+        :param messages: Prompt
+        :param call_record: Anything with a provider attribute, set to the name of the provider that answered
+        :return: Async generator of langchain's AIMessageChunk
+        """
+        last_exception = None
+        for name in self.ranked(FIRST_CHUNK):
+            start = time.perf_counter()
+            received = False
+            try:
+                async for chunk in self.providers[name].astream(messages):
+                    if not received:
+                        received = True
+                        self.provider_stats[name].record(FIRST_CHUNK, time.perf_counter() - start, True)
+                        self.__served_by(call_record, name)
+                    yield chunk
+                return
+            except Exception as ex:
+                if received:
+                    raise
+                self.provider_stats[name].record(FIRST_CHUNK, time.perf_counter() - start, False)
+                logger.warning(f"Provider {name} failed, trying next one: {ex}")
+                last_exception = ex
+        raise self.__all_failed(last_exception)
+
+    def __call__(self, messages):
+        return self.invoke(messages)
+
+    def stats(self) -> str:
+        """
+        :return: Human-readable per provider stats
+        """
+        lines = []
+        for name, stats in self.provider_stats.items():
+            median = stats.latency_quantile(RESPONSE, 0.5)
+            p95 = stats.latency_quantile(RESPONSE, 0.95)
+            lines.append(f"{name}: calls {len(stats)}, error rate {stats.error_rate():.0%}, "
+                         f"median {median or 0.:.2f} sec, p95 {p95 or 0.:.2f} sec")
+        lines.append(f"hedged calls: {self.hedged_calls}, won by hedge: {self.hedge_wins}")
+        return "\n".join(lines)
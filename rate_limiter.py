@@ -0,0 +1,292 @@
+import asyncio
+import datetime
+import email.utils
+import logging
+import random
+import threading
+import time
+import openai
+from utils import estimate_tokens
+
+logger = logging.getLogger("RateLimiter")
+
+# Bucket capacity, in seconds of the limit: short bursts are fine, a whole minute's worth at once is not
+BURST_SEC = 10.
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst_sec: float = BURST_SEC):
+        """
+        Token bucket with reservations: taking more than there is puts the bucket in debt,
+        the caller waits until the debt is paid off. No lock is held while waiting,
+        so the same bucket works for threads and asyncio tasks
+
+        :param per_minute: Refill rate
+        :param burst_sec: Capacity, in seconds of refill
+        """
+        self.rate = per_minute / 60.
+        self.capacity = max(self.rate * burst_sec, 1.)
+
+        self.__lock = threading.Lock()
+        self.__tokens = self.capacity
+        self.__updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take tokens
+
+        :param amount: Amount of tokens
+        :return: Seconds to wait before using them
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated) * self.rate)
+            self.__updated = now
+            self.__tokens -= amount
+            return -self.__tokens / self.rate if self.__tokens < 0. else 0.
+
+    def take(self, amount: float) -> None:
+        """
+        Take tokens that were already used, e.g. completion tokens known after the call
+        """
+        self.reserve(amount)
+
+
+def retry_after_sec(ex: Exception) -> float | None:
+    """
+    :param ex: Exception raised by the OpenAI client
+    :return: Delay the server asked for, None if it didn't
+    """
+    response = getattr(ex, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    # OpenAI and compatible APIs
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000.
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    # HTTP date
+    try:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_date.tzinfo is None:
+        # HTTP dates are always GMT
+        retry_date = retry_date.replace(tzinfo=datetime.timezone.utc)
+    return max(retry_date.timestamp() - time.time(), 0.)
+
+
+def is_retryable(ex: Exception) -> bool:
+    """
+    :param ex: Exception raised by the OpenAI client
+    :return: True for throttling, server errors and connection problems
+    """
+    if isinstance(ex, openai.APIConnectionError):
+        return True
+    if isinstance(ex, openai.APIStatusError):
+        return ex.status_code in (408, 409, 429) or ex.status_code >= 500
+    return False
+
+
+def prompt_tokens(messages) -> int:
+    """
+    :param messages: Langchain's PromptValue or anything printable
+    :return: Estimated prompt tokens
+    """
+    return estimate_tokens(messages.to_string() if hasattr(messages, "to_string") else str(messages))
+
+
+class RateLimiter:
+    def __init__(self, name: str, requests_per_minute: float | None = None, tokens_per_minute: float | None = None,
+                 max_retries: int = 5, base_delay_sec: float = 1., max_delay_sec: float = 60.):
+        """
+        Requests and tokens per minute limits of a single provider, plus retries with backoff
+
+        Every call takes a request and its estimated prompt tokens from the buckets, waiting if needed,
+        completion tokens are taken after the call. Throttled and failed calls are retried
+        with full-jitter exponential backoff, Retry-After of the server is respected up to max_delay_sec,
+        and on 429 every other call to the provider waits as well
+
+        :param name: Provider name for logs
+        :param requests_per_minute: Requests limit, None for no limit
+        :param tokens_per_minute: Tokens limit (prompt and completion), None for no limit
+        :param max_retries: Retries of a single call before giving up
+        :param base_delay_sec: First backoff delay
+        :param max_delay_sec: Max backoff delay, Retry-After of the server included
+        """
+        self.name = name
+        self.max_retries = max_retries
+        self.base_delay_sec = base_delay_sec
+        self.max_delay_sec = max_delay_sec
+
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+        self.retries = 0
+        self.throttled = 0
+
+        self.__lock = threading.Lock()
+        # Nobody calls the provider before that, set on 429
+        self.__paused_until = 0.
+
+    def __acquire_delay(self, tokens: int) -> float:
+        """
+        :return: Seconds to wait before the call
+        """
+        delay = self.__paused_until - time.monotonic()
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(tokens))
+        return max(delay, 0.)
+
+    def __completed(self, completion_tokens: int) -> None:
+        if self.tokens is not None and completion_tokens:
+            self.tokens.take(completion_tokens)
+
+    def __retry_delay(self, ex: Exception, attempt: int) -> float | None:
+        """
+        :param ex: Exception of the failed call
+        :param attempt: Failed attempt number, from 0
+        :return: Seconds to wait before retrying, None if the call shouldn't be retried
+        """
+        if attempt >= self.max_retries or not is_retryable(ex):
+            return None
+
+        delay = random.uniform(0., min(self.max_delay_sec, self.base_delay_sec * 2 ** attempt))
+
+        server_delay = retry_after_sec(ex)
+        if server_delay is not None:
+            # Retry-After of an hour would freeze the provider and everyone sharing the limiter
+            delay = max(delay, min(server_delay, self.max_delay_sec))
+
+        if getattr(ex, "status_code", None) == 429:
+            self.throttled += 1
+            # Other calls would only get throttled too
+            with self.__lock:
+                self.__paused_until = max(self.__paused_until, time.monotonic() + delay)
+
+        self.retries += 1
+        logger.warning(f"{self.name} call failed ({type(ex).__name__}), "
+                       f"retry {attempt + 1}/{self.max_retries} in {delay:.2f} sec")
+        return delay
+
+    def call(self, func, messages):
+        """
+        :param func: Function making the call, takes messages
+        :param messages: Prompt
+        :return: What func returns
+        """
+        tokens = prompt_tokens(messages)
+        attempt = 0
+        while True:
+            time.sleep(self.__acquire_delay(tokens))
+            try:
+                result = func(messages)
+            except Exception as ex:
+                delay = self.__retry_delay(ex, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self.__completed((getattr(result, "usage_metadata", None) or {}).get("output_tokens", 0))
+            return result
+
+    async def acall(self, func, messages):
+        """
+        Async version of call
+
+        :param func: Coroutine function making the call, takes messages
+        :param messages: Prompt
+        :return: What func returns
+        """
+        tokens = prompt_tokens(messages)
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.__acquire_delay(tokens))
+            try:
+                result = await func(messages)
+            except Exception as ex:
+                delay = self.__retry_delay(ex, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            self.__completed((getattr(result, "usage_metadata", None) or {}).get("output_tokens", 0))
+            return result
+
+    def stream(self, func, messages):
+        """
+        Streaming version of call, retried only if nothing was received yet
+
+        :param func: Function returning a generator of chunks, takes messages
+        :param messages: Prompt
+        :return: Generator of chunks
+        """
+        tokens = prompt_tokens(messages)
+        attempt = 0
+        while True:
+            time.sleep(self.__acquire_delay(tokens))
+            received = []
+            try:
+                for chunk in func(messages):
+                    received.append(chunk.content)
+                    yield chunk
+                return
+            except Exception as ex:
+                delay = None if received else self.__retry_delay(ex, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+            finally:
+                # Also when the stream is stopped early
+                self.__completed(estimate_tokens("".join(received)))
+
+    async def astream(self, func, messages):
+        """
+        Async version of stream
+
+        :param func: Function returning an async generator of chunks, takes messages
+        :param messages: Prompt
+        :return: Async generator of chunks
+        """
+        tokens = prompt_tokens(messages)
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.__acquire_delay(tokens))
+            received = []
+            try:
+                async for chunk in func(messages):
+                    received.append(chunk.content)
+                    yield chunk
+                return
+            except Exception as ex:
+                delay = None if received else self.__retry_delay(ex, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+            finally:
+                self.__completed(estimate_tokens("".join(received)))
+
+    def stats(self) -> str:
+        """
+        :return: Human-readable retry stats
+        """
+        return f"{self.name}: retries {self.retries}, throttled {self.throttled}"
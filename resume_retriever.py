@@ -0,0 +1,250 @@
+import dataclasses
+import logging
+import math
+import re
+import threading
+from custom_types import UserInfo
+from utils import PrettyPrintable, estimate_tokens
+
+logger = logging.getLogger("ResumeRetriever")
+
+WORD_PATTERN = re.compile(r"[a-z0-9+#]+")
+# "What's", "you're" and so on
+CONTRACTION_PATTERN = re.compile(r"['’][a-z]+")
+
+# Words that say nothing about which part of the resume is needed
+STOP_WORDS = frozenset(
+    "a an the of to in on at for with from by and or as is are was were be been being do does did have has had "
+    "you your yours we our us i my me it its this that these those there here what which who whom whose when "
+    "where why how many much if can could would should will may please not no yes none other any some all "
+    "describe enter provide tell about following select choose".split())
+
+# Words people use in questions about a section, on top of the section's own field names
+SECTION_SYNONYMS = {
+    "personal": "name first last full surname phone mobile number email mail contact address city country "
+                "location located live living reside zip postal birthday birth date age github linkedin "
+                "telegram profile website portfolio url",
+    "education": "education degree university college school institution bachelor master phd doctorate diploma "
+                 "study studied field major gpa grade graduate graduated graduation exam score ielts toefl",
+    "job_experience": "experience year work worked working job employment employer company position role title "
+                      "industry responsibility previous current recent senior lead manage managed team",
+    "hard_skills": "skill technical technology tool programming framework library proficient proficiency "
+                   "knowledge familiar expertise stack",
+    "soft_skills": "skill soft teamwork communication leadership collaboration interpersonal",
+    "projects": "project portfolio built build open source github side",
+    "achievements": "achievement award prize accomplishment hackathon recognition",
+    "certifications": "certification certificate certified license licence course accreditation",
+    "languages": "language speak spoken fluent fluency native english german french spanish italian russian "
+                 "portuguese chinese proficiency level",
+    "interests": "interest hobby passion free time",
+    "availability": "available availability start notice period join date soon immediately earliest",
+    "expected_salary_range_usd": "salary compensation pay expected expectation desired rate wage annual "
+                                 "gross usd eur ctc",
+    "self_identification": "gender pronoun veteran military disability disabled ethnicity race racial hispanic "
+                           "latino identify identification sex orientation",
+    "legal_authorization": "authorized authorization authorised legally legal visa sponsorship sponsor permit "
+                           "citizen citizenship eligible eligibility right residence green card",
+    "work_preferences": "remote onsite site hybrid office relocate relocation commute commuting travel "
+                        "assessment drug test background check person preference",
+}
+
+# Field names and synonyms are what the question is about, values just happen to match
+SCHEMA_TERM_WEIGHT = 2.
+VALUE_TERM_WEIGHT = 1.
+
+
+def normalize_token(token: str) -> str:
+    """
+    Cut off plural "s", so "skills" and "skill" are the same term
+
+    :param token: Lower case word
+    :return: Normalized word
+    """
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def text_terms(text: str) -> set[str]:
+    """
+    :param text: Any text
+    :return: Normalized words of the text without stop words
+    """
+    return {normalize_token(token)
+            for token in WORD_PATTERN.findall(CONTRACTION_PATTERN.sub("", text.casefold()))
+            if token not in STOP_WORDS}
+
+
+class ResumeRetriever:
+    def __init__(self, token_budget: int, min_confidence: float, always_include: list[str]):
+        """
+        Picks UserInfo sections relevant to a question, so a question about the phone number
+        doesn't carry projects, achievements and the whole job history with it
+
+        Index is a term -> weight map per section: field names of the section dataclasses and synonyms
+        weigh more than words found in the values. Weights are scaled by how many sections share the term,
+        so "work" (everywhere) matters less than "visa" (one section)
+
+        :param token_budget: Max estimated tokens of the pruned resume
+        :param min_confidence: Min score of the best section, below that the whole resume is used
+        :param always_include: Sections that are always sent
+        """
+        self.token_budget = token_budget
+        self.min_confidence = min_confidence
+        self.always_include = always_include
+
+        self.tokens_sent = 0
+        self.tokens_saved = 0
+        self.pruned_calls = 0
+        self.full_calls = 0
+
+        self.__lock = threading.Lock()
+
+        # Index is rebuilt when user_info changes
+        self.__index_version: tuple[int, str] | None = None
+        self.__section_terms: dict[str, dict[str, float]] = {}
+        self.__section_tokens: dict[str, int] = {}
+        self.__full_tokens = 0
+        # Selected sections -> serialized resume
+        self.__resume_strings: dict[tuple[str, ...], str] = {}
+
+    @staticmethod
+    def __schema_terms(value) -> set[str]:
+        """
+        Field names of a section and of every dataclass nested in it
+        """
+        terms = set()
+        for item in value if isinstance(value, list) else [value]:
+            if dataclasses.is_dataclass(item):
+                for f in dataclasses.fields(item):
+                    terms |= text_terms(f.name.replace("_", " "))
+                    terms |= ResumeRetriever.__schema_terms(getattr(item, f.name))
+        return terms
+
+    def __build_index(self, user_info: UserInfo, resume_format: str) -> None:
+        """
+        Build term weights of every non-empty section and remember section sizes
+        """
+        section_terms = {}
+        for f in dataclasses.fields(user_info):
+            value = getattr(user_info, f.name)
+            if not value:
+                continue
+
+            terms = {term: VALUE_TERM_WEIGHT
+                     for term in text_terms(PrettyPrintable.compact_value(value))}
+            schema_terms = (text_terms(f.name.replace("_", " "))
+                            | self.__schema_terms(value)
+                            | text_terms(SECTION_SYNONYMS.get(f.name, "")))
+            terms.update(dict.fromkeys(schema_terms, SCHEMA_TERM_WEIGHT))
+
+            section_terms[f.name] = terms
+
+        # Terms shared by many sections say less about which one is needed
+        document_frequency = {}
+        for terms in section_terms.values():
+            for term in terms:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+
+        sections_count = len(section_terms)
+        self.__section_terms = {
+            section: {term: weight * math.log(1. + sections_count / document_frequency[term])
+                      for term, weight in terms.items()}
+            for section, terms in section_terms.items()}
+
+        self.__section_tokens = {
+            section: estimate_tokens(UserInfo(**{section: getattr(user_info, section)}).serialize(resume_format))
+            for section in section_terms}
+        self.__full_tokens = estimate_tokens(user_info.serialize(resume_format))
+        self.__resume_strings = {}
+
+    def score(self, question: str) -> dict[str, float]:
+        """
+        :param question: Question label
+        :return: Relevance score of every section that matched anything
+        """
+        question_terms = text_terms(question)
+        scores = {}
+        for section, terms in self.__section_terms.items():
+            score = sum(terms.get(term, 0.) for term in question_terms)
+            if score > 0.:
+                scores[section] = score
+        return scores
+
+    def __select(self, question: str) -> list[str] | None:
+        """
+        Most relevant sections of a single question that fit into the token budget
+
+        :return: Selected sections, None if not confident enough
+        """
+        scores = self.score(question)
+        if not scores or max(scores.values()) < self.min_confidence:
+            return None
+
+        selected = [s for s in self.always_include if s in self.__section_tokens]
+        used_tokens = sum(self.__section_tokens[s] for s in selected)
+
+        for i, section in enumerate(sorted(scores, key=scores.get, reverse=True)):
+            if section in selected:
+                continue
+            # The best one goes in anyway, otherwise the question can't be answered at all
+            if i == 0 or used_tokens + self.__section_tokens[section] <= self.token_budget:
+                selected.append(section)
+                used_tokens += self.__section_tokens[section]
+
+        return selected
+
+    def retrieve(self, questions: list[str], user_info: UserInfo, user_info_version: int,
+                 resume_format: str) -> str | None:
+        """
+        Resume with only the sections relevant to the questions
+
+        :param questions: Question labels, several for batch calls (sections of every question are merged)
+        :param user_info: Resume
+        :param user_info_version: Version of the resume, index is rebuilt when it changes
+        :param resume_format: "yaml" or "compact", same as the full resume
+        :return: Pruned serialized resume, None if the whole resume should be used
+        """
+        with self.__lock:
+            if self.__index_version != (user_info_version, resume_format):
+                self.__build_index(user_info, resume_format)
+                self.__index_version = (user_info_version, resume_format)
+
+            selected = set()
+            for question in questions:
+                question_sections = self.__select(question)
+                if question_sections is None:
+                    self.full_calls += 1
+                    self.tokens_sent += self.__full_tokens
+                    logger.info(f"No confident resume sections for \"{question}\", sending the whole resume")
+                    return None
+                selected.update(question_sections)
+
+            # Original field order, so the same sections always produce the same text
+            sections = tuple(s for s in self.__section_tokens if s in selected)
+
+            resume = self.__resume_strings.get(sections)
+            if resume is None:
+                resume = UserInfo(**{s: getattr(user_info, s) for s in sections}).serialize(resume_format)
+                self.__resume_strings[sections] = resume
+
+            sent_tokens = estimate_tokens(resume)
+            saved_tokens = max(self.__full_tokens - sent_tokens, 0)
+            self.pruned_calls += 1
+            self.tokens_sent += sent_tokens
+            self.tokens_saved += saved_tokens
+
+            logger.info(f"Resume pruned to {', '.join(sections)}: "
+                        f"~{sent_tokens} tokens instead of ~{self.__full_tokens}, saved ~{saved_tokens}\n"
+                        f"Resume retriever {self.stats()}")
+
+            return resume
+
+    def stats(self) -> str:
+        """
+        :return: Human-readable pruning stats
+        """
+        total = self.pruned_calls + self.full_calls
+        pruned_rate = self.pruned_calls / total if total else 0.
+        return (f"pruned calls: {self.pruned_calls}, full resume calls: {self.full_calls}, "
+                f"pruned rate: {pruned_rate:.0%}, tokens saved: ~{self.tokens_saved}")
@@ -0,0 +1,142 @@
+import re
+import string
+from custom_types import AnswerRule, FieldTypeEnum, UserInfo
+from skill_index import SkillExperienceIndex
+
+# Matched text is "<field type>\n<label>", so ^ and $ of rule patterns (multiline) anchor to the label
+TYPE_SEPARATOR = "\n"
+
+# Thousands separators included, "80,000" and "80 000" are single numbers
+NUMBER = re.compile(r"\d[\d, ]*\d|\d")
+
+# Text inputs get "Yes"/"No" only for labels asking a yes/no question
+YES_NO_QUESTION = re.compile(r"^\W*(are|is|do|does|did|have|has|will|would|can|could|may|should)\b", re.IGNORECASE)
+
+
+class UserInfoFormatter(string.Formatter):
+    def format_field(self, value, format_spec):
+        # Field that isn't filled in, the rule can't answer then
+        if value is None or value == "":
+            raise KeyError("Empty UserInfo field")
+        return super().format_field(value, format_spec)
+
+
+class AnswerRuleEngine:
+    def __init__(self, rules: list[AnswerRule]):
+        """
+        Answers standard form questions straight from UserInfo, without the LLM
+
+        Every rule becomes a named alternative of a single regex, compiled once,
+        so a label is matched against all rules in one pass, first rule in the list wins
+
+        :param rules: Rules, in priority order
+        """
+        self.rules = rules
+
+        alternatives = []
+        for i, rule in enumerate(rules):
+            types = "|".join(re.escape(t.lower()) for t in rule.types)
+            # Lazy .*? makes the rule pattern a search within the label
+            alternatives.append(f"(?P<r{i}>^(?:{types}){TYPE_SEPARATOR}.*?(?:{rule.pattern}))")
+        self.matcher = re.compile("|".join(alternatives), re.MULTILINE | re.IGNORECASE) if alternatives else None
+
+        self.__formatter = UserInfoFormatter()
+
+        self.llm_calls_avoided = 0
+        self.hits: dict[str, int] = {}
+
+    @staticmethod
+    def __matched_text(field_type: FieldTypeEnum, field_label: str, field_options: list[str] | None) -> str:
+        text = field_label
+        # Checkbox text is its option, the label is often just a section name
+        if field_type == FieldTypeEnum.CHECKBOX and field_options:
+            text = f"{field_label} {' '.join(field_options)}"
+        # Case is kept for the few patterns that need it, "US" vs "us"
+        return f"{field_type.name.lower()}{TYPE_SEPARATOR}{' '.join(text.split())}"
+
+    def match(self, field_type: FieldTypeEnum, field_label: str, field_options: list[str] | None) -> AnswerRule | None:
+        """
+        :return: First rule matching the field, None if there's none
+        """
+        if self.matcher is None:
+            return None
+
+        matched = self.matcher.match(self.__matched_text(field_type, field_label, field_options))
+        if matched is None:
+            return None
+        return self.rules[int(next(name for name, group in matched.groupdict().items() if group is not None)[1:])]
+
+    def __value(self, rule: AnswerRule, user_info: UserInfo) -> str | None:
+        try:
+            return self.__formatter.format(rule.value, **vars(user_info))
+        except (KeyError, AttributeError, IndexError):
+            return None
+
+    @staticmethod
+    def __option(field_options: list[str], value: str) -> str:
+        """
+        :return: Option equal to the value, or containing it as a whole word, empty string if there's none
+        """
+        value = value.strip().lower()
+        exact = next((o for o in field_options if o.strip().lower() == value), None)
+        if exact is not None:
+            return exact
+        pattern = re.compile(rf"(?<!\w){re.escape(value)}(?!\w)")
+        return next((o for o in field_options if pattern.search(o.lower())), "")
+
+    def __apply(self, rule: AnswerRule, field_label: str, field_options: list[str] | None, user_info: UserInfo,
+                skill_index: SkillExperienceIndex | None) -> str:
+        if rule.strategy == "first_option":
+            return field_options[0] if field_options else ""
+        if rule.strategy == "skill_years":
+            years = skill_index.years_for_question(field_label) if skill_index is not None else None
+            return str(years) if years is not None and not field_options else ""
+
+        value = self.__value(rule, user_info)
+        if value is None:
+            return ""
+
+        match rule.strategy:
+            case "value":
+                return self.__option(field_options, value) if field_options else value
+            case "yes_no":
+                answer = "Yes" if value.strip().lower() in ("true", "yes") else "No"
+                if not field_options:
+                    return answer if YES_NO_QUESTION.match(field_label) else ""
+                return next((o for o in field_options if re.match(rf"{answer.lower()}\b", o.strip().lower())), "")
+            case "number":
+                number = NUMBER.search(value)
+                if number is None or field_options:
+                    return ""
+                return re.sub(r"[, ]", "", number.group())
+            case _:
+                raise ValueError(f"Unknown answer rule strategy: {rule.strategy}")
+
+    def answer(self, field_type: FieldTypeEnum, field_label: str, field_options: list[str] | None,
+               user_info: UserInfo, skill_index: SkillExperienceIndex | None = None, count: bool = True) -> str:
+        """
+        :param field_type: Field type
+        :param field_label: The question
+        :param field_options: Options (optional)
+        :param user_info: Where answers come from
+        :param skill_index: Years of experience per skill, for "skill_years" rules
+        :param count: Count the answer as an avoided LLM call, False when just checking if the field is answerable
+        :return: Answer, empty string if the field is for the LLM
+        """
+        rule = self.match(field_type, field_label, field_options)
+        if rule is None:
+            return ""
+
+        answer = self.__apply(rule, field_label, field_options, user_info, skill_index)
+        if answer and count:
+            self.llm_calls_avoided += 1
+            self.hits[rule.name] = self.hits.get(rule.name, 0) + 1
+        return answer
+
+    def stats(self) -> str:
+        """
+        :return: Human-readable rule stats
+        """
+        top = ", ".join(f"{name} {hits}" for name, hits in sorted(self.hits.items(), key=lambda h: -h[1]))
+        return f"LLM calls avoided by answer rules: {self.llm_calls_avoided}" + (f" ({top})" if top else "")
+
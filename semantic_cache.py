@@ -0,0 +1,281 @@
+import atexit
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import numpy as np
+from text_vectorizer import CharNgramVectorizer, smooth_idf
+
+logger = logging.getLogger("SemanticCache")
+
+# Refit idf weights when the index grew by that fraction since the last fit
+IDF_REFIT_GROWTH = 0.1
+
+# Words that only shape the question, not what it's about
+STOP_WORDS = frozenset(
+    "a an the of to in on at for with from by and or as is are was were be been being do does did have has had "
+    "you your yours we our us i my me it its this that these those there here what which who whom whose when "
+    "where why how many much long total overall any some if can could would should will may please "
+    "year years yr yrs experience experienced work working worked professional professionally "
+    "describe enter rate provide tell about level select choose specify indicate state give share confirm "
+    "willing able open comfortable ready yes no "
+    # What's left of "what's", "you're", "I've", negations stay
+    "s re ve ll d m".split())
+# Anchors are cut to that many characters, so "relocate" and "relocation" are the same anchor
+ANCHOR_STEM_LENGTH = 6
+
+ANCHOR_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9+#]+(?:\.[A-Za-z0-9+#]+)*")
+# Spellings of the same place, case-sensitive, so "us" the pronoun stays a pronoun
+ANCHOR_ALIASES = [(re.compile(r"\b(U\.S\.(A\.)?|USA|United States( of America)?|America)(?!\w)"), "US"),
+                  (re.compile(r"\b(E\.U\.|European Union|Europe)(?!\w)"), "EU")]
+
+
+class SemanticAnswerCache:
+    def __init__(self, index_path: str, similarity_threshold: float, n_features: int = 512,
+                 save_interval_sec: float = 60.):
+        """
+        Paraphrase-tolerant answer cache, local similarity index over previously answered questions
+
+        Questions are TF-IDF vectors of hashed character n-grams, kept in NumPy matrices,
+        one matrix per bucket: same group (options, resume, prompt) and same anchors (see anchors),
+        so lookup is a single matrix-vector product over candidates that could actually share an answer
+
+        Anchors guard against the most common false positive: "Years with Rust?" vs "Years with C++?",
+        "Current salary?" vs "Expected salary?" are almost the same string, but never the same answer.
+        Only paraphrases that keep every content word ("authorized"/"authorization", "EU"/"European Union",
+        "Are you open to"/"Are you willing to") get to be compared by similarity
+
+        Index is persisted as a single .npz file, rewritten whole, so new entries are saved at most once
+        per save_interval_sec, and at exit
+
+        :param index_path: Path to the index file, created if needed
+        :param similarity_threshold: Minimum cosine similarity to reuse an answer
+        :param n_features: Vector size of the hashed features
+        :param save_interval_sec: Min time between index saves
+        """
+        self.index_path = index_path
+        self.similarity_threshold = similarity_threshold
+        self.save_interval_sec = save_interval_sec
+        self.vectorizer = CharNgramVectorizer(n_features=n_features)
+
+        self.hits = 0
+        self.misses = 0
+
+        self.__lock = threading.Lock()
+
+        # Stored entries
+        self.__questions: list[str] = []
+        self.__answers: list[str] = []
+        self.__groups: list[str] = []
+        # Sparse term frequencies of the stored questions, CSR-like
+        self.__tf_indices: list[np.ndarray] = []
+        self.__tf_values: list[np.ndarray] = []
+
+        self.__document_frequency = np.zeros(n_features, dtype=np.float32)
+        self.__idf = smooth_idf(self.__document_frequency, 0)
+        self.__idf_documents_count = 0
+
+        # Bucket key -> row ids and normalized weighted vectors matrix
+        self.__bucket_rows: dict[str, list[int]] = {}
+        self.__bucket_matrix: dict[str, np.ndarray] = {}
+
+        # Entries added since the last save
+        self.__dirty = False
+        self.__last_save = time.monotonic()
+
+        self.__load()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def group_key(options: list[str] | None, user_info_fingerprint: str, prompt_version: str) -> str:
+        """
+        Answers are reused only between questions with the same options, resume and prompt
+
+        :param options: Options to choose from (None for free form questions)
+        :param user_info_fingerprint: Fingerprint of the resume
+        :param prompt_version: Fingerprint of the prompt used
+        :return: Group key
+        """
+        key_parts = ["\x1f".join(sorted(options)) if options is not None else "",
+                     user_info_fingerprint,
+                     prompt_version]
+        return hashlib.sha256("\x1e".join(key_parts).encode("UTF-8")).hexdigest()[:16]
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        """
+        :param question: Question label
+        :return: Label with every spelling of a place replaced by one ("European Union" -> "EU")
+        """
+        for pattern, alias in ANCHOR_ALIASES:
+            question = pattern.sub(alias, question)
+        return question
+
+    @staticmethod
+    def anchors(question: str) -> str:
+        """
+        What the answer changes with: every content word, acronyms and numbers ("python", "current", "salary",
+        "US", "5"), stop words dropped and long words cut to ANCHOR_STEM_LENGTH.
+        The wording around them is left to similarity
+
+        :param question: Question label
+        :return: Sorted casefolded anchors joined by space
+        """
+        anchors = set()
+        for token in ANCHOR_TOKEN_PATTERN.findall(SemanticAnswerCache.normalize(question)):
+            term = token.casefold()
+            # Acronyms are kept even if they spell a stop word, "US" vs "us"
+            if len(token) > 1 and token.isupper() or any(c.isdigit() or c in "+#." for c in token):
+                anchors.add(term)
+            elif term not in STOP_WORDS:
+                anchors.add(term[:ANCHOR_STEM_LENGTH])
+        return " ".join(sorted(anchors))
+
+    @staticmethod
+    def __bucket_key(question: str, group: str) -> str:
+        return f"{group}|{SemanticAnswerCache.anchors(question)}"
+
+    def lookup(self, question: str, group: str) -> tuple[str, str, float] | None:
+        """
+        Find the most similar stored question in the group
+
+        :param question: Question label
+        :param group: Group key from group_key
+        :return: Stored question, its answer and similarity, None if nothing is similar enough
+        """
+        bucket = self.__bucket_key(question, group)
+
+        with self.__lock:
+            matrix = self.__bucket_matrix.get(bucket)
+            if matrix is None:
+                self.misses += 1
+                return None
+
+            scores = matrix @ self.vectorizer.transform(self.normalize(question), self.__idf)
+            best = int(np.argmax(scores))
+
+            if scores[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            row = self.__bucket_rows[bucket][best]
+            return self.__questions[row], self.__answers[row], float(scores[best])
+
+    def add(self, question: str, group: str, answer: str) -> None:
+        """
+        Store answered question, the index is saved if the last save was save_interval_sec ago
+
+        :param question: Question label
+        :param group: Group key from group_key
+        :param answer: Answer to reuse later
+        """
+        indices, values = self.vectorizer.feature_counts(self.normalize(question))
+
+        with self.__lock:
+            self.__append(question, group, answer, indices, values)
+
+            if len(self.__questions) > self.__idf_documents_count * (1. + IDF_REFIT_GROWTH):
+                self.__refit()
+            else:
+                bucket = self.__bucket_key(question, group)
+                row_vector = self.vectorizer.dense(indices, values, self.__idf)
+                if bucket in self.__bucket_matrix:
+                    self.__bucket_matrix[bucket] = np.vstack([self.__bucket_matrix[bucket], row_vector])
+                else:
+                    self.__bucket_matrix[bucket] = row_vector[np.newaxis, :]
+
+            self.__dirty = True
+            if time.monotonic() - self.__last_save >= self.save_interval_sec:
+                self.__save()
+
+    def flush(self) -> None:
+        """
+        Save entries added since the last save
+        """
+        with self.__lock:
+            if self.__dirty:
+                self.__save()
+
+    def stats(self) -> str:
+        """
+        :return: Human-readable hit/miss stats
+        """
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.
+        return f"hits: {self.hits}, misses: {self.misses}, hit rate: {hit_rate:.0%}, entries: {len(self)}"
+
+    def __len__(self):
+        return len(self.__questions)
+
+    def __append(self, question: str, group: str, answer: str, indices: np.ndarray, values: np.ndarray) -> None:
+        """
+        Append entry to stored lists without touching the matrices
+        """
+        self.__bucket_rows.setdefault(self.__bucket_key(question, group), []).append(len(self.__questions))
+        self.__questions.append(question)
+        self.__answers.append(answer)
+        self.__groups.append(group)
+        self.__tf_indices.append(indices)
+        self.__tf_values.append(values)
+        self.__document_frequency[indices] += 1
+
+    def __refit(self) -> None:
+        """
+        Recalculate idf weights and rebuild every bucket matrix with them
+        """
+        self.__idf = smooth_idf(self.__document_frequency, len(self.__questions))
+        self.__idf_documents_count = len(self.__questions)
+
+        self.__bucket_matrix = {
+            bucket: np.vstack([self.vectorizer.dense(self.__tf_indices[row], self.__tf_values[row], self.__idf)
+                               for row in rows])
+            for bucket, rows in self.__bucket_rows.items()}
+
+    def __save(self) -> None:
+        """
+        Write the index to disk, only sparse term frequencies are stored, matrices are rebuilt on load
+        """
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+
+        lengths = np.array([len(i) for i in self.__tf_indices], dtype=np.int64)
+        # Temporary file first, so crash during write doesn't corrupt the index
+        tmp_path = f"{self.index_path}.tmp.npz"
+        np.savez(tmp_path,
+                 n_features=np.array(self.vectorizer.n_features),
+                 questions=np.array(self.__questions, dtype=str),
+                 answers=np.array(self.__answers, dtype=str),
+                 groups=np.array(self.__groups, dtype=str),
+                 tf_indptr=np.concatenate([[0], np.cumsum(lengths)]),
+                 tf_indices=np.concatenate(self.__tf_indices),
+                 tf_values=np.concatenate(self.__tf_values))
+        os.replace(tmp_path, self.index_path)
+        self.__dirty = False
+        self.__last_save = time.monotonic()
+
+    def __load(self) -> None:
+        """
+        Read the index from disk if there's one
+        """
+        if not os.path.exists(self.index_path):
+            return
+
+        with np.load(self.index_path) as index:
+            if int(index["n_features"]) != self.vectorizer.n_features:
+                logger.warning("Semantic cache was built with different vector size, starting from scratch")
+                return
+
+            # Every access to NpzFile item reads it from disk again, get them once
+            questions, answers, groups = index["questions"], index["answers"], index["groups"]
+            tf_indptr, tf_indices, tf_values = index["tf_indptr"], index["tf_indices"], index["tf_values"]
+
+        for row, (question, answer, group) in enumerate(zip(questions.tolist(), answers.tolist(), groups.tolist())):
+            self.__append(question, group, answer,
+                          tf_indices[tf_indptr[row]:tf_indptr[row + 1]],
+                          tf_values[tf_indptr[row]:tf_indptr[row + 1]])
+
+        self.__refit()
+
+        logger.info(f"Semantic cache loaded from {self.index_path} ({len(self)} entries)")
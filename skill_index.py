@@ -0,0 +1,199 @@
+import re
+from datetime import date
+from custom_types import UserInfo
+
+# Canonical skill -> other names it goes by, matched as whole words in lowercase text
+SKILL_ALIASES = {
+    "python": ["python3"],
+    "javascript": ["js", "ecmascript"],
+    "typescript": [],
+    "c++": ["cpp", "c plus plus"],
+    "c#": ["csharp", "c sharp"],
+    # Not "go", that's a common word in highlights
+    "golang": [],
+    "java": [],
+    "kotlin": [],
+    "rust": [],
+    "sql": [],
+    "postgresql": ["postgres"],
+    "mysql": [],
+    "mongodb": ["mongo"],
+    "redis": [],
+    "django": [],
+    "flask": [],
+    "fastapi": [],
+    "node.js": ["nodejs", "node"],
+    "react": ["react.js", "reactjs"],
+    "vue": ["vue.js", "vuejs"],
+    "angular": [],
+    "docker": [],
+    "kubernetes": ["k8s"],
+    "aws": ["amazon web services"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "azure": ["microsoft azure"],
+    "terraform": [],
+    "linux": [],
+    "git": [],
+    "ci/cd": ["cicd", "continuous integration"],
+    "machine learning": [],
+    "unreal engine": ["unreal", "ue4", "ue5"],
+    "unity": [],
+}
+
+# Questions about experience in general, not with a particular skill
+GENERAL_EXPERIENCE = {"work", "working", "professional", "relevant", "industry", "total", "overall"}
+
+# Dates that mean the job is still going on
+ONGOING = {"present", "now", "current", "currently", "today", "ongoing"}
+
+MONTHS = {m: i for i, m in enumerate(["jan", "feb", "mar", "apr", "may", "jun",
+                                      "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+
+# "How many years of work experience do you have with Python?", "... in Python", "... using Python"
+QUESTION_WITH_SKILL = re.compile(r"\byears?\b.*?\bexperience\b.*?\b(?:with|in|using|on|of)\s+(?P<skill>.+?)\s*[?.:*]*$")
+# "How many years of Python experience do you have?"
+QUESTION_SKILL_FIRST = re.compile(r"\byears?\s+of\s+(?P<skill>.+?)\s+experience\b")
+
+
+# Several skills in one question, "with Python and Go", "Java, Kotlin or Scala"
+SKILL_LIST = re.compile(r"\b(?:and|or)\b|[,&]")
+
+
+def word_pattern(term: str) -> str:
+    # Skills like C++ and C# end with non-word characters, so plain \b doesn't work,
+    # and "r&d" is not R
+    return rf"(?<![\w+#&]){re.escape(term)}(?![\w+#&])"
+
+
+def parse_month(text: str | None, today: date | None = None) -> int | None:
+    """
+    :param text: "2019-03", "2019", "03/2019", "Mar 2019", "March 2019" or "Present"
+    :param today: Date used for ongoing jobs, today if None
+    :return: Months since year 0, None if the date can't be parsed
+    """
+    if not text:
+        return None
+    text = str(text).strip().lower()
+
+    if text in ONGOING:
+        today = today or date.today()
+        return today.year * 12 + today.month - 1
+
+    if matched := re.fullmatch(r"(\d{4})[-/.](\d{1,2})(?:[-/.]\d{1,2})?", text):
+        return int(matched[1]) * 12 + int(matched[2]) - 1
+    if matched := re.fullmatch(r"(\d{1,2})[-/.](\d{4})", text):
+        return int(matched[2]) * 12 + int(matched[1]) - 1
+    if matched := re.fullmatch(r"([a-z]{3})[a-z]*\.?\s+(\d{4})", text):
+        if matched[1] in MONTHS:
+            return int(matched[2]) * 12 + MONTHS[matched[1]] - 1
+    if matched := re.fullmatch(r"(\d{4})", text):
+        return int(matched[1]) * 12
+    return None
+
+
+def merged_months(periods: list[tuple[int, int]]) -> int:
+    """
+    :param periods: (first month, last month) pairs, inclusive
+    :return: Months covered by at least one period, overlapping jobs are not counted twice
+    """
+    total = 0
+    current_start, current_end = None, None
+    for start, end in sorted(periods):
+        if current_end is not None and start <= current_end + 1:
+            current_end = max(current_end, end)
+            continue
+        if current_end is not None:
+            total += current_end - current_start + 1
+        current_start, current_end = start, end
+    if current_end is not None:
+        total += current_end - current_start + 1
+    return total
+
+
+class SkillExperienceIndex:
+    def __init__(self, user_info: UserInfo, today: date | None = None):
+        """
+        Years of experience per skill, from job_experience date ranges
+
+        A job counts towards a skill if the skill is mentioned in its position or highlights.
+        Skills are the ones from the alias table plus hard_skills longer than a letter,
+        periods of overlapping jobs are merged
+
+        :param user_info: Where jobs and skills come from
+        :param today: Date used for ongoing jobs, today if None
+        """
+        # Any name of a skill -> canonical name
+        self.aliases: dict[str, str] = {}
+        for skill, aliases in SKILL_ALIASES.items():
+            for name in [skill] + aliases:
+                self.aliases[name] = skill
+        for skill in user_info.hard_skills or []:
+            # "R" or "C" would be found in every other highlight
+            if len(skill.strip()) > 1:
+                self.aliases.setdefault(skill.lower(), skill.lower())
+
+        # Longest names first, so "google cloud platform" wins over "google cloud"
+        names = sorted(self.aliases, key=len, reverse=True)
+        self.__mention = re.compile("|".join(word_pattern(n) for n in names))
+
+        periods: dict[str, list[tuple[int, int]]] = {}
+        all_periods = []
+        for job in user_info.job_experience or []:
+            start = parse_month(job.date_from, today)
+            end = parse_month(job.date_to, today)
+            # A job with a year only ends at the end of that year
+            if end is not None and re.fullmatch(r"\s*\d{4}\s*", str(job.date_to)):
+                end += 11
+            if start is None or end is None or end < start:
+                continue
+
+            all_periods.append((start, end))
+            text = " ".join([job.position or ""] + (job.highlights or []))
+            for skill in self.mentioned_skills(text):
+                periods.setdefault(skill, []).append((start, end))
+
+        self.months: dict[str, int] = {skill: merged_months(p) for skill, p in periods.items()}
+        self.total_months = merged_months(all_periods)
+
+    def mentioned_skills(self, text: str) -> set[str]:
+        """
+        :return: Canonical names of skills mentioned in the text
+        """
+        return {self.aliases[m.group()] for m in self.__mention.finditer(text.lower())}
+
+    @staticmethod
+    def to_years(months: int) -> int:
+        # Anything from half a year counts as a year, recruiters filter by whole years
+        return max(1, round(months / 12)) if months else 0
+
+    def years(self, skill: str) -> int | None:
+        """
+        :param skill: Skill name or alias
+        :return: Years of experience, None if the skill was never used at a job
+        """
+        months = self.months.get(self.aliases.get(skill.strip().lower(), ""))
+        return self.to_years(months) if months else None
+
+    def years_for_question(self, question: str) -> int | None:
+        """
+        :param question: E.g. "How many years of work experience do you have with Python?"
+        :return: Years of experience, None if the question isn't about a skill from the index
+        """
+        question = " ".join(question.lower().split())
+        matched = QUESTION_WITH_SKILL.search(question) or QUESTION_SKILL_FIRST.search(question)
+        if matched is None:
+            return None
+
+        subject = matched["skill"].strip()
+        if subject in GENERAL_EXPERIENCE:
+            return self.to_years(self.total_months) if self.total_months else None
+
+        # Exactly one skill, "Python programming" is fine, "Python or Java" is for the LLM,
+        # even if only one of them is in the index
+        if SKILL_LIST.search(subject):
+            return None
+        skills = self.mentioned_skills(subject)
+        if len(skills) != 1:
+            return None
+        months = self.months.get(skills.pop())
+        return self.to_years(months) if months else None
@@ -0,0 +1,75 @@
+from html.parser import HTMLParser
+
+
+class AnswerTagExtractor(HTMLParser):
+    def __init__(self, tag: str = "answer"):
+        """
+        Incremental parser for LLM output with the answer wrapped in a tag, e.g. <answer>Yes</answer>
+
+        Output can be fed chunk by chunk as it streams in, "closed" turns True as soon as the tag is closed,
+        so the rest of the output (models like to explain themselves after the answer) is not needed.
+        Answer text split into several chunks is joined, not overwritten
+
+        :param tag: Tag name, case-insensitive
+        """
+        super().__init__()
+        self.tag = tag.lower()
+
+        # Inside the answer tag right now
+        self.inside = False
+        # Answer tag was opened and closed
+        self.closed = False
+
+        self.__answer_chunks: list[str] = []
+        self.__raw_chunks: list[str] = []
+
+    def feed(self, data: str) -> None:
+        """
+        Feed next piece of the LLM output
+
+        :param data: Any piece of the output, tags can be split between pieces
+        """
+        self.__raw_chunks.append(data)
+        super().feed(data)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == self.tag and not self.closed:
+            self.inside = True
+
+    def handle_endtag(self, tag):
+        if tag == self.tag and self.inside:
+            self.inside = False
+            self.closed = True
+
+    def handle_data(self, data):
+        if self.inside:
+            self.__answer_chunks.append(data)
+
+    @property
+    def answer(self) -> str:
+        """
+        :return: Answer tag contents received so far
+        """
+        return "".join(self.__answer_chunks)
+
+    @property
+    def raw(self) -> str:
+        """
+        :return: Everything fed so far
+        """
+        return "".join(self.__raw_chunks)
+
+
+def extract_answer_tag(message_string: str, tag: str = "answer") -> str:
+    """
+    Get contents of the answer tag out of the complete LLM output
+
+    :param message_string: Raw LLM output
+    :param tag: Tag name, case-insensitive
+    :return: Answer tag contents, empty string if there's no tag
+    """
+    extractor = AnswerTagExtractor(tag)
+    extractor.feed(message_string)
+    # Flush text buffered by the parser, unclosed tag still gives what's in it
+    extractor.close()
+    return extractor.answer
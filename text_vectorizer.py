@@ -0,0 +1,83 @@
+import zlib
+import numpy as np
+
+
+class CharNgramVectorizer:
+    def __init__(self, n_features: int = 512, ngram_range: tuple[int, int] = (2, 4)):
+        """
+        CPU-only text vectorizer: character n-grams inside word boundaries, hashed into fixed amount of features
+
+        Hashing means no vocabulary to fit and store, vectors are stable between runs (crc32, not Python's hash)
+
+        :param n_features: Vector size
+        :param ngram_range: Min and max n-gram length
+        """
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+
+    def ngrams(self, text: str) -> list[str]:
+        """
+        Split text into character n-grams, every word padded with spaces, so word starts and ends are distinct
+
+        :param text: Any text
+        :return: List of n-grams
+        """
+        ngrams = []
+        for word in text.casefold().split():
+            padded = f" {word} "
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                ngrams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return ngrams
+
+    def feature_counts(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Sparse sublinear term frequencies of hashed n-grams
+
+        :param text: Any text
+        :return: Feature indices and their weights
+        """
+        counts = {}
+        for ngram in self.ngrams(text):
+            index = zlib.crc32(ngram.encode("UTF-8")) % self.n_features
+            counts[index] = counts.get(index, 0) + 1
+
+        indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+        values = 1. + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        return indices, values.astype(np.float32)
+
+    def dense(self, indices: np.ndarray, values: np.ndarray, idf: np.ndarray | None = None) -> np.ndarray:
+        """
+        Make L2 normalized dense vector out of sparse features
+
+        :param indices: Feature indices from feature_counts
+        :param values: Feature weights from feature_counts
+        :param idf: Optional inverse document frequency weights
+        :return: Dense float32 vector
+        """
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        vector[indices] = values
+        if idf is not None:
+            vector *= idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def transform(self, text: str, idf: np.ndarray | None = None) -> np.ndarray:
+        """
+        Text straight to L2 normalized dense vector
+
+        :param text: Any text
+        :param idf: Optional inverse document frequency weights
+        :return: Dense float32 vector
+        """
+        return self.dense(*self.feature_counts(text), idf=idf)
+
+
+def smooth_idf(document_frequency: np.ndarray, documents_count: int) -> np.ndarray:
+    """
+    Smoothed inverse document frequency, same formula as scikit-learn uses
+
+    :param document_frequency: Amount of documents every feature appeared in
+    :param documents_count: Total amount of documents
+    :return: float32 idf weights
+    """
+    return (np.log((1. + documents_count) / (1. + document_frequency)) + 1.).astype(np.float32)
@@ -10,107 +10,126 @@ logger = logging.getLogger("Delays")
 class PrettyPrintable:
     # Pretty print object fields, YAML-like
     def __str__(self):
-        pretty = ""
-        # For every property in object
-        for k, v in self.__dict__.items():
-            # If value even contains something
-            if v:
-                # If value is a list
-                if isinstance(v, list):
-                    # If all things in the list are strings or integers
-                    if all([isinstance(i, str) or isinstance(i, int) for i in v]):
-                        # We can absolutely print these values as list
-                        # With key as header
-                        # And items indented by "  - "
-                        pretty += f"{k}:\n"
-                        for v_item in v:
-                            pretty += f"  - {v_item}\n"
-                    # If all thing in the list are classes derived from PrettyPrintable
-                    elif all([isinstance(i, PrettyPrintable) for i in v]):
-                        # We can get pretty print from the class
-                        # With key as header
-                        # Resulting string indented by "    " and fist line by "  - "
-                        pretty += f"{k}:\n"
-                        for v_item in v:
-                            # Splitting by '\n', we should have last empty line, so remove it
-                            for i, v_item_line in enumerate(str(v_item).split('\n')[:-1]):
-                                if i == 0:
-                                    pretty += f"  - {v_item_line}\n"
-                                else:
-                                    pretty += f"    {v_item_line}\n"
-                    # TODO: If value type is not supported do something :)
-                    else:
-                        pass
-                # If value is a string or integer
-                elif isinstance(v, str) or isinstance(v, int):
-                    # We can just simply print in
-                    pretty += f"{k}: {v}\n"
-                # If value is pretty printable class
-                elif isinstance(v, PrettyPrintable):
-                    # Hand over pretty print to that class and indent result by "  "
-                    pretty += f"{k}:\n"
-                    pretty += "{}".format(indent(str(v), "  "))
-                # If value is boolean
-                elif isinstance(v, bool):
-                    # Handle almost the same way as string
-                    pretty += "{}: {}\n".format(k, "true" if v else "false")
-                # TODO: If value type is not supported do something :)
-                else:
-                    pass
-        # By now we should have all things printed here, return it
-        return pretty
+        return PrettyPrintable.pretty_print(self)
 
     @staticmethod
     def pretty_print(inst):
-        pretty = ""
+        # Lines are collected in a list and joined once, no string concatenation in loops
+        return "".join(f"{line}\n" for line in PrettyPrintable.pretty_lines(inst))
+
+    @staticmethod
+    def pretty_lines(inst) -> list[str]:
+        """
+        Pretty print object fields, YAML-like, line by line
+
+        :param inst: Any object, nested PrettyPrintable objects are printed recursively
+        :return: Lines without newline characters
+        """
+        lines = []
         # For every property in object
         for k, v in inst.__dict__.items():
             # If value even contains something
-            if v:
-                # If value is a list
-                if isinstance(v, list):
-                    # If all things in the list are strings or integers
-                    if all([isinstance(i, str) or isinstance(i, int) for i in v]):
-                        # We can absolutely print these values as list
-                        # With key as header
-                        # And items indented by "  - "
-                        pretty += f"{k}:\n"
-                        for v_item in v:
-                            pretty += f"  - {v_item}\n"
-                    # If all thing in the list are classes derived from PrettyPrintable
-                    elif all([isinstance(i, PrettyPrintable) for i in v]):
-                        # We can get pretty print from the class
-                        # With key as header
-                        # Resulting string indented by "    " and fist line by "  - "
-                        pretty += f"{k}:\n"
-                        for v_item in v:
-                            # Splitting by '\n', we should have last empty line, so remove it
-                            for i, v_item_line in enumerate(str(v_item).split('\n')[:-1]):
-                                if i == 0:
-                                    pretty += f"  - {v_item_line}\n"
-                                else:
-                                    pretty += f"    {v_item_line}\n"
-                    # TODO: If value type is not supported do something :)
-                    else:
-                        pass
-                # If value is a string or integer
-                elif isinstance(v, str) or isinstance(v, int):
-                    # We can just simply print in
-                    pretty += f"{k}: {v}\n"
-                # If value is pretty printable class
-                elif isinstance(v, PrettyPrintable):
-                    # Hand over pretty print to that class and indent result by "  "
-                    pretty += f"{k}:\n"
-                    pretty += "{}".format(indent(str(v), "  "))
-                # If value is boolean
-                elif isinstance(v, bool):
-                    # Handle almost the same way as string
-                    pretty += "{}: {}\n".format(k, "true" if v else "false")
+            if not v:
+                continue
+            # If value is a list
+            if isinstance(v, list):
+                # If all things in the list are strings or integers
+                if all(isinstance(i, (str, int)) for i in v):
+                    # We can absolutely print these values as list
+                    # With key as header
+                    # And items indented by "  - "
+                    lines.append(f"{k}:")
+                    for v_item in v:
+                        lines.extend(f"  - {v_item}".split("\n"))
+                # If all thing in the list are classes derived from PrettyPrintable
+                elif all(isinstance(i, PrettyPrintable) for i in v):
+                    # We can get pretty print from the class
+                    # With key as header
+                    # Resulting lines indented by "    " and fist line by "  - "
+                    lines.append(f"{k}:")
+                    for v_item in v:
+                        for i, v_item_line in enumerate(PrettyPrintable.pretty_lines(v_item)):
+                            lines.append(f"  - {v_item_line}" if i == 0 else f"    {v_item_line}")
                 # TODO: If value type is not supported do something :)
                 else:
                     pass
+            # If value is a string or integer (booleans are integers too)
+            elif isinstance(v, (str, int)):
+                # We can just simply print in
+                lines.extend(f"{k}: {v}".split("\n"))
+            # If value is pretty printable class
+            elif isinstance(v, PrettyPrintable):
+                # Hand over pretty print to that class and indent result by "  " (blank lines stay blank)
+                lines.append(f"{k}:")
+                lines.extend(f"  {line}" if line.strip() else line for line in PrettyPrintable.pretty_lines(v))
+            # TODO: If value type is not supported do something :)
+            else:
+                pass
         # By now we should have all things printed here, return it
-        return pretty
+        return lines
+
+    def to_compact(self) -> str:
+        """
+        Token-lean print of the same data: nested objects and short lists on a single line, no indentation
+
+        :return: Compact string
+        """
+        lines = []
+        for k, v in self.__dict__.items():
+            if not v:
+                continue
+            if isinstance(v, list) and v and all(isinstance(i, PrettyPrintable) for i in v):
+                lines.append(f"{k}:")
+                lines.extend(f"- {PrettyPrintable.compact_inline(i)}" for i in v)
+            else:
+                value = PrettyPrintable.compact_value(v)
+                if value:
+                    lines.append(f"{k}: {value}")
+        return "".join(f"{line}\n" for line in lines)
+
+    @staticmethod
+    def compact_inline(inst) -> str:
+        """
+        :param inst: Any object
+        :return: Object fields on a single line, separated by "; "
+        """
+        parts = []
+        for k, v in inst.__dict__.items():
+            if not v:
+                continue
+            value = PrettyPrintable.compact_value(v)
+            if value:
+                parts.append(f"{k}: {value}")
+        return "; ".join(parts)
+
+    @staticmethod
+    def compact_value(v) -> str:
+        """
+        :param v: Field value
+        :return: Value printed on a single line, empty string if type is not supported
+        """
+        if isinstance(v, list):
+            if all(isinstance(i, (str, int)) for i in v):
+                return " | ".join(str(i) for i in v)
+            elif all(isinstance(i, PrettyPrintable) for i in v):
+                return " | ".join(f"({PrettyPrintable.compact_inline(i)})" for i in v)
+            return ""
+        elif isinstance(v, (str, int)):
+            return " ".join(str(v).split("\n"))
+        elif isinstance(v, PrettyPrintable):
+            return PrettyPrintable.compact_inline(v)
+        return ""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count of a text, good enough for budgets, no tokenizer needed
+
+    :param text: Any text
+    :return: Estimated amount of tokens
+    """
+    # About 4 characters per token for English text with common tokenizers
+    return (len(text) + 3) // 4
 
 
 def wait_for(condition_func, timeout=4, check_delay_sec=0.1):